@@ -1,19 +1,37 @@
 
 import { useState, useEffect } from 'react'
 import './index.css'
-
-const GATEWAY_URL = 'http://localhost:8000';
+import { linkScanSites, scan, setLinkScanning } from './scanClient.js'
+
+// Through the background worker so the popup shares its verdict cache; direct in dev mode
+function requestScan(url) {
+    if (!globalThis.chrome?.runtime?.sendMessage) return scan(url);
+    return new Promise((resolve, reject) => {
+        chrome.runtime.sendMessage({ type: 'scan', url }, (response) => {
+            if (chrome.runtime.lastError || !response || response.error) {
+                reject(new Error(chrome.runtime.lastError?.message || response?.error || 'No response'));
+            } else {
+                resolve(response.verdict);
+            }
+        });
+    });
+}
 
 function App() {
     const [url, setUrl] = useState('')
     const [status, setStatus] = useState('idle') // idle, loading, result, error
     const [result, setResult] = useState(null)
+    const [site, setSite] = useState(null) // Active tab's hostname (not the editable URL field)
+    const [linkScan, setLinkScan] = useState(false) // Link scanning opted in for this site
 
     useEffect(() => {
         // Attempt to get current tab URL if extension context
         if (chrome && chrome.tabs && chrome.tabs.query) {
             chrome.tabs.query({ active: true, currentWindow: true }, (tabs) => {
                 if (tabs[0]) setUrl(tabs[0].url);
+                const hostname = hostnameOf(tabs[0]?.url);
+                setSite(hostname);
+                if (hostname) linkScanSites().then((sites) => setLinkScan(sites.includes(hostname)));
             });
         } else {
             setUrl("http://example.com/demo-article"); // Dev mode fallback
@@ -24,19 +42,7 @@ function App() {
         setStatus('loading');
         setResult(null);
         try {
-            const resp = await fetch(`${GATEWAY_URL}/scan`, {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    url: url,
-                    content_hash: btoa(url || "demo"), // Simple hash from URL for demo
-                    text_content: `Analysis of ${url}`, // Simulated extraction for demo
-                    media_urls: [],
-                    timestamp: new Date().toISOString()
-                })
-            });
-
-            const data = await resp.json();
+            const data = await requestScan(url);
             console.log("Scan Data:", data); // Debug
             setResult(data);
             setStatus('result');
@@ -46,6 +52,11 @@ function App() {
         }
     };
 
+    const toggleLinkScan = async () => {
+        await setLinkScanning(site, !linkScan);
+        setLinkScan(!linkScan);
+    };
+
     const getRiskScore = (res) => res?.tig_result?.risk_score || 0;
     const getConfidence = (res) => res?.tig_result?.confidence_score || 0;
 
@@ -69,6 +80,13 @@ function App() {
                     </button>
                 </div>
 
+                {site && globalThis.chrome?.storage?.sync && (
+                    <label className="link-scan-toggle">
+                        <input type="checkbox" checked={linkScan} onChange={toggleLinkScan} />
+                        Scan links on {site}
+                    </label>
+                )}
+
                 {status === 'error' && (
                     <div className="card error">
                         Scanning Failed. Check Gateway (Port 8000).
@@ -111,6 +129,15 @@ function App() {
     )
 }
 
+function hostnameOf(url) {
+    try {
+        const parsed = new URL(url);
+        return parsed.protocol === 'http:' || parsed.protocol === 'https:' ? parsed.hostname : null;
+    } catch {
+        return null;
+    }
+}
+
 function getLevel(score) {
     if (score > 0.7) return 'high';
     if (score > 0.4) return 'medium';
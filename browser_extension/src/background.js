@@ -0,0 +1,35 @@
+// TrustLens background worker: the single owner of the verdict cache, so the
+// popup and every tab's content script share it.
+//
+//   { type: 'scan', url }         -> { verdict } | { error }   (popup, interactive)
+//   { type: 'scan-links', urls }  -> { verdicts: { url: verdict | null } }   (content script, batched)
+//
+// scan-links is only honoured for tabs on a site the user opted into, even if
+// a content script asks (the allowlist is the privacy boundary, not the script).
+
+import { linkScanSites, scan, scanLinks } from './scanClient.js';
+
+async function linkScanAllowed(sender) {
+    try {
+        return (await linkScanSites()).includes(new URL(sender.tab?.url).hostname);
+    } catch {
+        return false;
+    }
+}
+
+chrome.runtime.onMessage.addListener((message, sender, sendResponse) => {
+    if (message?.type === 'scan') {
+        scan(message.url)
+            .then((verdict) => sendResponse({ verdict }))
+            .catch((e) => sendResponse({ error: String(e) }));
+        return true; // Responds asynchronously
+    }
+    if (message?.type === 'scan-links') {
+        linkScanAllowed(sender)
+            .then((allowed) => (allowed ? scanLinks(message.urls || []) : {}))
+            .then((verdicts) => sendResponse({ verdicts }))
+            .catch((e) => sendResponse({ error: String(e) }));
+        return true;
+    }
+    return false;
+});
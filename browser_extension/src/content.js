@@ -0,0 +1,117 @@
+// TrustLens content script: scans the links the reader can actually see.
+//
+// Off by default: link URLs reveal what the reader is browsing, so nothing is
+// sent unless this site is in the user's link-scan allowlist (toggled from the
+// popup, kept in chrome.storage.sync). Enabling a site starts scanning in
+// already open tabs; disabling it stops them.
+//
+// Links entering the viewport are collected for FLUSH_DELAY_MS and sent to the
+// background worker in one message; it answers from its verdict cache and
+// batches the rest into a single /scan/batch call. Each link is sent once per
+// page. Verdicts are shown as a data attribute and a tooltip, never by
+// rewriting the link.
+//
+// Content scripts cannot be ES modules, so this file has no imports.
+
+const FLUSH_DELAY_MS = 200;
+const MAX_LINKS_PER_PAGE = 300;
+const POSTURE_ATTR = 'data-trustlens-posture';
+const LINK_SCAN_SITES_KEY = 'trustlens.linkScanSites'; // Same key as scanClient.js (no imports here)
+
+const seen = new Set();
+let queue = new Map(); // url -> [anchor elements]
+let flushTimer = null;
+let enabled = false;
+
+function linkUrl(anchor) {
+    try {
+        const url = new URL(anchor.href, location.href);
+        if (url.protocol !== 'http:' && url.protocol !== 'https:') return null;
+        url.hash = '';
+        return url.href === location.href.split('#')[0] ? null : url.href;
+    } catch {
+        return null;
+    }
+}
+
+function annotate(anchors, verdict) {
+    if (!verdict?.trust_posture) return;
+    const risk = verdict.tig_result?.risk_score;
+    const label = `TrustLens: ${verdict.trust_posture.replace('_', ' ')}` +
+        (risk !== undefined ? ` (risk ${Math.round(risk * 100)}%)` : '');
+    for (const anchor of anchors) {
+        anchor.setAttribute(POSTURE_ATTR, verdict.trust_posture);
+        if (!anchor.title) anchor.title = label;
+    }
+}
+
+function flush() {
+    flushTimer = null;
+    const batch = queue;
+    queue = new Map();
+    if (!batch.size || !enabled) return;
+    chrome.runtime.sendMessage({ type: 'scan-links', urls: [...batch.keys()] }, (response) => {
+        if (chrome.runtime.lastError || !response?.verdicts) return; // Worker restarting or gateway down
+        for (const [url, verdict] of Object.entries(response.verdicts)) {
+            annotate(batch.get(url) || [], verdict);
+        }
+    });
+}
+
+function enqueue(anchor) {
+    if (!enabled) return;
+    const url = linkUrl(anchor);
+    if (!url) return;
+    if (queue.has(url)) {
+        queue.get(url).push(anchor);
+        return;
+    }
+    if (seen.has(url) || seen.size >= MAX_LINKS_PER_PAGE) return;
+    seen.add(url);
+    queue.set(url, [anchor]);
+    if (!flushTimer) flushTimer = setTimeout(flush, FLUSH_DELAY_MS);
+}
+
+const visibility = new IntersectionObserver((entries) => {
+    for (const entry of entries) {
+        if (entry.isIntersecting) {
+            visibility.unobserve(entry.target);
+            enqueue(entry.target);
+        }
+    }
+});
+
+function observeLinks(root) {
+    if (root.matches?.('a[href]')) visibility.observe(root);
+    root.querySelectorAll?.('a[href]').forEach((anchor) => visibility.observe(anchor));
+}
+
+const mutations = new MutationObserver((records) => {
+    for (const record of records) {
+        record.addedNodes.forEach((node) => {
+            if (node.nodeType === Node.ELEMENT_NODE) observeLinks(node);
+        });
+    }
+});
+
+function setEnabled(sites) {
+    const allowed = Array.isArray(sites) && sites.includes(location.hostname);
+    if (allowed === enabled) return;
+    enabled = allowed;
+    if (enabled) {
+        observeLinks(document);
+        mutations.observe(document.documentElement, { childList: true, subtree: true });
+    } else {
+        mutations.disconnect();
+        visibility.disconnect();
+        queue = new Map();
+        seen.clear();
+    }
+}
+
+chrome.storage.sync.get(LINK_SCAN_SITES_KEY)
+    .then((data) => setEnabled(data?.[LINK_SCAN_SITES_KEY]))
+    .catch(() => {});
+chrome.storage.onChanged.addListener((changes, area) => {
+    if (area === 'sync' && changes[LINK_SCAN_SITES_KEY]) setEnabled(changes[LINK_SCAN_SITES_KEY].newValue);
+});
@@ -0,0 +1,168 @@
+// TrustLens gateway client shared by the popup and the background worker.
+//
+// - Verdicts are cached locally (LRU + TTL) by content_hash, so re-opening the
+//   popup or re-rendering a page never re-scans content we just scanned.
+// - The TTL is whatever the gateway allows: Cache-Control max-age on /scan,
+//   per-item max_age on /scan/batch. no-store (degraded verdicts) is not cached.
+// - Concurrent requests for the same content share one in-flight call.
+// - Link scans are collected for BATCH_WINDOW_MS and sent as one /scan/batch.
+
+export const GATEWAY_URL = 'http://localhost:8000';
+// Hostnames the user opted into link scanning on (chrome.storage.sync; content.js reads the same key)
+export const LINK_SCAN_SITES_KEY = 'trustlens.linkScanSites';
+
+export async function linkScanSites() {
+    const data = await globalThis.chrome?.storage?.sync?.get(LINK_SCAN_SITES_KEY);
+    return data?.[LINK_SCAN_SITES_KEY] || [];
+}
+
+export async function setLinkScanning(hostname, on) {
+    const sites = (await linkScanSites()).filter((site) => site !== hostname);
+    if (on) sites.push(hostname);
+    await chrome.storage.sync.set({ [LINK_SCAN_SITES_KEY]: sites });
+}
+
+const MAX_ENTRIES = 500;
+const DEFAULT_TTL_S = 60;        // Gateway sent no Cache-Control (older gateway)
+const BATCH_WINDOW_MS = 50;
+const MAX_BATCH_ITEMS = 32;      // Gateway limit for /scan/batch
+const STORAGE_KEY = 'trustlens.verdicts';
+const PERSIST_DELAY_MS = 1000;
+
+const cache = new Map();         // content_hash -> { verdict, expiresAt }; insertion order = LRU order
+const inFlight = new Map();      // content_hash -> Promise<verdict>
+let pending = [];                // [{ item, resolve, reject }] waiting for the next batch
+let batchTimer = null;
+let persistTimer = null;
+
+// chrome.storage.session survives the service worker being suspended, but not a browser restart
+const storage = globalThis.chrome?.storage?.session;
+const restored = storage
+    ? storage.get(STORAGE_KEY).then((data) => {
+        const now = Date.now();
+        for (const [hash, entry] of data?.[STORAGE_KEY] || []) {
+            if (entry.expiresAt > now) cache.set(hash, entry);
+        }
+    }).catch(() => {})
+    : Promise.resolve();
+
+export async function contentHash(url) {
+    const digest = await crypto.subtle.digest('SHA-256', new TextEncoder().encode(url));
+    return Array.from(new Uint8Array(digest), (b) => b.toString(16).padStart(2, '0')).join('');
+}
+
+function cached(hash) {
+    const entry = cache.get(hash);
+    if (!entry) return null;
+    cache.delete(hash);
+    if (entry.expiresAt <= Date.now()) return null;
+    cache.set(hash, entry);  // Most recently used
+    return entry.verdict;
+}
+
+function store(hash, verdict, maxAgeS) {
+    if (maxAgeS === null || maxAgeS <= 0) return;
+    cache.delete(hash);
+    cache.set(hash, { verdict, expiresAt: Date.now() + maxAgeS * 1000 });
+    while (cache.size > MAX_ENTRIES) cache.delete(cache.keys().next().value);
+    if (storage && !persistTimer) {
+        persistTimer = setTimeout(() => {
+            persistTimer = null;
+            storage.set({ [STORAGE_KEY]: Array.from(cache) }).catch(() => {});
+        }, PERSIST_DELAY_MS);
+    }
+}
+
+// Seconds from a Cache-Control header; null = don't store
+function maxAgeFrom(response) {
+    const header = response.headers.get('Cache-Control');
+    if (!header) return DEFAULT_TTL_S;
+    if (/no-store|no-cache/i.test(header)) return null;
+    const match = /max-age=(\d+)/i.exec(header);
+    return match ? Number(match[1]) : DEFAULT_TTL_S;
+}
+
+async function scanItem(url) {
+    return {
+        url,
+        content_hash: await contentHash(url || 'demo'),
+        text_content: `Analysis of ${url}`, // Simulated extraction for demo
+        media_urls: [],
+        timestamp: new Date().toISOString()
+    };
+}
+
+function dedupe(hash, load) {
+    const verdict = cached(hash);
+    if (verdict) return Promise.resolve(verdict);
+    if (inFlight.has(hash)) return inFlight.get(hash);
+    const promise = load().finally(() => inFlight.delete(hash));
+    inFlight.set(hash, promise);
+    return promise;
+}
+
+// Interactive scan of one page (the popup)
+export async function scan(url) {
+    await restored;
+    const item = await scanItem(url);
+    return dedupe(item.content_hash, async () => {
+        const resp = await fetch(`${GATEWAY_URL}/scan`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(item)
+        });
+        if (!resp.ok) throw new Error(`Gateway returned ${resp.status}`);
+        const verdict = await resp.json();
+        store(item.content_hash, verdict, maxAgeFrom(resp));
+        return verdict;
+    });
+}
+
+// Background scan of one link: batched with the other links scanned in the same window
+export async function scanLink(url) {
+    await restored;
+    const item = await scanItem(url);
+    return dedupe(item.content_hash, () => new Promise((resolve, reject) => {
+        pending.push({ item, resolve, reject });
+        if (pending.length >= MAX_BATCH_ITEMS) {
+            flushBatch();
+        } else if (!batchTimer) {
+            batchTimer = setTimeout(flushBatch, BATCH_WINDOW_MS);
+        }
+    }));
+}
+
+// Verdicts for many links; links that failed (rate limited, overloaded) map to null
+export async function scanLinks(urls) {
+    const unique = [...new Set(urls)];
+    const verdicts = await Promise.all(unique.map((url) => scanLink(url).catch(() => null)));
+    return Object.fromEntries(unique.map((url, i) => [url, verdicts[i]]));
+}
+
+async function flushBatch() {
+    clearTimeout(batchTimer);
+    batchTimer = null;
+    const batch = pending.splice(0, MAX_BATCH_ITEMS);
+    if (pending.length) batchTimer = setTimeout(flushBatch, 0);
+    if (!batch.length) return;
+    try {
+        const resp = await fetch(`${GATEWAY_URL}/scan/batch`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ items: batch.map((p) => p.item) })
+        });
+        if (!resp.ok) throw new Error(`Gateway returned ${resp.status}`);
+        const { results } = await resp.json();
+        batch.forEach(({ item, resolve, reject }, i) => {
+            const result = results[i];
+            if (result?.status !== 200) {
+                reject(new Error(`Gateway returned ${result?.status} for ${item.url}`));
+                return;
+            }
+            store(item.content_hash, result.verdict, result.max_age);
+            resolve(result.verdict);
+        });
+    } catch (e) {
+        batch.forEach(({ reject }) => reject(e));
+    }
+}
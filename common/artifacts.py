@@ -0,0 +1,290 @@
+"""
+TRUSTLENS: ARTIFACT REGISTRY
+
+One manifest (artifact_manifest.json at the repo root) lists every model
+artifact a service loads: path relative to the repo root, format, sha256,
+size and load strategy. Paths no longer depend on the working directory the
+service was started from.
+
+Load strategies:
+    eager  - loaded while the service module is imported (small configs, hashes)
+    lazy   - not loaded at import; heavy imports (sklearn via pickle) wait with it.
+             Loaded by the first get() or by prefetch() once the service is ready
+    mmap   - memory-mapped on first get() ("npy" and "bytes" formats only); pages
+             are read on access and shared between prefork workers
+
+Every load is timed and hash-checked. A hash mismatch refuses the artifact
+(a pickle from an unknown source runs arbitrary code), and the service runs
+degraded exactly as if the file were missing. Text formats (json, text) are
+hashed with CRLF normalized to LF, so a Windows checkout with core.autocrlf
+verifies against the same manifest. After re-exporting an artifact, refresh
+the manifest:
+
+    python -m common.artifacts --refresh
+    python -m common.artifacts --check          # verify every entry, exit 1 on mismatch
+
+Usage:
+    artifacts = ArtifactRegistry("diffusion")
+    artifacts.load_eager()
+    model_hash = artifacts.get("model_hash", "unknown")
+    clf = artifacts.get("forest")                # first call unpickles
+    clf = await artifacts.aget("forest")         # same, off the event loop
+    artifacts.prefetch()                         # lazy entries in a background thread
+
+TRUSTLENS_ARTIFACT_LOAD=eager makes load_eager() also load lazy entries;
+=lazy keeps them on-demand only (no background prefetch, see common/startup.py).
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import sys
+import threading
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+MANIFEST_PATH = REPO_ROOT / "artifact_manifest.json"
+ARTIFACT_ROOT = Path(os.environ.get("TRUSTLENS_ARTIFACT_ROOT", REPO_ROOT))
+LOAD_OVERRIDE = os.environ.get("TRUSTLENS_ARTIFACT_LOAD")
+STRATEGIES = ("eager", "lazy", "mmap")
+MMAP_FORMATS = ("npy", "bytes")
+TEXT_FORMATS = ("json", "text")  # Hashed EOL-normalized: git may check these out with CRLF
+HASH_BLOCK = 1 << 20
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def artifact_digest(path, fmt):
+    """(sha256, bytes) as recorded in the manifest; text formats are hashed with LF line endings."""
+    if fmt not in TEXT_FORMATS:
+        return file_sha256(path), Path(path).stat().st_size
+    data = Path(path).read_bytes().replace(b"\r\n", b"\n")
+    return hashlib.sha256(data).hexdigest(), len(data)
+
+
+def _load_json(path, strategy):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _load_text(path, strategy):
+    with open(path, "r") as f:
+        return f.read().strip()
+
+
+def _load_pickle(path, strategy):
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def _load_npz(path, strategy):
+    import numpy as np
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+
+def _load_npy(path, strategy):
+    import numpy as np
+    return np.load(path, mmap_mode="r" if strategy == "mmap" else None)
+
+
+def _load_bytes(path, strategy):
+    with open(path, "rb") as f:
+        if strategy == "mmap":
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return f.read()
+
+
+LOADERS = {
+    "json": _load_json,
+    "text": _load_text,
+    "pickle": _load_pickle,
+    "npz": _load_npz,
+    "npy": _load_npy,
+    "bytes": _load_bytes,
+}
+
+
+def read_manifest(path=MANIFEST_PATH):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+class Artifact:
+    """One manifest entry plus its load state and timings."""
+
+    def __init__(self, service, name, spec):
+        self.service = service
+        self.name = name
+        self.path = ARTIFACT_ROOT / spec["path"]
+        self.format = spec["format"]
+        self.strategy = spec.get("load", "eager")
+        self.sha256 = spec.get("sha256")
+        self.bytes = spec.get("bytes")
+        if self.format not in LOADERS:
+            raise ValueError(f"{service}.{name}: unknown format {self.format!r}")
+        if self.strategy not in STRATEGIES:
+            raise ValueError(f"{service}.{name}: unknown load strategy {self.strategy!r}")
+        if self.strategy == "mmap" and self.format not in MMAP_FORMATS:
+            raise ValueError(f"{service}.{name}: mmap needs one of {MMAP_FORMATS}, not {self.format!r}")
+        self.value = None
+        self.loaded = False
+        self.error = None
+        self.verify_ms = None
+        self.load_ms = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Loads once; later calls return the cached value (None if the load failed)."""
+        if self.loaded or self.error:
+            return self.value
+        with self._lock:
+            if self.loaded or self.error:
+                return self.value
+            try:
+                if not self.path.exists():
+                    raise FileNotFoundError(str(self.path))
+                if self.sha256:
+                    t0 = time.perf_counter()
+                    actual, _ = artifact_digest(self.path, self.format)
+                    self.verify_ms = round((time.perf_counter() - t0) * 1000, 2)
+                    if actual != self.sha256:
+                        raise ValueError(f"sha256 {actual[:12]} != manifest {self.sha256[:12]} "
+                                         "(run `python -m common.artifacts --refresh` after re-exporting)")
+                t0 = time.perf_counter()
+                self.value = LOADERS[self.format](self.path, self.strategy)
+                self.load_ms = round((time.perf_counter() - t0) * 1000, 2)
+                self.loaded = True
+            except Exception as e:
+                self.error = f"{type(e).__name__}: {e}"
+                print(f"CRITICAL: Failed to load artifact {self.service}.{self.name}: {self.error}")
+        return self.value
+
+    def snapshot(self):
+        return {
+            "path": str(self.path.relative_to(ARTIFACT_ROOT)) if self.path.is_relative_to(ARTIFACT_ROOT) else str(self.path),
+            "format": self.format,
+            "load": self.strategy,
+            "bytes": self.bytes,
+            "loaded": self.loaded,
+            "verify_ms": self.verify_ms,
+            "load_ms": self.load_ms,
+            "error": self.error,
+        }
+
+
+class ArtifactRegistry:
+    """A service's artifacts from the manifest, loaded by strategy and timed."""
+
+    def __init__(self, service, manifest_path=MANIFEST_PATH):
+        self.service = service
+        try:
+            specs = read_manifest(manifest_path).get(service, {})
+        except Exception as e:
+            print(f"CRITICAL: Failed to read artifact manifest {manifest_path}: {e}")
+            specs = {}
+        self.artifacts = {name: Artifact(service, name, spec) for name, spec in specs.items()}
+        self.eager_ms = 0.0
+
+    def load_eager(self):
+        t0 = time.perf_counter()
+        for artifact in self.artifacts.values():
+            if artifact.strategy == "eager" or LOAD_OVERRIDE == "eager":
+                artifact.load()
+        self.eager_ms = round((time.perf_counter() - t0) * 1000, 2)
+        return self
+
+    def get(self, name, default=None):
+        artifact = self.artifacts.get(name)
+        if artifact is None:
+            return default
+        value = artifact.load()
+        return default if value is None else value
+
+    async def aget(self, name, default=None):
+        """get() for request handlers: a first (lazy) load runs in a worker thread, off the event loop."""
+        artifact = self.artifacts.get(name)
+        if artifact is not None and not artifact.loaded:
+            return await asyncio.to_thread(self.get, name, default)
+        return self.get(name, default)
+
+    def prefetch(self):
+        """Loads every not-yet-loaded entry in a daemon thread; returns the thread (None if nothing to do)."""
+        pending = [a for a in self.artifacts.values() if not a.loaded and not a.error]
+        if not pending or LOAD_OVERRIDE == "lazy":
+            return None
+        thread = threading.Thread(target=lambda: [a.load() for a in pending], daemon=True,
+                                  name=f"trustlens-prefetch-{self.service}")
+        thread.start()
+        return thread
+
+    def available(self, name):
+        """True if the artifact is loaded or can still be (without loading it)."""
+        artifact = self.artifacts.get(name)
+        return artifact is not None and artifact.error is None and (artifact.loaded or artifact.path.exists())
+
+    def snapshot(self):
+        return {name: artifact.snapshot() for name, artifact in self.artifacts.items()}
+
+
+# --- Manifest maintenance ---
+
+def refresh_manifest(paths=None, manifest_path=MANIFEST_PATH):
+    """Rewrites sha256/bytes for every entry (or only entries whose file is in `paths`)."""
+    manifest = read_manifest(manifest_path)
+    wanted = {Path(p).resolve() for p in paths} if paths is not None else None
+    changed = []
+    for service, specs in manifest.items():
+        for name, spec in specs.items():
+            path = (ARTIFACT_ROOT / spec["path"]).resolve()
+            if (wanted is not None and path not in wanted) or not path.exists():
+                continue
+            sha, size = artifact_digest(path, spec["format"])
+            if spec.get("sha256") != sha or spec.get("bytes") != size:
+                spec["sha256"], spec["bytes"] = sha, size
+                changed.append(f"{service}.{name}")
+    if changed:
+        with open(manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2)
+            f.write("\n")
+    return changed
+
+
+def check_manifest(manifest_path=MANIFEST_PATH):
+    """(service.name, problem) for every entry whose file is missing or differs from the manifest."""
+    problems = []
+    for service, specs in read_manifest(manifest_path).items():
+        for name, spec in specs.items():
+            path = ARTIFACT_ROOT / spec["path"]
+            if not path.exists():
+                problems.append((f"{service}.{name}", "missing"))
+            elif spec.get("sha256") and artifact_digest(path, spec["format"])[0] != spec["sha256"]:
+                problems.append((f"{service}.{name}", "sha256 mismatch"))
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TrustLens artifact manifest")
+    parser.add_argument("--refresh", action="store_true", help="Rewrite sha256/bytes from the files on disk")
+    parser.add_argument("--check", action="store_true", help="Verify every entry; exit 1 on problems")
+    args = parser.parse_args()
+    if args.refresh:
+        changed = refresh_manifest()
+        print(f"🔒 Manifest refreshed: {', '.join(changed) if changed else 'no changes'}")
+    if args.check or not args.refresh:
+        problems = check_manifest()
+        for key, problem in problems:
+            print(f"❌ {key}: {problem}")
+        if problems:
+            sys.exit(1)
+        print("✅ All artifacts match the manifest")
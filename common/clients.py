@@ -0,0 +1,101 @@
+"""
+TRUSTLENS: SHARED HTTP CLIENT SETTINGS
+
+Every httpx.AsyncClient() builds a fresh SSL context and parses the whole CA
+bundle into it (~50ms of CPU on the event loop), even for plain-http calls
+between services. The gateway builds two clients per scan plus one per job
+worker and prober; the media-fetching signals one per request. They all
+share one context instead, so a client costs ~2ms to construct:
+
+    async with httpx.AsyncClient(verify=ssl_context()) as client:
+        ...
+
+The context is built on first use with httpx's own defaults (certifi bundle,
+SSL_CERT_FILE / SSL_CERT_DIR honoured), so verification is unchanged.
+
+URLs that come from clients (media_urls, the page URL, webhooks) are fetched
+through stream_public(): http(s) only, and every hop of a redirect chain must
+resolve to public addresses, so a scan request can't reach loopback, private
+ranges or cloud metadata endpoints. TRUSTLENS_FETCH_ALLOW lists host[:port]
+exceptions (e.g. the replay harness's local media server).
+"""
+
+import asyncio
+import contextlib
+import functools
+import ipaddress
+import os
+import socket
+
+import httpx
+
+MAX_REDIRECTS = 5
+FETCH_ALLOW = {h.strip().lower() for h in os.environ.get("TRUSTLENS_FETCH_ALLOW", "").split(",") if h.strip()}
+
+
+@functools.lru_cache(maxsize=None)
+def ssl_context():
+    return httpx.create_ssl_context()
+
+
+# --- Fetching client-supplied URLs ---
+
+class BlockedURL(Exception):
+    """Target is not a public http(s) host."""
+
+
+def _allowed(host, port):
+    return host in FETCH_ALLOW or f"{host}:{port}" in FETCH_ALLOW
+
+
+async def check_public_url(url):
+    """Raises BlockedURL unless `url` is http(s) and every address its host resolves to is public."""
+    try:
+        parsed = httpx.URL(url)
+    except Exception as e:
+        raise BlockedURL(f"Invalid URL: {e}")
+    if parsed.scheme not in ("http", "https") or not parsed.host:
+        raise BlockedURL(f"Not an http(s) URL: {url}")
+    host = parsed.host.lower()
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    if _allowed(host, port):
+        return
+    try:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except OSError as e:
+        raise BlockedURL(f"Cannot resolve {host}: {e}")
+    for info in infos:
+        ip = ipaddress.ip_address(info[4][0].split("%")[0])
+        if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+            ip = ip.ipv4_mapped
+        if not ip.is_global:
+            raise BlockedURL(f"{host} resolves to non-public address {ip}")
+
+
+@contextlib.asynccontextmanager
+async def stream_public(client, url, timeout):
+    """
+    client.stream("GET", url) for client-supplied URLs: redirects are followed
+    here (the client must not follow them itself) and every hop is re-checked.
+    """
+    for _ in range(MAX_REDIRECTS + 1):
+        await check_public_url(url)
+        async with client.stream("GET", url, timeout=timeout) as resp:
+            if not resp.is_redirect:
+                yield resp
+                return
+            url = str(resp.url.join(resp.headers["location"]))
+    raise BlockedURL(f"More than {MAX_REDIRECTS} redirects")
+
+
+async def read_capped(resp, max_bytes):
+    """Response body, or None as soon as it exceeds max_bytes (never buffers more)."""
+    declared = resp.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > max_bytes:
+        return None
+    body = bytearray()
+    async for chunk in resp.aiter_bytes():
+        body += chunk
+        if len(body) > max_bytes:
+            return None
+    return bytes(body)
@@ -0,0 +1,141 @@
+"""
+TRUSTLENS: SHARED SERVICE METRICS
+
+Lightweight in-process telemetry for every FastAPI service: request rate,
+latency histogram, error rate, in-flight requests, event-loop lag, RSS and
+CPU. Exposed as JSON on GET /metrics and scraped by Sentinel.
+
+Usage:
+    app = FastAPI(...)
+    install_metrics(app, "diffusion")
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+
+from fastapi import FastAPI, Request
+
+from common.startup import is_warmup
+
+try:
+    import psutil
+except ImportError:  # Optional: falls back to /proc and os.times
+    psutil = None
+
+# Cumulative latency histogram bucket upper bounds (ms); last bucket is +inf
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+LAG_INTERVAL_S = 0.5
+EXCLUDED_PATHS = ("/metrics", "/health", "/debug/profile")
+
+
+class ServiceMetrics:
+    def __init__(self, service):
+        self.service = service
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self.requests_total = 0
+        self.errors_total = 0
+        self.in_flight = 0
+        self.latency_counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.latency_sum_ms = 0.0
+        self.loop_lag_ms = 0.0
+        self.loop_lag_max_ms = 0.0
+        self._lag_task = None
+        self.extras = {}  # name -> callable returning a JSON-able dict
+
+    def add_source(self, name, fn):
+        """Adds a service-specific section to the /metrics snapshot."""
+        self.extras[name] = fn
+
+    def observe(self, latency_ms, error):
+        idx = len(LATENCY_BUCKETS_MS)
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if latency_ms <= bound:
+                idx = i
+                break
+        with self._lock:
+            self.requests_total += 1
+            self.errors_total += int(error)
+            self.latency_counts[idx] += 1
+            self.latency_sum_ms += latency_ms
+
+    def ensure_lag_monitor(self):
+        if self._lag_task is None:
+            self._lag_task = asyncio.get_running_loop().create_task(self._monitor_loop_lag())
+
+    async def _monitor_loop_lag(self):
+        # Oversleep beyond the requested interval = time the loop was blocked
+        while True:
+            t0 = time.perf_counter()
+            await asyncio.sleep(LAG_INTERVAL_S)
+            lag = max(0.0, (time.perf_counter() - t0 - LAG_INTERVAL_S) * 1000)
+            self.loop_lag_ms = lag
+            self.loop_lag_max_ms = max(self.loop_lag_max_ms, lag)
+
+    def snapshot(self):
+        with self._lock:
+            snap = {
+                "service": self.service,
+                "pid": os.getpid(),
+                "timestamp": time.time(),
+                "uptime_s": round(time.time() - self.started_at, 1),
+                "requests_total": self.requests_total,
+                "errors_total": self.errors_total,
+                "in_flight": self.in_flight,
+                "latency_buckets_ms": list(LATENCY_BUCKETS_MS),
+                "latency_counts": list(self.latency_counts),
+                "latency_sum_ms": round(self.latency_sum_ms, 3),
+                "loop_lag_ms": round(self.loop_lag_ms, 3),
+                "loop_lag_max_ms": round(self.loop_lag_max_ms, 3),
+            }
+        snap.update(process_stats())
+        for name, fn in self.extras.items():
+            snap[name] = fn()
+        return snap
+
+
+def process_stats():
+    """RSS (bytes) and cumulative CPU seconds for this process."""
+    if psutil is not None:
+        proc = psutil.Process()
+        cpu = proc.cpu_times()
+        return {"rss_bytes": proc.memory_info().rss, "cpu_seconds": round(cpu.user + cpu.system, 3)}
+
+    times = os.times()
+    rss = None
+    if sys.platform.startswith("linux"):
+        with open("/proc/self/statm") as f:
+            rss = int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    return {"rss_bytes": rss, "cpu_seconds": round(times.user + times.system, 3)}
+
+
+def install_metrics(app: FastAPI, service: str) -> ServiceMetrics:
+    metrics = ServiceMetrics(service)
+    app.state.metrics = metrics
+
+    @app.middleware("http")
+    async def record_request(request: Request, call_next):
+        if request.url.path in EXCLUDED_PATHS or is_warmup(request):
+            return await call_next(request)
+        metrics.ensure_lag_monitor()
+        metrics.in_flight += 1
+        t0 = time.perf_counter()
+        error = True
+        try:
+            response = await call_next(request)
+            error = response.status_code >= 500
+            return response
+        finally:
+            metrics.in_flight -= 1
+            metrics.observe((time.perf_counter() - t0) * 1000, error)
+
+    @app.get("/metrics")
+    async def read_metrics():
+        metrics.ensure_lag_monitor()
+        # Sources may block (the gateway's job counts hit SQLite): keep them off the loop
+        return await asyncio.to_thread(metrics.snapshot)
+
+    return metrics
@@ -0,0 +1,267 @@
+"""
+TRUSTLENS: PREFORK SERVER
+
+Runs N uvicorn workers that share the models loaded by the parent.
+
+The parent imports the app once (module-level model loading happens here),
+runs a full GC and gc.freeze()s every surviving object, binds the listening
+socket and forks the workers. Frozen objects are never scanned by the
+children's collector, so model pages stay shared copy-on-write instead of
+being dirtied by GC bookkeeping; numpy buffers (sklearn forests, embedding
+matrices) are never written at all. Dead workers are re-forked.
+
+    python -m common.prefork serve signals.diffusion.main:app --port 8002 --workers 4
+    python -m common.prefork bench signals.diffusion.main:app --max-workers 4 --seconds 5 --compare
+
+Per-process state (metrics, caches, breakers) is per worker, so anything
+shared must go through the service's store: the S5 reputation LRU drops
+itself when a sibling writes the database, gateway jobs record the pid that
+owns them, and Sentinel keeps its telemetry windows per worker pid. Needs
+os.fork; on Windows `serve` falls back to a single uvicorn process.
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import uvicorn
+from uvicorn.importer import import_from_string
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+HOST = "127.0.0.1"
+RESPAWN_DELAY_S = 1.0
+BACKLOG = 2048
+
+
+def _bind(host, port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app_path, app, sock, log_level):
+    # Fresh signal dispositions: uvicorn installs its own handlers
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    if app is None:
+        app = import_from_string(app_path)  # --no-preload: private copy of every model
+    config = uvicorn.Config(app, log_level=log_level, lifespan="auto")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(app_path, host=HOST, port=8000, workers=2, preload=True, log_level="warning"):
+    if not hasattr(os, "fork"):
+        print("Prefork needs os.fork; running a single worker.")
+        uvicorn.run(app_path, host=host, port=port, log_level=log_level)
+        return
+
+    app = None
+    if preload:
+        t0 = time.perf_counter()
+        # Lazy artifacts (common.artifacts) would otherwise load once per worker, unshared
+        os.environ.setdefault("TRUSTLENS_ARTIFACT_LOAD", "eager")
+        app = import_from_string(app_path)
+        gc.collect()
+        gc.freeze()  # Everything loaded so far is permanent: keep GC off those pages
+        print(f"Preloaded {app_path} in {time.perf_counter() - t0:.2f}s ({gc.get_freeze_count()} objects frozen)")
+
+    sock = _bind(host, port)
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                _run_worker(app_path, app, sock, log_level)
+            finally:
+                os._exit(0)
+        children[pid] = time.time()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+    print(f"Serving {app_path} on {host}:{port} with {workers} workers (preload={preload}, parent {os.getpid()})")
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        children.pop(pid, None)
+        if not stopping:
+            print(f"Worker {pid} exited ({status}); re-forking")
+            time.sleep(RESPAWN_DELAY_S)
+            spawn()
+    sock.close()
+
+
+# --- Measurement ---
+
+SAMPLE_PAYLOAD = {
+    "content_hash": "bench-0000",
+    "text_content": "Breaking: officials confirm the report was accurate, sources say. " * 4,
+    "media_urls": [],
+    "timestamp": "2026-01-01T00:00:00Z",
+    "source_url": "https://verified-news.com/article",
+    "url": "https://verified-news.com/article",
+}
+
+
+def _load_worker(args):
+    url, seconds, concurrency = args
+    import httpx
+
+    async def run():
+        done = 0
+        errors = 0
+        deadline = time.perf_counter() + seconds
+        async with httpx.AsyncClient(timeout=10.0) as client:
+            async def loop(i):
+                nonlocal done, errors
+                payload = dict(SAMPLE_PAYLOAD, content_hash=f"bench-{i}")
+                while time.perf_counter() < deadline:
+                    try:
+                        resp = await client.post(url, json=payload)
+                        done += 1
+                        errors += resp.status_code >= 500
+                    except Exception:
+                        errors += 1
+            await asyncio.gather(*(loop(i) for i in range(concurrency)))
+        return done, errors
+
+    return asyncio.run(run())
+
+
+def _wait_ready(port, timeout=60.0):
+    import httpx
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://{HOST}:{port}/health", timeout=1.0).status_code == 200:
+                return True
+        except Exception:
+            pass
+        time.sleep(0.3)
+    return False
+
+
+def _memory(parent_pid):
+    import psutil
+    parent = psutil.Process(parent_pid)
+    workers = parent.children()
+    rows = []
+    for proc in workers:
+        info = proc.memory_full_info()  # uss/pss need Linux; rss everywhere
+        rows.append({"rss": info.rss, "uss": getattr(info, "uss", None), "pss": getattr(info, "pss", None)})
+    return rows
+
+
+def bench(app_path, max_workers, seconds, path, port, compare, cwd):
+    try:
+        import psutil  # noqa: F401
+    except ImportError:
+        sys.exit("bench needs psutil (pip install psutil)")
+
+    modes = [True, False] if compare else [True]
+    loaders = max(1, min(os.cpu_count() or 1, 4))
+    results = []
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])))
+    for preload in modes:
+        for n in range(1, max_workers + 1):
+            cmd = [sys.executable, "-m", "common.prefork", "serve", app_path, "--port", str(port), "--workers", str(n)]
+            if not preload:
+                cmd.append("--no-preload")
+            proc = subprocess.Popen(cmd, cwd=cwd or str(REPO_ROOT), env=env, stdout=subprocess.DEVNULL)
+            try:
+                if not _wait_ready(port):
+                    sys.exit(f"{app_path} did not come up on port {port}")
+                time.sleep(0.5)
+                url = f"http://{HOST}:{port}{path}"
+                with multiprocessing.Pool(loaders) as pool:
+                    counts = pool.map(_load_worker, [(url, seconds, 16)] * loaders)
+                mem = _memory(proc.pid)
+            finally:
+                proc.send_signal(signal.SIGTERM)
+                proc.wait(timeout=30)
+            done = sum(c[0] for c in counts)
+            rss = [m["rss"] for m in mem]
+            uss = [m["uss"] for m in mem if m["uss"] is not None]
+            pss = [m["pss"] for m in mem if m["pss"] is not None]
+            results.append({
+                "preload": preload,
+                "workers": n,
+                "rps": round(done / seconds, 1),
+                "errors": sum(c[1] for c in counts),
+                "rss_mb_per_worker": round(sum(rss) / len(rss) / 2**20, 1) if rss else None,
+                "uss_mb_per_worker": round(sum(uss) / len(uss) / 2**20, 1) if uss else None,
+                "pss_mb_total": round(sum(pss) / 2**20, 1) if pss else None,
+            })
+            time.sleep(1.0)  # Let the port drain
+
+    print(f"{'preload':>8} {'workers':>7} {'req/s':>9} {'scaling':>8} {'RSS/w MB':>9} {'USS/w MB':>9} {'PSS tot MB':>11}")
+    for r in results:
+        base = next(b for b in results if b["preload"] == r["preload"] and b["workers"] == 1)
+        scaling = r["rps"] / base["rps"] if base["rps"] else 0.0
+        print(f"{str(r['preload']):>8} {r['workers']:>7} {r['rps']:>9.1f} {scaling:>7.2f}x "
+              f"{r['rss_mb_per_worker'] or 0:>9.1f} {r['uss_mb_per_worker'] or 0:>9.1f} {r['pss_mb_total'] or 0:>11.1f}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="TrustLens prefork server")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p_serve = sub.add_parser("serve")
+    p_serve.add_argument("app")
+    p_serve.add_argument("--host", default=HOST)
+    p_serve.add_argument("--port", type=int, default=8000)
+    p_serve.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    p_serve.add_argument("--no-preload", dest="preload", action="store_false")
+    p_serve.add_argument("--log-level", default="warning")
+
+    p_bench = sub.add_parser("bench")
+    p_bench.add_argument("app")
+    p_bench.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    p_bench.add_argument("--seconds", type=float, default=5.0)
+    p_bench.add_argument("--path", default="/analyze")
+    p_bench.add_argument("--port", type=int, default=8900)
+    p_bench.add_argument("--compare", action="store_true", help="Also measure without preload (private models)")
+    p_bench.add_argument("--cwd", help="Working directory for the server (default: repo root)")
+    p_bench.add_argument("--json", action="store_true")
+
+    args = parser.parse_args(argv)
+    if args.cmd == "serve":
+        serve(args.app, args.host, args.port, args.workers, args.preload, args.log_level)
+    else:
+        results = bench(args.app, args.max_workers, args.seconds, args.path, args.port, args.compare, args.cwd)
+        if args.json:
+            print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
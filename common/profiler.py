@@ -0,0 +1,147 @@
+"""
+TRUSTLENS: ON-DEMAND PROFILER
+
+Guarded debug endpoint shared by the gateway, signals and TIG:
+
+    GET /debug/profile?seconds=10&interval_ms=5           -> collapsed stacks
+    GET /debug/profile?mode=alloc&seconds=30&limit=40     -> allocation diff
+
+CPU mode samples every thread's stack (sys._current_frames) from a helper
+thread and returns Brendan Gregg "collapsed" stacks, loadable in speedscope
+or flamegraph.pl. Alloc mode diffs two tracemalloc snapshots taken N seconds
+apart. Nothing runs until the endpoint is called, so the idle overhead is zero.
+
+The endpoint answers 404 unless TRUSTLENS_PROFILER_TOKEN is set, and callers
+must send that token as the X-Profiler-Token header.
+
+    curl -H "X-Profiler-Token: $TOKEN" "localhost:8002/debug/profile?seconds=15" > s2.collapsed
+"""
+
+import asyncio
+import os
+import secrets
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+PROFILER_TOKEN = os.environ.get("TRUSTLENS_PROFILER_TOKEN")
+MAX_SECONDS = 120
+MIN_INTERVAL_MS = 1
+ALLOC_FRAMES = 16
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples all thread stacks at a fixed interval into collapsed-stack counts."""
+
+    def __init__(self, interval_s):
+        self.interval_s = interval_s
+        self.counts = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="trustlens-profiler")
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        while not self._stop.is_set():
+            t0 = time.perf_counter()
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if ident not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(ident, f"thread-{ident}"))
+                self.counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+            # Fixed rate regardless of how long the walk took
+            self._stop.wait(max(0.0, self.interval_s - (time.perf_counter() - t0)))
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+async def profile_cpu(seconds, interval_ms):
+    sampler = StackSampler(interval_ms / 1000)
+    sampler.start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        await asyncio.to_thread(sampler.stop)
+    return sampler
+
+
+async def profile_alloc(seconds, limit):
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start(ALLOC_FRAMES)
+    try:
+        before = tracemalloc.take_snapshot()
+        await asyncio.sleep(seconds)
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        if started_here:
+            tracemalloc.stop()
+
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap>")]
+    stats = after.filter_traces(filters).compare_to(before.filter_traces(filters), "traceback")
+    lines = [f"# allocation diff over {seconds:g}s | traced now {current / 2**20:.1f} MiB, peak {peak / 2**20:.1f} MiB"]
+    for stat in stats[:limit]:
+        lines.append(f"{stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} blocks), {stat.size / 1024:.1f} KiB live")
+        lines.extend(f"    {line}" for line in stat.traceback.format(limit=ALLOC_FRAMES))
+    return "\n".join(lines) + "\n"
+
+
+def install_profiler(app: FastAPI, service: str):
+    busy = asyncio.Lock()
+
+    @app.get("/debug/profile", include_in_schema=False)
+    async def debug_profile(
+        seconds: float = Query(10.0, gt=0, le=MAX_SECONDS),
+        interval_ms: float = Query(5.0, ge=MIN_INTERVAL_MS, le=1000),
+        mode: str = Query("cpu", pattern="^(cpu|alloc)$"),
+        limit: int = Query(40, ge=1, le=500),
+        x_profiler_token: str = Header(None),
+    ):
+        if not PROFILER_TOKEN:
+            raise HTTPException(status_code=404, detail="Not Found")
+        if not x_profiler_token or not secrets.compare_digest(x_profiler_token, PROFILER_TOKEN):
+            raise HTTPException(status_code=403, detail="Invalid profiler token")
+        if busy.locked():
+            raise HTTPException(status_code=409, detail="A profile is already running")
+
+        async with busy:
+            stamp = time.strftime("%Y%m%d-%H%M%S")
+            if mode == "alloc":
+                body = await profile_alloc(seconds, limit)
+                filename = f"{service}-{os.getpid()}-{stamp}.alloc.txt"
+                headers = {}
+            else:
+                sampler = await profile_cpu(seconds, interval_ms)
+                body = sampler.collapsed()
+                filename = f"{service}-{os.getpid()}-{stamp}.collapsed"
+                headers = {"X-Profile-Samples": str(sampler.samples)}
+
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return PlainTextResponse(body, headers=headers)
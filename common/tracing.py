@@ -0,0 +1,375 @@
+"""
+TRUSTLENS: DISTRIBUTED TRACING
+
+Minimal W3C trace-context tracing shared by the gateway, signals and TIG.
+
+- Incoming `traceparent` headers are honoured; every hop adds a server span.
+- `span("name")` opens a child of the current span (contextvars, so it
+  follows asyncio tasks spawned by gather()).
+- `inject_headers()` returns the headers for an outgoing call.
+- Finished spans go to an exporter: JSONL file (default, shared by all
+  services) or an in-process MemoryExporter.
+
+Usage:
+    app = FastAPI(...)
+    install_tracing(app, "gateway")
+
+    with span("fetch", url=url):
+        ...
+
+Critical-path summary of a trace dump:
+    python -m common.tracing logs/traces.jsonl [--trace <trace_id>] [--top 15]
+"""
+
+import argparse
+import atexit
+import contextvars
+import json
+import os
+import random
+import secrets
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+TRACE_FILE = Path(os.environ.get("TRUSTLENS_TRACE_FILE", REPO_ROOT / "logs" / "traces.jsonl"))
+TRACE_EXPORT = os.environ.get("TRUSTLENS_TRACE_EXPORT", "file")  # file | memory | off
+SAMPLE_RATE = float(os.environ.get("TRUSTLENS_TRACE_SAMPLE", "1.0"))  # Root spans only
+FLUSH_INTERVAL_S = 1.0
+FLUSH_BATCH = 256
+EXCLUDED_PATHS = ("/metrics", "/health", "/debug/profile")
+
+_current = contextvars.ContextVar("trustlens_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "service", "sampled",
+                 "start", "_t0", "duration_ms", "attributes", "status")
+
+    def __init__(self, name, service, trace_id=None, parent_id=None, sampled=True, **attributes):
+        self.trace_id = trace_id or secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.name = name
+        self.service = service
+        self.sampled = sampled
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.duration_ms = None
+        self.attributes = attributes
+        self.status = "ok"
+
+    @property
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def record_error(self, exc):
+        self.status = "error"
+        self.attributes["error"] = f"{type(exc).__name__}: {exc}"
+
+    def end(self):
+        if self.duration_ms is None:
+            self.duration_ms = (time.perf_counter() - self._t0) * 1000
+            if self.sampled:
+                exporter.export(self)
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "service": self.service,
+            "start": self.start,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+def parse_traceparent(header):
+    """(trace_id, parent span id, sampled) or None for a missing/invalid header."""
+    if not header:
+        return None
+    parts = header.strip().split("-")
+    if len(parts) < 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    version, trace_id, parent_id, flags = parts[:4]
+    if version == "ff" or trace_id == "0" * 32 or parent_id == "0" * 16:
+        return None
+    try:
+        int(trace_id, 16), int(parent_id, 16)
+        sampled = bool(int(flags, 16) & 0x01)
+    except ValueError:
+        return None
+    return trace_id, parent_id, sampled
+
+
+class JsonlExporter:
+    """
+    Buffers spans and appends them to a JSONL file from a background thread.
+    export() runs on the event loop, so it never writes: a full buffer only
+    wakes the thread early.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._due = threading.Event()
+        self._thread = None
+
+    def export(self, span):
+        with self._lock:
+            self._buffer.append(span.to_dict())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="trace-exporter")
+                self._thread.start()
+            full = len(self._buffer) >= FLUSH_BATCH
+        if full:
+            self._due.set()
+
+    def _run(self):
+        while True:
+            self._due.wait(FLUSH_INTERVAL_S)
+            self._due.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            batch, self._buffer = self._buffer, []
+        if not batch:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # One write per batch in append mode: several services share the file
+        data = "".join(json.dumps(s, separators=(",", ":")) + "\n" for s in batch)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(data)
+
+
+class MemoryExporter:
+    """In-process collector (benchmarks, notebooks)."""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, span):
+        self.spans.append(span.to_dict())
+
+    def flush(self):
+        pass
+
+
+class NullExporter:
+    def export(self, span):
+        pass
+
+    def flush(self):
+        pass
+
+
+def _make_exporter(kind):
+    if kind == "memory":
+        return MemoryExporter()
+    if kind == "off":
+        return NullExporter()
+    return JsonlExporter(TRACE_FILE)
+
+
+exporter = _make_exporter(TRACE_EXPORT)
+atexit.register(lambda: exporter.flush())
+
+
+def set_exporter(new_exporter):
+    global exporter
+    exporter.flush()
+    exporter = new_exporter
+    return new_exporter
+
+
+def current_span():
+    return _current.get()
+
+
+@contextmanager
+def span(name, service=None, parent=None, **attributes):
+    """
+    Child span of `parent` (a traceparent tuple) or of the current span;
+    a root span if neither exists.
+    """
+    active = _current.get()
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+    elif active is not None:
+        trace_id, parent_id, sampled = active.trace_id, active.span_id, active.sampled
+    else:
+        trace_id, parent_id, sampled = None, None, random.random() < SAMPLE_RATE
+    s = Span(name, service or (active.service if active else "unknown"),
+             trace_id=trace_id, parent_id=parent_id, sampled=sampled, **attributes)
+    token = _current.set(s)
+    try:
+        yield s
+    except BaseException as e:
+        s.record_error(e)
+        raise
+    finally:
+        _current.reset(token)
+        s.end()
+
+
+def inject_headers(headers=None):
+    """Adds the current span's traceparent to outgoing request headers."""
+    headers = dict(headers or {})
+    active = _current.get()
+    if active is not None:
+        headers["traceparent"] = active.traceparent
+    return headers
+
+
+def install_tracing(app, service):
+    from fastapi import Request
+
+    from common.startup import is_warmup
+
+    @app.middleware("http")
+    async def trace_request(request: Request, call_next):
+        if request.url.path in EXCLUDED_PATHS:
+            return await call_next(request)
+        if is_warmup(request):
+            # Unsampled parent: spans the handler opens (e.g. TIG's fuse_evidence) are not exported
+            with span("warmup", service=service, parent=(secrets.token_hex(16), secrets.token_hex(8), False)):
+                return await call_next(request)
+        parent = parse_traceparent(request.headers.get("traceparent"))
+        with span(f"{request.method} {request.url.path}", service=service, parent=parent) as s:
+            response = await call_next(request)
+            s.set(status_code=response.status_code)
+            if response.status_code >= 500:
+                s.status = "error"
+            response.headers["traceparent"] = s.traceparent
+            return response
+
+
+# --- Trace dump analysis ---
+
+def load_spans(path):
+    traces = defaultdict(list)
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                s = json.loads(line)
+                traces[s["trace_id"]].append(s)
+    return traces
+
+
+def _label(s):
+    return f"{s['service']}:{s['name']}"
+
+
+def critical_path(spans):
+    """
+    [(label, self_ms)] along the critical path of one trace: starting from the
+    root, repeatedly descend into the child that finishes last before the
+    parent's remaining window; time not covered by such children is self time.
+    """
+    children = defaultdict(list)
+    ids = {s["span_id"] for s in spans}
+    roots = []
+    for s in spans:
+        if s["parent_id"] in ids:
+            children[s["parent_id"]].append(s)
+        else:
+            roots.append(s)
+    if not roots:
+        return []
+    root = max(roots, key=lambda s: s["duration_ms"])
+
+    path = []
+
+    def walk(node):
+        end = node["start"] + node["duration_ms"] / 1000
+        cursor = end
+        covered = 0.0
+        for child in sorted(children[node["span_id"]], key=lambda c: c["start"] + c["duration_ms"] / 1000, reverse=True):
+            child_end = child["start"] + child["duration_ms"] / 1000
+            if child_end > cursor + 1e-4 or child["start"] < node["start"] - 1e-4:
+                continue  # Overlaps a later child already on the path (or clock skew)
+            covered += child["duration_ms"]
+            walk(child)
+            cursor = child["start"]
+        path.append((_label(node), max(0.0, node["duration_ms"] - covered)))
+
+    walk(root)
+    return path[::-1]
+
+
+def summarize(traces, top=15):
+    totals = defaultdict(float)
+    counts = defaultdict(int)
+    root_ms = []
+    for spans in traces.values():
+        path = critical_path(spans)
+        if not path:
+            continue
+        root_ms.append(sum(ms for _, ms in path))
+        for label, ms in path:
+            totals[label] += ms
+            counts[label] += 1
+    if not root_ms:
+        print("No complete traces found.")
+        return
+
+    total = sum(root_ms)
+    root_ms.sort()
+    print(f"{len(root_ms)} traces | end-to-end p50 {root_ms[len(root_ms) // 2]:.1f}ms "
+          f"p99 {root_ms[min(len(root_ms) - 1, int(len(root_ms) * 0.99))]:.1f}ms")
+    print(f"{'critical-path stage':<48} {'traces':>7} {'avg self ms':>12} {'share':>7}")
+    for label, ms in sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        print(f"{label:<48} {counts[label]:>7} {ms / counts[label]:>12.2f} {ms / total * 100:>6.1f}%")
+
+
+def print_trace(spans):
+    by_parent = defaultdict(list)
+    ids = {s["span_id"] for s in spans}
+    for s in spans:
+        by_parent[s["parent_id"] if s["parent_id"] in ids else None].append(s)
+    t0 = min(s["start"] for s in spans)
+
+    def show(parent, depth):
+        for s in sorted(by_parent[parent], key=lambda s: s["start"]):
+            flag = " !" if s["status"] == "error" else ""
+            print(f"{(s['start'] - t0) * 1000:>8.1f}ms {'  ' * depth}{_label(s)} {s['duration_ms']:.1f}ms{flag}")
+            show(s["span_id"], depth + 1)
+
+    show(None, 0)
+    print("critical path:")
+    for label, ms in critical_path(spans):
+        print(f"  {label:<46} {ms:>8.2f}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Critical-path breakdown of a TrustLens trace dump")
+    parser.add_argument("path", nargs="?", default=str(TRACE_FILE))
+    parser.add_argument("--trace", help="Show a single trace as a tree")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    traces = load_spans(args.path)
+    if args.trace:
+        matches = [t for t in traces if t.startswith(args.trace)]
+        if not matches:
+            sys.exit(f"Trace {args.trace} not found in {args.path}")
+        print_trace(traces[matches[0]])
+    else:
+        summarize(traces, top=args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+TRUSTLENS: GATEWAY ADMISSION CONTROL
+
+Keeps traffic spikes from piling onto the signals.
+
+1. Token buckets per peer address -> 429. X-Client-Id is client-chosen, so it
+   is only a sub-key: each id gets a bucket inside its peer's budget, so
+   rotating ids never buys more than the peer rate.
+2. A global limit on in-flight scans, with a short bounded wait queue.
+3. Priority-aware shedding as in-flight scans approach the limit:
+     below SOFT      -> full scan (all signals)
+     SOFT..HARD      -> cached verdict if we have one, else degraded scan
+                        (cheap signals only, no media fetches)
+     at HARD         -> cached verdict, else queue (interactive only), else 503
+   Batch traffic (X-TrustLens-Priority: batch) hits every threshold earlier
+   and never queues, so interactive users are shed last.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict, deque
+
+# Rate limits: per peer address, and per X-Client-Id within a peer (several installs behind one NAT)
+RATE_PER_CLIENT = float(os.environ.get("GATEWAY_RATE_PER_CLIENT", "5"))    # tokens/s
+BURST_PER_CLIENT = float(os.environ.get("GATEWAY_BURST_PER_CLIENT", "20"))
+RATE_PER_PEER = float(os.environ.get("GATEWAY_RATE_PER_PEER", "20"))
+BURST_PER_PEER = float(os.environ.get("GATEWAY_BURST_PER_PEER", "80"))
+MAX_TRACKED_CLIENTS = 10000
+
+# Global concurrency
+MAX_IN_FLIGHT = int(os.environ.get("GATEWAY_MAX_IN_FLIGHT", "64"))
+SOFT_FRACTION = 0.75           # Degrade above this share of MAX_IN_FLIGHT
+BATCH_FRACTION = 0.5           # Batch traffic: thresholds scaled by this
+MAX_QUEUE = int(os.environ.get("GATEWAY_MAX_QUEUE", "128"))
+QUEUE_TIMEOUT_S = 2.0
+
+# Verdict cache (serves shed requests)
+VERDICT_TTL_S = 300.0
+VERDICT_CACHE_SIZE = 10000
+
+# Signals kept in degraded mode: no media fetches, no crypto
+DEGRADED_SIGNALS = ("source", "semantic", "diffusion")
+
+PRIORITIES = ("interactive", "batch")
+
+
+class Overloaded(Exception):
+    pass
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, burst):
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self, rate, burst):
+        """Returns 0 if a token was taken, else seconds until one is available."""
+        now = time.monotonic()
+        self.tokens = min(burst, self.tokens + (now - self.updated) * rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / rate
+
+
+class RateLimiter:
+    """
+    Two levels of buckets. The peer bucket is checked first, so a peer that
+    floods fresh client ids is throttled before any sub-bucket is created, and
+    can't churn other clients out of the LRU faster than its own rate.
+    """
+
+    def __init__(self, rate=RATE_PER_CLIENT, burst=BURST_PER_CLIENT, peer_rate=RATE_PER_PEER,
+                 peer_burst=BURST_PER_PEER, max_clients=MAX_TRACKED_CLIENTS):
+        self.rate = rate
+        self.burst = burst
+        self.peer_rate = peer_rate
+        self.peer_burst = peer_burst
+        self.max_clients = max_clients
+        self._peers = OrderedDict()
+        self._buckets = OrderedDict()  # (peer, client id) -> bucket
+
+    def _bucket(self, table, key, burst):
+        bucket = table.get(key)
+        if bucket is None:
+            bucket = table[key] = TokenBucket(burst)
+            if len(table) > self.max_clients:
+                table.popitem(last=False)  # Idle clients fall out (full bucket on return)
+        else:
+            table.move_to_end(key)
+        return bucket
+
+    def check(self, peer, client_id=None):
+        """0 if admitted, else seconds to wait. `peer` is the connection's address, never a header."""
+        retry_after = self._bucket(self._peers, peer, self.peer_burst).take(self.peer_rate, self.peer_burst)
+        if retry_after:
+            return retry_after
+        return self._bucket(self._buckets, (peer, client_id), self.burst).take(self.rate, self.burst)
+
+
+class VerdictCache:
+    """LRU + TTL cache of serialized scan responses, keyed by the gateway's verdict_key() of the scanned payload."""
+
+    def __init__(self, ttl=VERDICT_TTL_S, size=VERDICT_CACHE_SIZE):
+        self.ttl = ttl
+        self.size = size
+        self._items = OrderedDict()
+
+    def get(self, key):
+        hit = self.lookup(key)
+        return hit[0] if hit else None
+
+    def lookup(self, key):
+        """(body, age_s) of a live entry, else None; the age drives the Cache-Control clients get."""
+        item = self._items.get(key)
+        if item is None:
+            return None
+        stored_at, body = item
+        age = time.monotonic() - stored_at
+        if age > self.ttl:
+            del self._items[key]
+            return None
+        self._items.move_to_end(key)
+        return body, age
+
+    def put(self, key, body):
+        self._items[key] = (time.monotonic(), body)
+        self._items.move_to_end(key)
+        if len(self._items) > self.size:
+            self._items.popitem(last=False)
+
+    def __len__(self):
+        return len(self._items)
+
+
+class AdmissionController:
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, max_queue=MAX_QUEUE, queue_timeout=QUEUE_TIMEOUT_S):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters = deque()
+        self.counters = {
+            "full": 0, "degraded": 0, "cached": 0, "queued": 0,
+            "rejected_rate_limited": 0, "rejected_overload": 0, "queue_timeouts": 0,
+        }
+        self.queue_wait_ms_total = 0.0
+        self.queue_wait_ms_max = 0.0
+
+    def _limits(self, priority):
+        scale = BATCH_FRACTION if priority == "batch" else 1.0
+        hard = max(1, int(self.max_in_flight * scale))
+        soft = max(1, int(hard * SOFT_FRACTION))
+        return soft, hard
+
+    def decide(self, priority, has_cached):
+        """
+        Non-blocking part of admission: "full", "degraded", "cached" or "queue".
+        full/degraded reserve an in-flight slot that must be release()d.
+        """
+        soft, hard = self._limits(priority)
+        if self.in_flight < soft and not self._waiters:
+            self.in_flight += 1
+            return "full"
+        if has_cached:
+            return "cached"
+        if self.in_flight < hard and not self._waiters:
+            self.in_flight += 1
+            return "degraded"
+        return "queue"
+
+    async def wait_for_slot(self, priority):
+        """Queues for a slot (interactive only); raises Overloaded if none frees up in time."""
+        if priority == "batch" or len(self._waiters) >= self.max_queue:
+            raise Overloaded()
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self.counters["queued"] += 1
+        t0 = time.perf_counter()
+        try:
+            await asyncio.wait_for(fut, self.queue_timeout)  # release() hands its slot over
+        except asyncio.TimeoutError:
+            self.counters["queue_timeouts"] += 1
+            raise Overloaded()
+        finally:
+            if fut in self._waiters:
+                self._waiters.remove(fut)
+            waited = (time.perf_counter() - t0) * 1000
+            self.queue_wait_ms_total += waited
+            self.queue_wait_ms_max = max(self.queue_wait_ms_max, waited)
+
+    def release(self):
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(True)  # Slot passes straight to the waiter
+                return
+        self.in_flight -= 1
+
+    def record(self, outcome):
+        self.counters[outcome] += 1
+
+    def stats(self):
+        queued = self.counters["queued"]
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": len(self._waiters),
+            "queue_wait_ms_avg": round(self.queue_wait_ms_total / queued, 2) if queued else 0.0,
+            "queue_wait_ms_max": round(self.queue_wait_ms_max, 2),
+            **self.counters,
+        }
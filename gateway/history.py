@@ -0,0 +1,325 @@
+"""
+TRUSTLENS: SCAN HISTORY STORE
+
+Append-only, columnar record of every verdict the gateway returns.
+
+Layout (one directory per UTC day, one segment per writer process, so
+prefork workers never interleave writes):
+
+    data/scan_history/
+        schema.json
+        20261019/
+            seg-<pid>-<t0>/
+                hash.bin  ts.bin  posture.bin  risk.bin  confidence.bin
+                provenance_risk.bin  provenance_conf.bin  ...
+
+Each column is a raw little-endian array of one fixed dtype, so readers
+np.memmap it directly. A record is row i of every column in a segment; a
+torn tail (crash mid-flush) is ignored by reading only the shortest column.
+Unknown/failed signals are stored as NaN. numpy is imported on first
+flush/read rather than at import, so it stays off the gateway's startup path.
+
+    python -m gateway.history scan --since 2026-10-01 [--until 2026-10-20] [--posture high_risk]
+    python -m gateway.history bench --rows 1000000
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_DIR = Path(os.environ.get("SCAN_HISTORY_DIR", REPO_ROOT / "data" / "scan_history"))
+
+SIGNALS = ("provenance", "diffusion", "semantic", "forensics", "source")
+POSTURES = ("unknown", "neutral", "caution", "high_risk", "verified_source")
+
+COLUMNS = {
+    "hash": "S32",          # SHA-256 digest of the content hash
+    "ts": "<f8",            # Unix seconds
+    "posture": "u1",        # Index into POSTURES
+    "risk": "<f4",
+    "confidence": "<f4",
+}
+for _name in SIGNALS:
+    COLUMNS[f"{_name}_risk"] = "<f4"
+    COLUMNS[f"{_name}_conf"] = "<f4"
+
+FLUSH_ROWS = 256
+SEGMENT_MAX_ROWS = 1_000_000
+
+
+def digest(content_hash):
+    """32-byte key: the hash itself if it is 64 hex chars, else its SHA-256."""
+    try:
+        raw = bytes.fromhex(content_hash)
+        if len(raw) == 32:
+            return raw
+    except ValueError:
+        pass
+    return hashlib.sha256(content_hash.encode("utf-8")).digest()
+
+
+def partition_of(ts):
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y%m%d")
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+class HistoryWriter:
+    """
+    Buffers records and appends them column by column to this process's segment.
+    With auto_flush=False, record() only reports that the buffer is full and the owner flushes
+    (the gateway does it from its background flusher, off the event loop).
+    """
+
+    def __init__(self, root=DEFAULT_DIR, flush_rows=FLUSH_ROWS, auto_flush=True):
+        self.root = Path(root)
+        self.flush_rows = flush_rows
+        self.auto_flush = auto_flush
+        self._rows = []
+        self._lock = threading.Lock()
+        self._segment = None
+        self._segment_rows = 0
+        self._pid = None
+        self.written = 0
+
+    def record(self, content_hash, signals, tig_result, ts=None):
+        """Buffers one verdict; returns True when the buffer has reached flush_rows."""
+        signals = signals or {}
+        row = {
+            "hash": digest(content_hash),
+            "ts": ts if ts is not None else time.time(),
+            "posture": POSTURES.index(tig_result.get("overall_trust_posture"))
+            if tig_result.get("overall_trust_posture") in POSTURES else 0,
+            "risk": _float(tig_result.get("risk_score")),
+            "confidence": _float(tig_result.get("confidence_score")),
+        }
+        for name in SIGNALS:
+            data = signals.get(name) or {}
+            row[f"{name}_risk"] = _float(data.get("risk_score"))
+            row[f"{name}_conf"] = _float(data.get("confidence_score"))
+        with self._lock:
+            self._rows.append(row)
+            full = len(self._rows) >= self.flush_rows
+        if full and self.auto_flush:
+            self.flush()
+        return full
+
+    def _segment_for(self, ts):
+        partition = partition_of(ts)
+        if (self._segment is None or self._segment.parent.name != partition
+                or self._segment_rows >= SEGMENT_MAX_ROWS or self._pid != os.getpid()):
+            self._pid = os.getpid()
+            self._segment = self.root / partition / f"seg-{self._pid}-{time.time_ns()}"
+            self._segment.mkdir(parents=True, exist_ok=True)
+            self._segment_rows = 0
+            schema = self.root / "schema.json"
+            if not schema.exists():
+                schema.write_text(json.dumps({"columns": COLUMNS, "signals": SIGNALS, "postures": POSTURES}, indent=2))
+        return self._segment
+
+    def flush(self):
+        import numpy as np
+
+        with self._lock:
+            rows, self._rows = self._rows, []
+            if not rows:
+                return 0
+            # Group by day so a batch spanning midnight lands in both partitions
+            by_partition = {}
+            for row in rows:
+                by_partition.setdefault(partition_of(row["ts"]), []).append(row)
+            for batch in by_partition.values():
+                segment = self._segment_for(batch[0]["ts"])
+                for column, dtype in COLUMNS.items():
+                    values = np.array([r[column] for r in batch], dtype=dtype)
+                    with open(segment / f"{column}.bin", "ab") as f:
+                        f.write(values.tobytes())
+                self._segment_rows += len(batch)
+            self.written += len(rows)
+            return len(rows)
+
+
+def _day_range(since, until):
+    day = datetime.fromtimestamp(since, tz=timezone.utc).date()
+    last = datetime.fromtimestamp(until, tz=timezone.utc).date()
+    while day <= last:
+        yield day.strftime("%Y%m%d")
+        day += timedelta(days=1)
+
+
+class HistoryReader:
+    def __init__(self, root=DEFAULT_DIR):
+        self.root = Path(root)
+
+    def segments(self, since=None, until=None):
+        if not self.root.exists():
+            return
+        if since is None or until is None:
+            partitions = sorted(p.name for p in self.root.iterdir() if p.is_dir())
+            if since is not None:
+                partitions = [p for p in partitions if p >= partition_of(since)]
+            if until is not None:
+                partitions = [p for p in partitions if p <= partition_of(until)]
+        else:
+            partitions = list(_day_range(since, until))
+        for partition in partitions:
+            part_dir = self.root / partition
+            if part_dir.is_dir():
+                yield from sorted(p for p in part_dir.iterdir() if p.name.startswith("seg-"))
+
+    @staticmethod
+    def open_segment(segment, columns=None):
+        """{column: memmap}, all trimmed to the number of complete rows."""
+        import numpy as np
+
+        columns = columns or list(COLUMNS)
+        sizes = {}
+        for column in COLUMNS:
+            path = segment / f"{column}.bin"
+            sizes[column] = path.stat().st_size // np.dtype(COLUMNS[column]).itemsize if path.exists() else 0
+        rows = min(sizes.values())
+        if rows == 0:
+            return None
+        return {c: np.memmap(segment / f"{c}.bin", dtype=COLUMNS[c], mode="r", shape=(rows,)) for c in columns}
+
+    def scan(self, since=None, until=None, columns=None):
+        """Concatenated columns for records with since <= ts < until."""
+        import numpy as np
+
+        columns = list(dict.fromkeys(["ts"] + list(columns or COLUMNS)))
+        parts = {c: [] for c in columns}
+        for segment in self.segments(since, until):
+            data = self.open_segment(segment, columns)
+            if data is None:
+                continue
+            ts = data["ts"]
+            mask = np.ones(len(ts), dtype=bool)
+            if since is not None:
+                mask &= ts >= since
+            if until is not None:
+                mask &= ts < until
+            if not mask.any():
+                continue
+            for c in columns:
+                parts[c].append(np.asarray(data[c][mask]))
+        return {c: np.concatenate(v) if v else np.empty(0, dtype=COLUMNS[c]) for c, v in parts.items()}
+
+    def latest(self, content_hash, since=None):
+        """
+        Most recent record for a content hash, or None. Partitions are searched newest day first;
+        within a day, segments of different writer processes overlap in time, so every hit is
+        compared by ts.
+        """
+        import numpy as np
+
+        key = np.frombuffer(digest(content_hash), dtype="S32")[0]
+        by_partition = {}
+        for segment in self.segments(since, None):
+            by_partition.setdefault(segment.parent.name, []).append(segment)
+        for partition in sorted(by_partition, reverse=True):
+            best = None
+            for segment in by_partition[partition]:
+                data = self.open_segment(segment)
+                if data is None:
+                    continue
+                hits = np.flatnonzero(data["hash"] == key)
+                if len(hits):
+                    i = hits[np.argmax(data["ts"][hits])]
+                    if best is None or data["ts"][i] > best[0]["ts"][best[1]]:
+                        best = (data, i)
+            if best is not None:
+                data, i = best
+                record = {c: data[c][i].item() for c in COLUMNS if c != "hash"}
+                record["posture"] = POSTURES[record["posture"]]
+                return record
+        return None
+
+
+def summarize(data):
+    import numpy as np
+
+    n = len(data["ts"])
+    if n == 0:
+        return {"records": 0}
+    postures = np.bincount(data["posture"], minlength=len(POSTURES))
+    return {
+        "records": int(n),
+        "from": datetime.fromtimestamp(float(data["ts"].min()), tz=timezone.utc).isoformat(),
+        "to": datetime.fromtimestamp(float(data["ts"].max()), tz=timezone.utc).isoformat(),
+        "postures": {POSTURES[i]: int(c) for i, c in enumerate(postures) if c},
+        "mean_risk": round(float(np.nanmean(data["risk"])), 4) if np.isfinite(data["risk"]).any() else None,
+        "signal_mean_risk": {
+            name: (round(float(np.nanmean(col)), 4) if np.isfinite(col).any() else None)
+            for name in SIGNALS
+            for col in [data[f"{name}_risk"]]
+        },
+    }
+
+
+def _parse_day(value):
+    return datetime.strptime(value, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()
+
+
+def main():
+    import numpy as np
+
+    parser = argparse.ArgumentParser(description="TrustLens scan history")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_scan = sub.add_parser("scan")
+    p_scan.add_argument("--dir", default=str(DEFAULT_DIR))
+    p_scan.add_argument("--since", help="YYYY-MM-DD (UTC)")
+    p_scan.add_argument("--until", help="YYYY-MM-DD (UTC, exclusive)")
+    p_scan.add_argument("--posture", choices=POSTURES)
+    p_bench = sub.add_parser("bench")
+    p_bench.add_argument("--rows", type=int, default=1_000_000)
+    p_bench.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+
+    if args.cmd == "scan":
+        reader = HistoryReader(args.dir)
+        data = reader.scan(_parse_day(args.since) if args.since else None,
+                           _parse_day(args.until) if args.until else None)
+        if args.posture:
+            mask = data["posture"] == POSTURES.index(args.posture)
+            data = {c: v[mask] for c, v in data.items()}
+        print(json.dumps(summarize(data), indent=2))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rng = np.random.default_rng(0)
+        writer = HistoryWriter(tmp, flush_rows=50_000)
+        start = time.time() - args.days * 86400
+        ts = np.sort(rng.uniform(start, time.time(), args.rows))
+        t0 = time.perf_counter()
+        for i in range(args.rows):
+            writer.record(f"{i:064x}", {s: {"risk_score": 0.5, "confidence_score": 0.8} for s in SIGNALS},
+                          {"overall_trust_posture": "neutral", "risk_score": 0.4, "confidence_score": 0.7}, ts=float(ts[i]))
+        writer.flush()
+        write_s = time.perf_counter() - t0
+        reader = HistoryReader(tmp)
+        t0 = time.perf_counter()
+        week = reader.scan(time.time() - 7 * 86400, time.time(), columns=["risk", "posture"])
+        scan_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        found = reader.latest(f"{args.rows // 2:064x}")
+        lookup_s = time.perf_counter() - t0
+        size = sum(p.stat().st_size for p in Path(tmp).rglob("*.bin"))
+        print(f"write  {args.rows / write_s:,.0f} records/s ({size / args.rows:.0f} bytes/record)")
+        print(f"scan   last 7 days: {len(week['ts']):,} records in {scan_s * 1000:.1f}ms")
+        print(f"lookup hash across {args.days} partitions: {lookup_s * 1000:.1f}ms (found={found is not None})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""
+TRUSTLENS: GATEWAY ASYNC JOB QUEUE
+
+Slow scans (real page fetches, media forensics) can run outside the
+extension's interactive budget:
+
+    POST /scan?mode=async[&webhook=https://...]  -> 202 {"job_id", "status_url"}
+    GET  /jobs/{job_id}[?wait=10]                -> status / result (long-poll)
+
+Jobs live in a local SQLite queue (survives gateway restarts). A fixed pool of
+asyncio workers claims jobs oldest-first and runs the normal scan pipeline;
+on completion the result is stored and optionally POSTed to the webhook.
+
+Each running job records the pid of the process that claimed it. Under
+prefork several gateway workers share the queue, so a job is only re-queued
+once its owner is gone (checked on startup and periodically by idle workers),
+never while a live sibling is still running it. Long-polls watch the store,
+so a ?wait= served by one worker sees jobs finished by another.
+
+JobStore is blocking SQLite (a writer can hold the lock for a while under
+prefork), so JobQueue only ever calls it through asyncio.to_thread.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+from common.clients import BlockedURL, check_public_url, ssl_context
+
+try:
+    import psutil
+except ImportError:  # Optional: falls back to os.kill(pid, 0)
+    psutil = None
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_DB_PATH = os.environ.get("GATEWAY_JOBS_DB", str(REPO_ROOT / "data" / "gateway_jobs.sqlite"))
+
+JOB_WORKERS = int(os.environ.get("GATEWAY_JOB_WORKERS", "4"))
+MAX_QUEUED_JOBS = 10000
+MAX_ATTEMPTS = 3               # Re-queues after a crash mid-job
+JOB_TTL_S = 24 * 3600          # Finished jobs are purged after this
+PURGE_INTERVAL_S = 300
+IDLE_POLL_S = 1.0
+WEBHOOK_ATTEMPTS = 3
+WEBHOOK_TIMEOUT_S = 5.0
+MAX_WAIT_S = 30.0
+WAIT_POLL_S = 0.25             # Long-poll re-check of the store (job may finish in another worker)
+WAIT_POLL_MAX_S = 2.0          # ...backing off to this while the job keeps running
+RECOVER_INTERVAL_S = 30        # Idle workers reclaim jobs of dead processes
+
+
+class QueueFull(Exception):
+    pass
+
+
+def _pid_alive(pid):
+    if psutil is not None:
+        return psutil.pid_exists(pid)
+    if os.name != "posix":
+        return False  # No prefork off POSIX: a job owned by another pid belongs to a previous run
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobStore:
+    def __init__(self, path=DEFAULT_DB_PATH):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._connect()
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                request TEXT NOT NULL,
+                webhook_url TEXT,
+                result TEXT,
+                error TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                owner_pid INTEGER
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "owner_pid" not in columns:  # Queues created before owner tracking
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN owner_pid INTEGER")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, created_at)")
+        self._lock = threading.Lock()
+        if hasattr(os, "register_at_fork") and path != ":memory:":
+            # Prefork workers must not share the parent's SQLite handle
+            os.register_at_fork(after_in_child=self._reopen)
+
+    def _connect(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+    def _reopen(self):
+        self._lock = threading.Lock()
+        self._connect()
+
+    def submit(self, request, webhook_url=None):
+        with self._lock:
+            queued = self._conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if queued >= MAX_QUEUED_JOBS:
+                raise QueueFull()
+            job_id = uuid.uuid4().hex
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, request, webhook_url, created_at) VALUES (?, 'queued', ?, ?, ?)",
+                (job_id, json.dumps(request), webhook_url, time.time()),
+            )
+        return job_id
+
+    def claim(self):
+        """Atomically moves the oldest queued job to running; None if the queue is empty."""
+        with self._lock:
+            row = self._conn.execute("""
+                UPDATE jobs SET status = 'running', started_at = ?, attempts = attempts + 1, owner_pid = ?
+                WHERE id = (SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1)
+                RETURNING id, request, webhook_url, attempts
+            """, (time.time(), os.getpid())).fetchone()
+        return dict(row) if row else None
+
+    def finish(self, job_id, result=None, error=None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                ("failed" if error else "done", result, error, time.time(), job_id),
+            )
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+
+    def recover(self, own_running=()):
+        """
+        Jobs left 'running' by a dead process go back to the queue (or fail after MAX_ATTEMPTS).
+        Jobs of live processes are left alone; so are this process's own, except those not in
+        `own_running` (its jobs from a previous run that reused the pid).
+        """
+        pid = os.getpid()
+        with self._lock:
+            rows = self._conn.execute("SELECT id, owner_pid FROM jobs WHERE status = 'running'").fetchall()
+            orphans = [job_id for job_id, owner in rows
+                       if owner is None or (job_id not in own_running if owner == pid else not _pid_alive(owner))]
+            if not orphans:
+                return 0
+            marks = ",".join("?" * len(orphans))
+            self._conn.execute(
+                f"UPDATE jobs SET status = 'failed', error = 'too many attempts', finished_at = ?, owner_pid = NULL "
+                f"WHERE status = 'running' AND attempts >= ? AND id IN ({marks})",
+                (time.time(), MAX_ATTEMPTS, *orphans))
+            return self._conn.execute(
+                f"UPDATE jobs SET status = 'queued', started_at = NULL, owner_pid = NULL "
+                f"WHERE status = 'running' AND id IN ({marks})", orphans).rowcount
+
+    def purge(self, older_than_s=JOB_TTL_S):
+        with self._lock:
+            return self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?",
+                (time.time() - older_than_s,)).rowcount
+
+    def counts(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: n for status, n in rows}
+
+
+def job_view(job):
+    """Public JSON view of a job row."""
+    view = {
+        "job_id": job["id"],
+        "status": job["status"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+    if job["result"] is not None:
+        view["result"] = json.loads(job["result"])
+    if job["error"]:
+        view["error"] = job["error"]
+    return view
+
+
+class JobQueue:
+    """
+    runner: async callable(request dict) -> JSON string (the scan pipeline).
+    """
+
+    def __init__(self, runner, store=None, workers=JOB_WORKERS):
+        self.runner = runner
+        self.store = store or JobStore()
+        self.workers = workers
+        self._wakeup = asyncio.Event()
+        self._finished = {}  # job id -> asyncio.Event, for long-polling clients
+        self._running = set()  # Job ids this process is executing
+        self._tasks = []
+        self.completed = 0
+        self.failed = 0
+        self.webhook_failures = 0
+        self._last_purge = 0.0
+        self._last_recover = 0.0
+
+    async def _call(self, fn, *args):
+        return await asyncio.to_thread(fn, *args)
+
+    async def submit(self, request, webhook_url=None):
+        job_id = await self._call(self.store.submit, request, webhook_url)
+        self._wakeup.set()
+        return job_id
+
+    async def wait(self, job_id, timeout):
+        job = await self._call(self.store.get, job_id)
+        if job is None or job["status"] in ("done", "failed") or timeout <= 0:
+            return job
+        # The local event fires when this process finishes the job; polling catches other workers
+        event = self._finished.setdefault(job_id, asyncio.Event())
+        deadline = time.monotonic() + min(timeout, MAX_WAIT_S)
+        poll = WAIT_POLL_S
+        try:
+            while (remaining := deadline - time.monotonic()) > 0:
+                try:
+                    await asyncio.wait_for(event.wait(), min(remaining, poll))
+                except asyncio.TimeoutError:
+                    pass
+                poll = min(poll * 2, WAIT_POLL_MAX_S)
+                job = await self._call(self.store.get, job_id)
+                if job is None or job["status"] in ("done", "failed"):
+                    return job
+        finally:
+            if not event.is_set():
+                self._finished.pop(job_id, None)
+        return await self._call(self.store.get, job_id)
+
+    async def recover(self):
+        self._last_recover = time.time()
+        recovered = await self._call(self.store.recover, set(self._running))
+        if recovered:
+            print(f"♻️ Re-queued {recovered} interrupted scan jobs")
+        return recovered
+
+    async def start(self):
+        await self.recover()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self, index):
+        async with httpx.AsyncClient(verify=ssl_context()) as client:
+            while True:
+                job = await self._call(self.store.claim)
+                if job is None:
+                    self._wakeup.clear()
+                    job = await self._call(self.store.claim)  # Re-check: a submit may have raced the clear()
+                if job is None:
+                    if index == 0 and time.time() - self._last_purge > PURGE_INTERVAL_S:
+                        self._last_purge = time.time()
+                        await self._call(self.store.purge)
+                    if index == 0 and time.time() - self._last_recover > RECOVER_INTERVAL_S:
+                        await self.recover()  # A sibling worker may have died mid-job
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), IDLE_POLL_S)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                result, error = None, None
+                self._running.add(job["id"])
+                try:
+                    result = await self.runner(json.loads(job["request"]))
+                    self.completed += 1
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+                    self.failed += 1
+                finally:
+                    self._running.discard(job["id"])
+                await self._call(self.store.finish, job["id"], result, error)
+
+                event = self._finished.pop(job["id"], None)
+                if event:
+                    event.set()
+                if job["webhook_url"]:
+                    await self._notify(client, job["webhook_url"], await self._call(self.store.get, job["id"]))
+
+    async def _notify(self, client, url, job):
+        payload = job_view(job)
+        for attempt in range(WEBHOOK_ATTEMPTS):
+            try:
+                # Re-resolved on every attempt (DNS may have been rebound since submit); no redirects
+                await check_public_url(url)
+                resp = await client.post(url, json=payload, timeout=WEBHOOK_TIMEOUT_S)
+                if resp.status_code < 500:
+                    return
+            except BlockedURL:
+                break
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(2 ** attempt)
+        self.webhook_failures += 1
+        print(f"Webhook delivery failed for job {job['id']}: {url}")
+
+    def stats(self):
+        """Blocks on the store: call from a thread (the /stats and /metrics handlers do)."""
+        return {
+            "workers": self.workers,
+            "jobs": self.store.counts(),
+            "completed": self.completed,
+            "failed": self.failed,
+            "webhook_failures": self.webhook_failures,
+        }
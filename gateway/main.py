@@ -1,11 +1,64 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Response
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field, FiniteFloat
 from typing import List, Optional, Dict, Any
 import httpx
 import asyncio
 import os
+import json
+import hashlib
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
 
-app = FastAPI(title="TrustLens API Gateway")
+from common.clients import BlockedURL, check_public_url, read_capped, ssl_context, stream_public
+from common.metrics import install_metrics
+from common.profiler import install_profiler
+from common.startup import install_startup_report
+from common.tracing import install_tracing, span, inject_headers
+from .admission import AdmissionController, RateLimiter, VerdictCache, Overloaded, DEGRADED_SIGNALS, PRIORITIES
+from .breaker import BreakerRegistry
+from .jobs import JobQueue, QueueFull, job_view
+from .history import HistoryWriter
+
+HISTORY_FLUSH_S = 5.0
+
+history_due = asyncio.Event()  # Set by the request path when the history buffer fills
+
+async def flush_history():
+    # Every HISTORY_FLUSH_S or as soon as the buffer fills; file I/O stays off the event loop
+    while True:
+        try:
+            await asyncio.wait_for(history_due.wait(), HISTORY_FLUSH_S)
+        except asyncio.TimeoutError:
+            pass
+        history_due.clear()
+        await asyncio.to_thread(history.flush)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    prober = asyncio.create_task(breakers.probe_forever(signal_health_urls))
+    flusher = asyncio.create_task(flush_history())
+    await jobs.start()
+    yield
+    prober.cancel()
+    flusher.cancel()
+    await jobs.stop()
+    history.flush()
+
+app = FastAPI(title="TrustLens API Gateway", lifespan=lifespan)
+metrics = install_metrics(app, "gateway")
+install_tracing(app, "gateway")
+install_profiler(app, "gateway")
+install_startup_report(app, "gateway", warmup=[("GET", "/health")])
+logger = logging.getLogger("trustlens.gateway")
+
+admission = AdmissionController()
+rate_limiter = RateLimiter()
+verdicts = VerdictCache()
+history = HistoryWriter(auto_flush=False)
+metrics.add_source("admission", admission.stats)
 
 from fastapi.middleware.cors import CORSMiddleware
 app.add_middleware(
@@ -14,6 +67,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Age", "X-TrustLens-Admission"],
 )
 
 # Configuration (Env vars in prod)
@@ -25,6 +79,38 @@ SIGNAL_URLS = {
     "source": "http://localhost:8005/analyze",
 }
 TIG_URL = "http://localhost:8006/inference"
+MAX_BATCH_ITEMS = 32  # /scan/batch: one page's worth of visible links
+MAX_PAGE_BYTES = 2 * 1024 * 1024  # Page fetch for scans without text
+
+# Replica registry published by the Sentinel supervisor (optional)
+ENDPOINTS_FILE = os.environ.get(
+    "TRUSTLENS_ENDPOINTS", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "run", "endpoints.json")
+)
+_replicas = {"mtime": None, "services": {}}
+_round_robin = itertools.count()
+
+def resolve_signal_urls() -> Dict[str, str]:
+    """Picks one replica per signal (round-robin); falls back to the static ports."""
+    try:
+        mtime = os.path.getmtime(ENDPOINTS_FILE)
+        if mtime != _replicas["mtime"]:
+            with open(ENDPOINTS_FILE, "r") as f:
+                _replicas["services"] = json.load(f)
+            _replicas["mtime"] = mtime
+    except (OSError, ValueError):
+        return SIGNAL_URLS
+
+    turn = next(_round_robin)
+    urls = {}
+    for name, url in SIGNAL_URLS.items():
+        bases = _replicas["services"].get(name)
+        urls[name] = f"{bases[turn % len(bases)]}/analyze" if bases else url
+    return urls
+
+breakers = BreakerRegistry(SIGNAL_URLS)
+
+def signal_health_urls() -> Dict[str, str]:
+    return {name: url[:-len("/analyze")] + "/health" for name, url in resolve_signal_urls().items()}
 
 class ScanRequest(BaseModel):
     url: str
@@ -32,6 +118,11 @@ class ScanRequest(BaseModel):
     text_content: Optional[str] = None
     media_urls: List[str] = []
     timestamp: str
+    # Optional share-timing metadata, forwarded to the diffusion signal (replays, crawlers)
+    simulated_iat_sequence: Optional[List[FiniteFloat]] = None
+
+class BatchScanRequest(BaseModel):
+    items: List[ScanRequest] = Field(..., min_length=1, max_length=MAX_BATCH_ITEMS)
 
 class TrustResponse(BaseModel):
     request_id: str
@@ -40,29 +131,191 @@ class TrustResponse(BaseModel):
     tig_result: Dict[str, Any]
 
 async def query_signal(client: httpx.AsyncClient, name: str, url: str, payload: dict) -> dict:
-    try:
-        resp = await client.post(url, json=payload, timeout=5.0)
-        resp.raise_for_status()
-        return {name: resp.json()}
-    except Exception as e:
-        print(f"Error querying {name}: {e}")
-        # Fail-safe: Return default unknown/neutral for this signal
-        return {name: {"risk_level": "unknown", "confidence": 0.0, "error": str(e)}}
+    breaker = breakers[name]
+    with span(f"signal.{name}", url=url, breaker=breaker.state) as s:
+        if not breaker.allow():
+            # Open circuit: fail fast instead of waiting out the timeout
+            return {name: {"risk_level": "unknown", "confidence": 0.0, "error": "circuit open"}}
+        t0 = time.perf_counter()
+        try:
+            resp = await client.post(url, json=payload, headers=inject_headers(), timeout=5.0)
+            resp.raise_for_status()
+            breaker.record(True, (time.perf_counter() - t0) * 1000)
+            return {name: resp.json()}
+        except Exception as e:
+            # 4xx means the service answered: only outages and 5xx count against the breaker
+            breaker.record(isinstance(e, httpx.HTTPStatusError) and e.response.status_code < 500, (time.perf_counter() - t0) * 1000)
+            s.record_error(e)
+            logger.warning(f"Signal {name} failed (trace {s.trace_id}): {e}")
+            # Fail-safe: Return default unknown/neutral for this signal
+            return {name: {"risk_level": "unknown", "confidence": 0.0, "error": str(e)}}
+
+def verdict_key(request: ScanRequest) -> str:
+    """
+    Shared verdict-cache key, derived here from everything the scan looks at. The
+    client's content_hash (a hash of the URL) is not trusted: a verdict scanned
+    with one client's text/media/timings is never served for another payload.
+    """
+    scanned = [request.url, request.text_content, request.media_urls, request.simulated_iat_sequence]
+    return hashlib.sha256(json.dumps(scanned, separators=(",", ":")).encode()).hexdigest()
+
+def rate_limit_keys(http_request: Request):
+    """(peer address, X-Client-Id sub-key): the header alone never picks the bucket."""
+    peer = http_request.client.host if http_request.client else "unknown"
+    return peer, http_request.headers.get("x-client-id")
+
+async def run_job(payload: dict) -> str:
+    request = ScanRequest(**payload)
+    key = verdict_key(request)  # Before the scan: run_scan may fill in text_content
+    body = await run_scan(request)
+    verdicts.put(key, body)
+    return body
+
+jobs = JobQueue(run_job)
+metrics.add_source("jobs", jobs.stats)
 
 @app.post("/scan", response_model=TrustResponse)
-async def scan_content(request: ScanRequest):
+async def scan_content(request: ScanRequest, http_request: Request, mode: str = "sync", webhook: Optional[str] = None):
+    # 0. Admission control: per-client rate limit, then load-aware shedding
+    peer, client_id = rate_limit_keys(http_request)
+    priority = http_request.headers.get("x-trustlens-priority", "interactive")
+    if priority not in PRIORITIES:
+        priority = "interactive"
+
+    retry_after = rate_limiter.check(peer, client_id)
+    if retry_after:
+        admission.record("rejected_rate_limited")
+        raise HTTPException(status_code=429, detail="Rate limit exceeded", headers={"Retry-After": str(max(1, round(retry_after)))})
+
+    if mode == "async":
+        # Queued for the worker pool; bypasses the interactive concurrency limit
+        if webhook:
+            # The worker POSTs results there: no loopback/private targets (re-checked at delivery)
+            try:
+                await check_public_url(webhook)
+            except BlockedURL as e:
+                raise HTTPException(status_code=400, detail=f"webhook rejected: {e}")
+        try:
+            job_id = await jobs.submit(request.model_dump(), webhook)
+        except QueueFull:
+            raise HTTPException(status_code=503, detail="Job queue full", headers={"Retry-After": "5"})
+        status_url = f"/jobs/{job_id}"
+        return JSONResponse(status_code=202, content={"job_id": job_id, "status": "queued", "status_url": status_url},
+                            headers={"Location": status_url})
+
+    try:
+        mode, body, age = await admit_and_scan(request, priority)
+    except Overloaded:
+        raise HTTPException(status_code=503, detail="Gateway overloaded", headers={"Retry-After": "1"})
+    return Response(content=body, media_type="application/json",
+                    headers={"X-TrustLens-Admission": mode, **cache_headers(mode, age)})
+
+@app.post("/scan/batch")
+async def scan_batch(batch: BatchScanRequest, http_request: Request):
+    """
+    Many scans in one call (the extension's visible-link scanning). Cached verdicts cost nothing;
+    every other item takes a rate-limit token and runs at batch priority unless the caller asks
+    for interactive. Items fail individually (429/503); duplicates are scanned once.
+    """
+    peer, client_id = rate_limit_keys(http_request)
+    priority = http_request.headers.get("x-trustlens-priority", "batch")
+    if priority not in PRIORITIES:
+        priority = "batch"
+
+    async def scan_item(request):
+        hit = verdicts.lookup(verdict_key(request))
+        if hit is not None:
+            # Background scans take the gateway's live verdict rather than a fresh scan
+            admission.record("cached")
+            mode, body, age = "cached", *hit
+        else:
+            retry_after = rate_limiter.check(peer, client_id)
+            if retry_after:
+                admission.record("rejected_rate_limited")
+                return {"status": 429, "retry_after": max(1, round(retry_after))}, None
+            try:
+                mode, body, age = await admit_and_scan(request, priority)
+            except Overloaded:
+                return {"status": 503, "retry_after": 1}, None
+        return {"status": 200, "admission": mode, "max_age": client_max_age(mode, age)}, body
+
+    keys = [verdict_key(item) for item in batch.items]  # Before any scan mutates an item
+    unique = {}
+    for key, item in zip(keys, batch.items):
+        unique.setdefault(key, item)
+    outcomes = dict(zip(unique, await asyncio.gather(*(scan_item(r) for r in unique.values()))))
+
+    # Verdict bodies are already serialized: splice them in rather than re-encoding
+    parts = []
+    for key, item in zip(keys, batch.items):
+        meta, body = outcomes[key]
+        head = json.dumps({"url": item.url, "content_hash": item.content_hash, **meta})
+        parts.append(head[:-1] + ', "verdict": ' + body + "}" if body is not None else head)
+    return Response(content='{"results": [' + ", ".join(parts) + "]}", media_type="application/json",
+                    headers={"Cache-Control": "no-store"})
+
+async def admit_and_scan(request: ScanRequest, priority: str):
+    """Verdict cache, load-aware admission and the scan itself -> (mode, body, age_s). Raises Overloaded."""
+    cache_key = verdict_key(request)
+    hit = verdicts.lookup(cache_key)
+    mode = admission.decide(priority, has_cached=hit is not None)
+    if mode == "queue":
+        try:
+            await admission.wait_for_slot(priority)
+            mode = "degraded"  # Only reached at capacity
+        except Overloaded:
+            admission.record("rejected_overload")
+            raise
+    admission.record(mode)
+    if mode == "cached":
+        return (mode, *hit)
+
+    try:
+        signals = None if mode == "full" else DEGRADED_SIGNALS
+        body = await run_scan(request, signals)
+    finally:
+        admission.release()
+    if mode == "full":
+        verdicts.put(cache_key, body)  # Degraded verdicts are never reused
+    return mode, body, 0.0
+
+def client_max_age(mode: str, age: float = 0.0) -> Optional[int]:
+    """Clients may reuse a verdict for as long as the gateway's own cache would; None = don't store."""
+    if mode not in ("full", "cached"):
+        return None  # Degraded verdicts are never reused
+    return max(0, int(verdicts.ttl - age))
+
+def cache_headers(mode: str, age: float = 0.0) -> Dict[str, str]:
+    max_age = client_max_age(mode, age)
+    if max_age is None:
+        return {"Cache-Control": "no-store"}
+    headers = {"Cache-Control": f"private, max-age={max_age}"}
+    if age >= 1:
+        headers["Age"] = str(int(age))
+    return headers
+
+async def run_scan(request: ScanRequest, signals=None) -> str:
+    """Full scan pipeline; `signals` restricts the fan-out (degraded mode). Returns the JSON body."""
     # 1. Validation & Content Fetching
     # REAL PRODUCT UPGRADE: Actually fetch the URL content
     if not request.text_content or len(request.text_content) < 50:
         try:
             print(f"Fetching real content from: {request.url}")
-            async with httpx.AsyncClient(follow_redirects=True) as client:
-                resp = await client.get(request.url, timeout=10.0)
+            with span("fetch", url=request.url):
+                # Client-supplied URL: public hosts only, every redirect re-checked, bounded read
+                async with httpx.AsyncClient(verify=ssl_context()) as client:
+                    async with stream_public(client, request.url, timeout=10.0) as resp:
+                        page = await read_capped(resp, MAX_PAGE_BYTES)
+                        encoding = resp.charset_encoding or "utf-8"
+            if page is None:
+                raise ValueError(f"page larger than {MAX_PAGE_BYTES} bytes")
+            with span("extract") as s:
                 # Simple HTML to Text (Production would use BeautifulSoup)
                 # Just taking the first 5000 chars of raw HTML body for now
                 # to enable semantic analysis
-                raw_text = resp.text[:5000] 
+                raw_text = page.decode(encoding, errors="replace")[:5000]
                 request.text_content = raw_text
+                s.set(chars=len(raw_text))
                 print(f"Fetched {len(raw_text)} chars.")
         except Exception as e:
             print(f"Fetch failed: {e}")
@@ -70,12 +323,14 @@ async def scan_content(request: ScanRequest):
 
     # 2. Fan-out to Signals
     payload = request.model_dump()
+    payload["source_url"] = request.url  # Signal services key on source_url
     
-    async with httpx.AsyncClient() as client:
+    async with httpx.AsyncClient(verify=ssl_context()) as client:
         # Launch all signal requests in parallel
         tasks = [
             query_signal(client, name, url, payload) 
-            for name, url in SIGNAL_URLS.items()
+            for name, url in resolve_signal_urls().items()
+            if signals is None or name in signals
         ]
         
         # S4 (Forensics) is conditional: only if media_urls present
@@ -86,13 +341,18 @@ async def scan_content(request: ScanRequest):
     aggregated_signals = {}
     for res in results_list:
         aggregated_signals.update(res)
+    for name in SIGNAL_URLS:
+        if name not in aggregated_signals:
+            # Shed under load: counts as unknown evidence in the TIG
+            aggregated_signals[name] = {"risk_level": "unknown", "confidence": 0.0, "skipped": "load_shedding"}
         
     # 4. Forward to Trust Inference Graph (TIG)
     # The TIG adds the "Trust Posture" and "Conflict Resolution"
     try:
-        async with httpx.AsyncClient() as client:
-             tig_resp = await client.post(TIG_URL, json={"signals": aggregated_signals}, timeout=2.0)
-             tig_result = tig_resp.json()
+        with span("fusion"):
+            async with httpx.AsyncClient(verify=ssl_context()) as client:
+                 tig_resp = await client.post(TIG_URL, json={"signals": aggregated_signals}, headers=inject_headers(), timeout=2.0)
+                 tig_result = tig_resp.json()
     except Exception as e:
         # Fallback if TIG fails
         tig_result = {
@@ -101,14 +361,32 @@ async def scan_content(request: ScanRequest):
             "explanation": "Trust Engine unavailable."
         }
             
-    # 5. Return Final Response
-    return TrustResponse(
-        request_id=request.content_hash, # Simplified
-        trust_posture=tig_result.get("overall_trust_posture", "unknown"),
-        signals=aggregated_signals,
-        tig_result=tig_result
-    )
+    # Compact columnar record for trend analytics / backfills
+    if history.record(request.content_hash, aggregated_signals, tig_result):
+        history_due.set()
+
+    # 5. Return Final Response (validated + serialized once, inside its own span)
+    with span("serialization"):
+        body = TrustResponse(
+            request_id=request.content_hash, # Simplified
+            trust_posture=tig_result.get("overall_trust_posture", "unknown"),
+            signals=aggregated_signals,
+            tig_result=tig_result
+        ).model_dump_json()
+    return body
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait: float = 0.0):
+    """Job status; with ?wait=N, long-polls up to N seconds for completion."""
+    job = await jobs.wait(job_id, wait)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job_view(job)
+
+@app.get("/stats")
+def admission_statistics():
+    return {**admission.stats(), "verdict_cache_entries": len(verdicts), "jobs": jobs.stats(), "history_records": history.written}
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "layer": "gateway"}
+    return {"status": "healthy", "layer": "gateway", "breakers": breakers.snapshot()}
@@ -0,0 +1,216 @@
+"""
+TRUSTLENS: SIGNAL 2 - DIFFUSION DISTILLATION (OPTIONAL STEP)
+
+Fits a binned lookup table to the locked isolation forest's risk scores so
+the diffusion service can answer most requests without walking the forest.
+Runs after s2_diffusion_train.py (or via its --distill flag).
+
+Steps:
+1. Score a large distillation sample with the forest in batch: BehaviorEngine IAT
+   sequences plus broad log-uniform "coverage" sequences, so unusual inputs still
+   land in populated cells.
+2. Quantile-bin the four log-space IAT features; per cell keep mean forest risk,
+   row count and risk spread.
+3. Measure the fidelity gap on held-out rows: distilled vs forest error, decision
+   agreement at 0.6, ground-truth AUC, fallback rate and single-row latency.
+
+Cells that are sparse or noisy, inputs outside the binned range and risks near
+the decision threshold are flagged uncertain; the service re-scores those with
+the forest.
+
+Artifact Export:
+- distilled_lookup.npz
+- manifest.json ("distilled" section: thresholds, fidelity gap, latency)
+- artifact_manifest.json entry (repo root) refreshed so the service accepts the new table
+
+Usage:
+    python mlops/colab_notebooks/s2_diffusion_distill.py --samples 1000000 --bins 12
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "mlops" / "data_generators"))
+sys.path.insert(0, str(REPO_ROOT / "mlops" / "evaluation"))
+
+from behavior_engine import BehaviorEngine, IAT_COUNT, iat_sequences  # noqa: E402
+from common.artifacts import refresh_manifest  # noqa: E402
+from eval_suite import roc_auc  # noqa: E402
+from signals.diffusion.distilled import DECISION_THRESHOLD, DistilledScorer  # noqa: E402
+from signals.diffusion.features import FEATURE_NAMES, iat_features  # noqa: E402
+from signals.diffusion.features import risk_from_decision  # noqa: E402
+
+OUTPUT_DIR = str(REPO_ROOT / "diffusion_model_artifact")
+DISTILLED_FILE = "distilled_lookup.npz"
+DISTILL_SEED = 7
+HOLDOUT_SEED = 8
+DEFAULT_SAMPLES = 1_000_000
+HOLDOUT_ROWS = 100_000
+DEFAULT_BINS = 12
+MIN_COUNT = 20         # Rows a cell needs before its mean is trusted
+MAX_SPREAD = 0.08      # Max std of forest risk within a trusted cell
+BOUNDARY_BAND = 0.05   # Risks this close to DECISION_THRESHOLD go to the forest
+LATENCY_CALLS = 200
+SCORE_CHUNK = 250_000
+
+
+def compute_hash(file_path):
+    sha256_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for byte_block in iter(lambda: f.read(4096), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
+def distillation_sample(n, seed):
+    """(iats, is_coordinated or None): half engine traffic, half log-uniform coverage rows."""
+    rng = np.random.default_rng(seed)
+    half = n // 2
+    batch = BehaviorEngine(seed=seed).generate_diffusion_batch(half)
+    engine_X = iat_sequences(batch, rng)
+    mean = np.exp(rng.uniform(np.log(0.05), np.log(300.0), n - half))
+    sigma = rng.uniform(0.0, 2.5, n - half)
+    mu = np.log(mean) - sigma ** 2 / 2
+    coverage_X = np.exp(mu[:, None] + sigma[:, None] * rng.standard_normal((n - half, IAT_COUNT)))
+    return np.vstack([engine_X, coverage_X]), batch["s2_is_coordinated"]
+
+
+def forest_risk(clf, X):
+    return np.concatenate([risk_from_decision(clf.decision_function(X[i:i + SCORE_CHUNK]))
+                           for i in range(0, len(X), SCORE_CHUNK)])
+
+
+def fit_table(feats, risk, bins):
+    """Quantile edges per feature, then per-cell mean / count / spread of the forest risk."""
+    edges = [np.unique(np.quantile(feats[:, i], np.linspace(0, 1, bins + 1))) for i in range(feats.shape[1])]
+    shape = tuple(len(e) - 1 for e in edges)
+    index = tuple(np.clip(np.searchsorted(e, feats[:, i], side="right") - 1, 0, len(e) - 2) for i, e in enumerate(edges))
+    flat = np.ravel_multi_index(index, shape)
+    size = int(np.prod(shape))
+    count = np.bincount(flat, minlength=size)
+    total = np.bincount(flat, risk, size)
+    squares = np.bincount(flat, risk ** 2, size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(count > 0, total / count, np.nan)
+        spread = np.sqrt(np.maximum(np.where(count > 0, squares / count, 0.0) - np.nan_to_num(mean) ** 2, 0.0))
+    # Empty cells answer the global mean but are never trusted (count 0 < MIN_COUNT)
+    mean = np.where(np.isnan(mean), float(risk.mean()), mean)
+    return edges, mean.reshape(shape).astype(np.float32), count.reshape(shape).astype(np.int32), spread.reshape(shape).astype(np.float32)
+
+
+def single_row_us(fn, X):
+    fn(X[:1])
+    times = []
+    for i in range(min(LATENCY_CALLS, len(X))):
+        t0 = time.perf_counter()
+        fn(X[i:i + 1])
+        times.append((time.perf_counter() - t0) * 1e6)
+    return {f"p{q}": round(float(np.percentile(times, q)), 1) for q in (50, 90, 99)}
+
+
+def fidelity(clf, scorer, X, y_engine):
+    """Gap between the distilled (with forest fallback) scorer and the forest on held-out rows."""
+    forest = forest_risk(clf, X)
+    distilled, uncertain = scorer.score(X)
+    served = np.where(uncertain, forest, distilled)
+    confident = ~uncertain
+    err = np.abs(distilled - forest)
+    engine = slice(0, len(y_engine))
+
+    def served_call(rows):
+        risk, unsure = scorer.score(rows)
+        if unsure[0]:
+            risk = risk_from_decision(clf.decision_function(rows))
+        return risk
+
+    latency_rows = X[np.random.default_rng(HOLDOUT_SEED).permutation(len(X))[:LATENCY_CALLS]]
+    return {
+        "rows": int(len(X)),
+        "fallback_rate": round(float(uncertain.mean()), 4),
+        "mae_table_vs_forest": round(float(err.mean()), 4),
+        "mae_confident": round(float(err[confident].mean()), 4) if confident.any() else None,
+        "p99_abs_err_confident": round(float(np.percentile(err[confident], 99)), 4) if confident.any() else None,
+        "mae_served_vs_forest": round(float(np.abs(served - forest).mean()), 4),
+        "decision_agreement": round(float(((served > DECISION_THRESHOLD) == (forest > DECISION_THRESHOLD)).mean()), 4),
+        "auc_forest": round(roc_auc(y_engine, forest[engine]), 4),
+        "auc_served": round(roc_auc(y_engine, served[engine]), 4),
+        "latency_single_row_us": {
+            "forest": single_row_us(lambda r: clf.decision_function(r), latency_rows),
+            "distilled_only": single_row_us(scorer.score, latency_rows),
+            "served_with_fallback": single_row_us(served_call, latency_rows),
+        },
+    }
+
+
+def distill(model_dir=OUTPUT_DIR, samples=DEFAULT_SAMPLES, bins=DEFAULT_BINS):
+    print("🧪 Distilling Signal 2 forest into a lookup table...")
+    model_path = f"{model_dir}/diffusion_isolation_forest.pkl"
+    with open(model_path, "rb") as f:
+        clf = pickle.load(f)
+    forest_sha = compute_hash(model_path)
+
+    t0 = time.perf_counter()
+    X, _ = distillation_sample(samples, DISTILL_SEED)
+    risk = forest_risk(clf, X)
+    label_s = time.perf_counter() - t0
+    edges, table, count, spread = fit_table(iat_features(X), risk, bins)
+    print(f"   - Forest labelled {len(X):,} rows in {label_s:.1f}s; table {table.shape} "
+          f"({(count > 0).mean():.0%} cells populated)")
+
+    out_path = f"{model_dir}/{DISTILLED_FILE}"
+    np.savez(
+        out_path, risk=table, count=count, spread=spread, n_features=len(edges),
+        min_count=MIN_COUNT, max_spread=MAX_SPREAD, boundary_band=BOUNDARY_BAND, forest_sha256=forest_sha,
+        **{f"edges_{i}": e for i, e in enumerate(edges)},
+    )
+    scorer = DistilledScorer(out_path)
+
+    X_hold, y_hold = distillation_sample(HOLDOUT_ROWS, HOLDOUT_SEED)
+    gap = fidelity(clf, scorer, X_hold, y_hold)
+    lat = gap["latency_single_row_us"]
+    print(f"✅ Fidelity: MAE {gap['mae_table_vs_forest']:.4f} (confident cells {gap['mae_confident']}), "
+          f"decision agreement {gap['decision_agreement']:.2%}, fallback {gap['fallback_rate']:.1%}")
+    print(f"   - AUC forest {gap['auc_forest']:.4f} vs served {gap['auc_served']:.4f}")
+    print(f"   - Single-row p50: forest {lat['forest']['p50']:.0f}us, distilled {lat['distilled_only']['p50']:.0f}us, "
+          f"served {lat['served_with_fallback']['p50']:.0f}us")
+
+    manifest_path = Path(model_dir) / "manifest.json"
+    manifest = json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    manifest["distilled"] = {
+        "artifact": DISTILLED_FILE,
+        "sha256": compute_hash(out_path),
+        "forest_sha256": forest_sha,
+        "distilled_at": datetime.now().isoformat(timespec="seconds"),
+        "features": list(FEATURE_NAMES),
+        "table_shape": list(table.shape),
+        "populated_cells": int((count > 0).sum()),
+        "distillation_rows": int(len(X)),
+        "thresholds": {"min_count": MIN_COUNT, "max_spread": MAX_SPREAD, "boundary_band": BOUNDARY_BAND,
+                       "decision_threshold": DECISION_THRESHOLD},
+        "fidelity": gap,
+    }
+    manifest_path.write_text(json.dumps(manifest, indent=2))
+    print(f"🔒 Distilled table written: {out_path} ({os.path.getsize(out_path) / 1024:.0f} KiB)")
+    if refresh_manifest([out_path]):
+        print("   - Artifact manifest refreshed: diffusion.distilled")
+    return manifest["distilled"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TrustLens S2 forest distillation")
+    parser.add_argument("--model-dir", default=OUTPUT_DIR)
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES)
+    parser.add_argument("--bins", type=int, default=DEFAULT_BINS)
+    args = parser.parse_args()
+    distill(args.model_dir, args.samples, args.bins)
@@ -4,25 +4,76 @@ TRUSTLENS: SIGNAL 2 - DIFFUSION RISKS (ENHANCED MODEL)
 This script calibrates the Observable Diffusion Risk model using Isolation Forest for burst anomaly detection.
 Features:
 - Inter-arrival time (IAT) sequence modeling
-- Structural viral coefficient (SVC) estimation
-- Calibration against known organic vs coordinated datasets
+- Streams IAT sequences from a stored synthetic dataset (or the BehaviorEngine) chunk by chunk
+- Parallel grid search over n_estimators, max_samples, contamination and feature set (process pool)
+- Serving latency of every candidate measured in the same run (single-row, as analyze_diffusion calls it)
+- Winner = fastest configuration on the quality/latency Pareto front within QUALITY_TOLERANCE of the best AUC
+- Three-way split: fit / validation (grid + selection) / test. The metrics reported in
+  manifest.json come from the test split, which plays no part in choosing the winner
 
 Artifact Export:
 - diffusion_isolation_forest.pkl
-- calibration_curve_s2.png
+- calibration_curve_s2_diffusion.png
+- manifest.json (config, test-split metrics, latency profile, Pareto front, full grid)
 - artifact_hash.sha256
+- distilled_lookup.npz (with --distill, see s2_diffusion_distill.py)
+- artifact_manifest.json entries (repo root) refreshed so the service accepts the new hashes
+
+Usage:
+    python mlops/colab_notebooks/s2_diffusion_train.py --samples 2000000 --workers 8
+    python mlops/colab_notebooks/s2_diffusion_train.py --dataset mlops/datasets/synthetic_dataset_v1
 """
 
-import numpy as np
-import json
+import argparse
 import hashlib
+import itertools
+import json
 import os
 import pickle
-import matplotlib.pyplot as plt
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import sklearn
 from sklearn.ensemble import IsolationForest
-from sklearn.calibration import calibration_curve
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import FunctionTransformer
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "mlops" / "data_generators"))
+sys.path.insert(0, str(REPO_ROOT / "mlops" / "evaluation"))
+
+from behavior_engine import BehaviorEngine, DEFAULT_SEED, iat_sequences  # noqa: E402
+from common.artifacts import refresh_manifest  # noqa: E402
+from dataset_io import DatasetReader  # noqa: E402
+from eval_suite import calibration, roc_auc, tpr_at_fpr  # noqa: E402
+from signals.diffusion.features import FEATURE_NAMES, iat_features  # noqa: E402
+from signals.diffusion.features import risk_from_decision  # noqa: E402
+
+OUTPUT_DIR = str(REPO_ROOT / "diffusion_model_artifact")
+S2_COLUMNS = ["s2_avg_iat_seconds", "s2_iat_variance", "s2_is_coordinated"]
+
+GRID = {
+    "n_estimators": [25, 50, 100, 200],
+    "max_samples": [256, 1024],
+    "contamination": ["auto", 0.05, 0.15],
+    "features": ["raw", "log_stats"],
+}
+DEFAULT_SAMPLES = 1_000_000
+CHUNK_SIZE = 250_000
+FIT_ROWS = 200_000       # Bounded reservoir of training rows (trees only ever see max_samples each)
+VAL_ROWS = 100_000
+VAL_FRACTION = 0.2
+TEST_ROWS = 100_000
+TEST_FRACTION = 0.1      # Never seen by the grid or the selection: reported metrics only
+LATENCY_CALLS = 50       # Single-row decision_function calls per candidate
+LATENCY_BATCH = 1000
+QUALITY_TOLERANCE = 0.005
 
-OUTPUT_DIR = "./diffusion_model_artifact"
 
 def compute_hash(file_path):
     sha256_hash = hashlib.sha256()
@@ -31,66 +82,255 @@ def compute_hash(file_path):
             sha256_hash.update(byte_block)
     return sha256_hash.hexdigest()
 
-def generate_calibration_plot(y_true, y_prob, name):
-    prob_true, prob_pred = calibration_curve(y_true, y_prob, n_bins=10)
+
+def generate_calibration_plot(curve, name, out_dir):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(10, 10))
-    plt.plot(prob_pred, prob_true, marker='o', label=name, color='blue')
+    plt.plot([b["mean_predicted"] for b in curve], [b["fraction_positive"] for b in curve], marker='o', label=name, color='blue')
     plt.plot([0, 1], [0, 1], linestyle='--', color='gray', label='Perfectly Calibrated')
-    plt.xlabel('Mean Predicted Confidence')
+    plt.xlabel('Mean Predicted Risk')
     plt.ylabel('Fraction of Positives')
     plt.title(f'Calibration Curve: {name}')
     plt.legend()
     plt.grid(True)
-    plt.savefig(f"{OUTPUT_DIR}/calibration_curve_{name}.png")
+    plt.savefig(f"{out_dir}/calibration_curve_{name}.png")
     plt.close()
 
-def calibrate_diffusion_model():
+
+# --- Data ---
+
+def iter_iat_chunks(dataset=None, samples=DEFAULT_SAMPLES, seed=DEFAULT_SEED):
+    """Yields (iats, is_coordinated) chunks from a stored dataset or a fresh engine stream."""
+    rng = np.random.default_rng(seed)
+    if dataset:
+        for chunk in DatasetReader(dataset).iter_chunks(columns=S2_COLUMNS):
+            yield iat_sequences(chunk, rng), np.asarray(chunk["s2_is_coordinated"], dtype=bool)
+        return
+    engine = BehaviorEngine(seed=seed)
+    for start in range(0, samples, CHUNK_SIZE):
+        batch = engine.generate_diffusion_batch(min(CHUNK_SIZE, samples - start))
+        yield iat_sequences(batch, rng), batch["s2_is_coordinated"]
+
+
+def load_splits(dataset, samples, fit_on, seed=DEFAULT_SEED):
+    """
+    Streams the data once. Each chunk is split train/validation/test, then
+    every side is thinned in proportion so memory is bounded by FIT_ROWS +
+    VAL_ROWS + TEST_ROWS however large the dataset is.
+    """
+    total = len(DatasetReader(dataset)) if dataset else samples
+    keep_fit = min(1.0, FIT_ROWS / (total * (1 - VAL_FRACTION - TEST_FRACTION)))
+    keep_val = min(1.0, VAL_ROWS / (total * VAL_FRACTION))
+    keep_test = min(1.0, TEST_ROWS / (total * TEST_FRACTION))
+    rng = np.random.default_rng(seed + 1)
+    fit, val, val_y, test, test_y = [], [], [], [], []
+    seen = 0
+    t0 = time.perf_counter()
+    for X, y in iter_iat_chunks(dataset, samples, seed):
+        seen += len(y)
+        split = rng.random(len(y))
+        is_val = split < VAL_FRACTION
+        is_test = (split >= VAL_FRACTION) & (split < VAL_FRACTION + TEST_FRACTION)
+        draw = rng.random(len(y))
+        train = ~is_val & ~is_test & (draw < keep_fit)
+        if fit_on == "organic":
+            train &= ~y  # Novelty detection: the forest learns what organic sharing looks like
+        fit.append(X[train])
+        pick = is_val & (draw < keep_val)
+        val.append(X[pick])
+        val_y.append(y[pick])
+        pick = is_test & (draw < keep_test)
+        test.append(X[pick])
+        test_y.append(y[pick])
+    print(f"📥 Streamed {seen:,} sequences in {time.perf_counter() - t0:.1f}s "
+          f"-> fit {sum(len(f) for f in fit):,} ({fit_on}), validation {sum(len(v) for v in val):,}, "
+          f"test {sum(len(t) for t in test):,}")
+    return (np.concatenate(fit), np.concatenate(val), np.concatenate(val_y),
+            np.concatenate(test), np.concatenate(test_y), seen)
+
+
+# --- Grid search ---
+
+def build_model(config, seed=DEFAULT_SEED):
+    forest = IsolationForest(
+        n_estimators=config["n_estimators"],
+        max_samples=config["max_samples"],
+        contamination=config["contamination"],
+        random_state=seed,
+        n_jobs=1,  # Parallelism is across configurations, not inside one
+    )
+    if config["features"] == "log_stats":
+        return make_pipeline(FunctionTransformer(iat_features), forest)
+    return forest
+
+
+_DATA = {}
+
+
+def _init_worker(X_fit, X_val, y_val):
+    _DATA.update(X_fit=X_fit, X_val=X_val, y_val=y_val)
+
+
+def _evaluate(config):
+    """Worker: fit one configuration, score the validation split, return metrics + pickled model."""
+    t0 = time.perf_counter()
+    model = build_model(config).fit(_DATA["X_fit"])
+    fit_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    risk = risk_from_decision(model.decision_function(_DATA["X_val"]))
+    score_s = time.perf_counter() - t0
+    curve, ece = calibration(_DATA["y_val"], risk)
+    return {
+        "config": config,
+        "auc": round(roc_auc(_DATA["y_val"], risk), 4),
+        "tpr_at_1pct_fpr": round(tpr_at_fpr(_DATA["y_val"], risk), 4),
+        "ece": round(ece, 4),
+        "fit_s": round(fit_s, 3),
+        "val_score_us_per_row": round(score_s / len(risk) * 1e6, 3),
+        "calibration": curve,
+        "model": pickle.dumps(model),
+    }
+
+
+def test_report(model, X_test, y_test):
+    """Winner's metrics on the test split: the numbers manifest.json reports."""
+    risk = risk_from_decision(model.decision_function(X_test))
+    curve, ece = calibration(y_test, risk)
+    return {
+        "auc": round(roc_auc(y_test, risk), 4),
+        "tpr_at_1pct_fpr": round(tpr_at_fpr(y_test, risk), 4),
+        "ece": round(ece, 4),
+        "calibration": curve,
+    }
+
+
+def latency_profile(model, X):
+    """Serving-shape latency: one 10-IAT row per call (analyze_diffusion), plus batched throughput."""
+    rows = X[:LATENCY_CALLS]
+    model.decision_function(rows[:1])  # Warm-up
+    single = []
+    for i in range(len(rows)):
+        t0 = time.perf_counter()
+        model.decision_function(rows[i:i + 1])
+        single.append((time.perf_counter() - t0) * 1e6)
+    t0 = time.perf_counter()
+    model.decision_function(X[:LATENCY_BATCH])
+    batch_us = (time.perf_counter() - t0) / min(LATENCY_BATCH, len(X)) * 1e6
+    p50, p90, p99 = np.percentile(single, [50, 90, 99])
+    return {"single_row_us": {"p50": round(p50, 1), "p90": round(p90, 1), "p99": round(p99, 1)},
+            "batch_us_per_row": round(batch_us, 2)}
+
+
+def pareto_front(results):
+    """Candidates not dominated on (higher AUC, lower single-row p50)."""
+    front = []
+    for r in results:
+        dominated = any(
+            o["auc"] >= r["auc"] and o["latency"]["single_row_us"]["p50"] <= r["latency"]["single_row_us"]["p50"]
+            and (o["auc"] > r["auc"] or o["latency"]["single_row_us"]["p50"] < r["latency"]["single_row_us"]["p50"])
+            for o in results
+        )
+        if not dominated:
+            front.append(r)
+    return sorted(front, key=lambda r: r["latency"]["single_row_us"]["p50"])
+
+
+def select(front):
+    """Fastest front member within QUALITY_TOLERANCE of the best AUC (ties: better calibration)."""
+    best = max(r["auc"] for r in front)
+    eligible = [r for r in front if r["auc"] >= best - QUALITY_TOLERANCE]
+    return min(eligible, key=lambda r: (r["latency"]["single_row_us"]["p50"], r["ece"]))
+
+
+def calibrate_diffusion_model(dataset=None, samples=DEFAULT_SAMPLES, workers=None, fit_on="organic",
+                              out_dir=OUTPUT_DIR, grid=GRID):
     print("🚀 Improving Signal 2: Observable Diffusion Risk...")
-    
-    # 1. Data Simulation (Organic vs Coordinated)
-    # Organic: Log-normal distribution of inter-arrival times (IAT)
-    # Coordinated: Tight clusters (low variance IAT) + periodic bursts
-    
-    n_samples = 2000
-    organic_iat = np.random.lognormal(mean=2.0, sigma=1.0, size=(n_samples // 2, 10))
-    coordinated_iat = np.random.exponential(scale=0.2, size=(n_samples // 2, 10))
-    
-    X_train = np.vstack([organic_iat, coordinated_iat])
-    y_train = np.array([0] * (n_samples // 2) + [1] * (n_samples // 2)) # 0=Organic, 1=Coordinated Risk
-
-    # 2. Train Isolation Forest (Anomaly Detection)
-    # Contamination assumes ~5% high-risk events in wild, but here balanced for training
-    clf = IsolationForest(n_estimators=100, contamination=0.1, random_state=42)
-    clf.fit(X_train)
-    
-    # 3. Score & Calibrate
-    # Isolation Forest scores are [-1, 1], mapping to risk probability [0, 1]
-    raw_scores = -clf.decision_function(X_train) # Invert so higher is more anomalous
-    
-    # Normalize scores to [0, 1] for probability estimation
-    min_s, max_s = raw_scores.min(), raw_scores.max()
-    prob_scores = (raw_scores - min_s) / (max_s - min_s)
-    
-    # 4. Evaluation Outputs
-    print(f"✅ Calibration Check:")
-    print(f"   - Mean Organic Risk Score: {prob_scores[:n_samples//2].mean():.4f}")
-    print(f"   - Mean Coordinated Risk Score: {prob_scores[n_samples//2:].mean():.4f}")
-    
-    if os.path.exists(OUTPUT_DIR) == False:
-        os.makedirs(OUTPUT_DIR)
-
-    generate_calibration_plot(y_train, prob_scores, "s2_diffusion")
-    
-    # 5. Export
-    model_path = f"{OUTPUT_DIR}/diffusion_isolation_forest.pkl"
+    t_run = time.perf_counter()
+    X_fit, X_val, y_val, X_test, y_test, seen = load_splits(dataset, samples, fit_on)
+
+    configs = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+    workers = workers or os.cpu_count() or 1
+    print(f"🔍 Grid: {len(configs)} configurations on {workers} worker processes...")
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X_fit, X_val, y_val)) as pool:
+        results = list(pool.map(_evaluate, configs))
+    grid_s = time.perf_counter() - t0
+
+    # Latency is measured sequentially in this process, so candidates never compete for cores
+    for r in results:
+        r["latency"] = {**latency_profile(pickle.loads(r["model"]), X_val), "model_bytes": len(r["model"])}
+
+    front = pareto_front(results)
+    winner = select(front)
+
+    print(f"{'n_est':>6} {'max_s':>6} {'contam':>7} {'features':>10} {'auc':>7} {'tpr@1%':>7} {'ece':>6} {'p50 us':>8} {'fit s':>6}")
+    for r in sorted(results, key=lambda r: (-r["auc"], r["latency"]["single_row_us"]["p50"])):
+        c = r["config"]
+        mark = " ⭐" if r is winner else (" •" if r in front else "")
+        print(f"{c['n_estimators']:>6} {c['max_samples']:>6} {str(c['contamination']):>7} {c['features']:>10} "
+              f"{r['auc']:>7.4f} {r['tpr_at_1pct_fpr']:>7.4f} {r['ece']:>6.3f} "
+              f"{r['latency']['single_row_us']['p50']:>8.0f} {r['fit_s']:>6.2f}{mark}")
+    test = test_report(pickle.loads(winner["model"]), X_test, y_test)
+    print(f"✅ Calibration Check: winner {winner['config']} validation AUC {winner['auc']:.4f}, "
+          f"test AUC {test['auc']:.4f}, p50 {winner['latency']['single_row_us']['p50']:.0f}us/row (grid {grid_s:.1f}s)")
+
+    # Export
+    os.makedirs(out_dir, exist_ok=True)
+    model_path = f"{out_dir}/diffusion_isolation_forest.pkl"
     with open(model_path, "wb") as f:
-        pickle.dump(clf, f)
-        
+        f.write(winner["model"])
+    generate_calibration_plot(test["calibration"], "s2_diffusion", out_dir)
     model_hash = compute_hash(model_path)
-    with open(f"{OUTPUT_DIR}/artifact_hash.sha256", "w") as f:
+
+    def public(r):
+        return {k: v for k, v in r.items() if k not in ("model", "calibration")}
+
+    manifest = {
+        "artifact": "diffusion_isolation_forest.pkl",
+        "sha256": model_hash,
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+        "sklearn_version": sklearn.__version__,
+        "input": {"iat_count": X_val.shape[1], "features": winner["config"]["features"],
+                  "feature_names": list(FEATURE_NAMES) if winner["config"]["features"] == "log_stats" else None},
+        "data": {"source": str(dataset) if dataset else f"BehaviorEngine(seed={DEFAULT_SEED})",
+                 "rows_streamed": seen, "fit_rows": len(X_fit), "fit_on": fit_on, "validation_rows": len(X_val),
+                 "test_rows": len(X_test)},
+        "config": winner["config"],
+        "metrics": {k: test[k] for k in ("auc", "tpr_at_1pct_fpr", "ece")},  # Test split
+        "validation_metrics": {k: winner[k] for k in ("auc", "tpr_at_1pct_fpr", "ece")},  # Selection split
+        "calibration": test["calibration"],
+        "latency_profile": {**winner["latency"], "fit_s": winner["fit_s"],
+                            "measured_on": {"cpu_count": os.cpu_count(), "python": sys.version.split()[0]}},
+        "selection": {"rule": "fastest Pareto candidate within tolerance of best AUC", "quality_tolerance": QUALITY_TOLERANCE},
+        "pareto_front": [public(r) for r in front],
+        "grid": [public(r) for r in results],
+        "run_s": round(time.perf_counter() - t_run, 1),
+    }
+    with open(f"{out_dir}/manifest.json", "w") as f:
+        json.dump(manifest, f, indent=2)
+    with open(f"{out_dir}/artifact_hash.sha256", "w") as f:
         f.write(model_hash)
-        
+
     print(f"🔒 Artifact Locked. SHA-256: {model_hash}")
+    refreshed = refresh_manifest([f"{out_dir}/diffusion_isolation_forest.pkl", f"{out_dir}/artifact_hash.sha256"])
+    if refreshed:
+        print(f"   - Artifact manifest refreshed: {', '.join(refreshed)}")
+    return manifest
+
 
 if __name__ == "__main__":
-    calibrate_diffusion_model()
+    parser = argparse.ArgumentParser(description="TrustLens S2 diffusion training pipeline")
+    parser.add_argument("--dataset", help="Stored synthetic dataset directory (streams its s2_* columns)")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help="Engine rows when no --dataset")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--fit-on", choices=("organic", "all"), default="organic")
+    parser.add_argument("--out", default=OUTPUT_DIR)
+    parser.add_argument("--distill", action="store_true", help="Also fit the distilled lookup scorer (s2_diffusion_distill.py)")
+    args = parser.parse_args()
+    calibrate_diffusion_model(args.dataset, args.samples, args.workers, args.fit_on, args.out)
+    if args.distill:
+        from s2_diffusion_distill import distill
+        distill(args.out)
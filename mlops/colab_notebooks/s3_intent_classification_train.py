@@ -50,18 +50,21 @@ def verify_failure_safe_logic(model, tokenizer):
         ("GDP grew by 2% in the last quarter.", 0)              # Factual -> CONTINUE
     ]
     
+    model.eval()
     passed = 0
     for text, expected_label in test_cases:
-        # (Simulation of model inference)
-        # In real Colab, we'd run the actual model.
-        predicted_label = expected_label # Assuming perfect model for simulation
+        # Real inference on the model being exported (no assumed-perfect predictions)
+        inputs = tokenizer(text, return_tensors="pt", truncation=True)
+        with torch.no_grad():
+            predicted_label = int(model(**inputs).logits.argmax(dim=-1).item())
         
         if expected_label != 0 and predicted_label == 0:
             print(f"❌ FAIL: Non-factual text classified as factual: '{text}'")
         else:
             passed += 1
             
-    print(f"✅ Failure-Safe Tests: {passed}/{len(test_cases)} Passed")
+    print(f"{'✅' if passed == len(test_cases) else '❌'} Failure-Safe Tests: {passed}/{len(test_cases)} Passed")
+    return passed == len(test_cases)
 
 def train_pipeline():
     print("🚀 Improving Signal 3: Intent & Drift Pipeline...")
@@ -101,8 +104,9 @@ def train_pipeline():
     with open(f"{OUTPUT_DIR}/drift_thresholds.json", "w") as f:
         json.dump(drift_config, f, indent=2)
     
-    # Verify Failure-Safes
-    verify_failure_safe_logic(model, tokenizer)
+    # Verify Failure-Safes (blocks locking: a model that lets satire/opinion through is not exported)
+    if not verify_failure_safe_logic(model, tokenizer):
+        raise SystemExit("Failure-safe check failed; artifact not locked. See mlops/evaluation/eval_suite.py.")
     
     # Generate Locking Hash
     model_hash = compute_hash(f"{OUTPUT_DIR}/config.json")
@@ -50,7 +50,7 @@ def optimize_ensemble():
     
     print(f"✅ Optimization Complete.")
     print(f"   - Selected Weights: {best_weights}")
-    print(f"   - Exp. TPR at 1% FPR: 0.82 (Improved from 0.75)")
+    print("   - TPR at 1% FPR: measured on held-out media by mlops/evaluation/eval_suite.py (s4_tiered, s4_full)")
     
     # Robustness Check: Light Manipulation (e.g. face smoothing vs deepfake)
     # Deepfakes trigger Noise + Compression heavily.
@@ -2,6 +2,12 @@
 TRUSTLENS: SYNTHETIC BEHAVIOR ENGINE
 Generates realistic user, source, and content behaviors (NOT samples).
 Injects "The Messy Internet" philosophy: Ambiguity, noise, and partial signals.
+
+Two APIs over the same distributions:
+- generate_full_sample(): one nested dict (scalar draws).
+- generate_batch(n) / iter_batches(n, chunk_size): columnar NumPy arrays,
+  one vectorized pass per signal. Missing values are NaN, categories are
+  uint8 codes into CATEGORIES. Memory is bounded by chunk_size.
 """
 
 import numpy as np
@@ -10,9 +16,36 @@ import random
 import uuid
 from datetime import datetime, timedelta
 
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+# Category codes used by the batch API
+CATEGORIES = {
+    "s3_intent_class": ("Factual", "Opinion", "Satire", "Personal"),
+    "s4_scenario": ("Clean", "Compressed", "Tampered"),
+    "s5_reputation_tier": ("Reliable", "Mixed", "Unreliable"),
+}
+INTENT_WEIGHTS = (0.4, 0.3, 0.1, 0.2)
+SCENARIO_WEIGHTS = (0.5, 0.4, 0.1)
+REPUTATION_WEIGHTS = (0.6, 0.3, 0.1)
+
+
+DEFAULT_SEED = 42
+IAT_COUNT = 10  # Inter-arrival times per sequence, as analyze_diffusion receives them
+
+
+def iat_sequences(batch, rng):
+    """(n, IAT_COUNT) log-normal IATs with mean s2_avg_iat_seconds; unmeasured spread falls back by regime."""
+    mean = np.maximum(batch["s2_avg_iat_seconds"].astype(np.float64), 0.05)
+    sigma = batch["s2_iat_variance"].astype(np.float64)
+    sigma = np.where(np.isnan(sigma), np.where(batch["s2_is_coordinated"], 0.1, 1.5), sigma)
+    mu = np.log(mean) - sigma ** 2 / 2
+    return np.exp(mu[:, None] + sigma[:, None] * rng.standard_normal((len(mean), IAT_COUNT)))
+
+
 class BehaviorEngine:
-    def __init__(self):
-        self.rng = np.random.default_rng(42)
+    def __init__(self, seed=DEFAULT_SEED):
+        # int, np.random.SeedSequence (e.g. a spawned shard seed) or Generator
+        self.rng = np.random.default_rng(seed)
 
     def generate_id(self):
         return str(uuid.uuid4())[:8]
@@ -176,3 +209,155 @@ class BehaviorEngine:
                 "S5": self.generate_source_event()
             }
         }
+
+    # 🔹 BATCH API (vectorized)
+    def _uniform(self, low, high, n):
+        """One uniform draw per row with per-row bounds (scenario-dependent ranges)."""
+        return (low + self.rng.random(n) * (high - low)).astype(np.float32)
+
+    def _missing(self, values, missing_prob):
+        """Vectorized partial observability: NaN where the scraper 'failed'."""
+        values = values.astype(np.float32)
+        values[self.rng.random(len(values)) < missing_prob] = np.nan
+        return values
+
+    def generate_diffusion_batch(self, n):
+        coordinated = self.rng.random(n) < 0.15
+        iat_mean = self._uniform(np.where(coordinated, 0.1, 5.0), np.where(coordinated, 2.0, 60.0), n)
+        iat_sigma = np.where(coordinated, 0.1, 1.5).astype(np.float32)
+        cluster_size = (self.rng.power(np.where(coordinated, 5.0, 2.0)) * np.where(coordinated, 500, 100)).astype(np.int32)
+        risk = self._uniform(np.where(coordinated, 0.7, 0.0), np.where(coordinated, 1.0, 0.4), n)
+        measured_iat = (iat_mean + self.rng.normal(0.0, iat_mean * 0.1)).astype(np.float32)
+        confidence = np.where(cluster_size > 0, self._uniform(0.3, 0.9, n), np.float32(0.1))
+        return {
+            "s2_is_coordinated": coordinated,
+            "s2_cluster_size": self._missing(cluster_size, 0.2),
+            "s2_avg_iat_seconds": measured_iat,
+            "s2_iat_variance": self._missing(iat_sigma, 0.4),
+            "s2_measured_risk": risk,
+            "s2_confidence": confidence.astype(np.float32),
+        }
+
+    def generate_semantic_batch(self, n):
+        intent = self.rng.choice(4, size=n, p=INTENT_WEIGHTS).astype(np.uint8)
+        intent_conf = self._uniform(0.5, 0.99, n)
+        factual, satire = intent == 0, intent == 2
+        malicious = self.rng.random(n) < 0.2
+
+        low = np.select([factual & malicious, factual, satire], [0.6, 0.0, 0.8], default=0.2)
+        high = np.select([factual & malicious, factual, satire], [1.0, 0.4, 1.0], default=0.8)
+        drift = self._uniform(low, high, n)
+        risk = np.select([factual & (intent_conf > 0.8), satire], [drift, np.float32(0.1)], default=np.float32(0.0))
+
+        # Failure Safe: If intent weak, drift is unknown
+        unknown = intent_conf < 0.7
+        drift[unknown] = np.nan
+        risk = risk.astype(np.float32)
+        risk[unknown] = np.nan
+        return {
+            "s3_intent_class": intent,
+            "s3_intent_confidence": intent_conf,
+            "s3_drift_magnitude": drift,
+            "s3_measured_risk": risk,
+            "s3_uncertainty": (1.0 - intent_conf).astype(np.float32),
+        }
+
+    def generate_forensics_batch(self, n):
+        scenario = self.rng.choice(3, size=n, p=SCENARIO_WEIGHTS).astype(np.uint8)
+        ela = self._uniform(np.array([0.0, 0.3, 0.6])[scenario], np.array([0.2, 0.7, 0.9])[scenario], n)
+        noise = self._uniform(np.array([0.0, 0.0, 0.5])[scenario], np.array([0.1, 0.2, 0.9])[scenario], n)
+        tampered_risk = self._uniform(0.7, 1.0, n)
+        risk = np.where(scenario == 2, tampered_risk, np.array([0.0, 0.1, 0.0], dtype=np.float32)[scenario])
+        return {
+            "s4_scenario": scenario,
+            "s4_ela_score": ela,
+            "s4_noise_residual": noise,
+            "s4_measured_risk": risk.astype(np.float32),
+            "s4_uncertainty": np.where(scenario == 1, 0.8, 0.2).astype(np.float32),
+        }
+
+    def generate_source_batch(self, n):
+        history = self.rng.integers(1, 1000, size=n).astype(np.int32)
+        tier = self.rng.choice(3, size=n, p=REPUTATION_WEIGHTS).astype(np.uint8)
+        correction = (tier == 1) & (self.rng.random(n) < 0.4)
+        # Reliable (0, .2) | Mixed corrected (.2, .4) / uncorrected (.4, .7) | Unreliable (.7, 1)
+        low = np.select([tier == 0, correction, tier == 1], [0.0, 0.2, 0.4], default=0.7)
+        high = np.select([tier == 0, correction, tier == 1], [0.2, 0.4, 0.7], default=1.0)
+        return {
+            "s5_history_days": self._missing(history, 0.1),
+            "s5_reputation_tier": tier,
+            "s5_recent_correction": correction,
+            "s5_measured_risk": self._uniform(low, high, n),
+            "s5_uncertainty": np.where(history < 30, 1.0, 0.2).astype(np.float32),
+        }
+
+    def generate_batch(self, n, timestamp=None):
+        """n full samples as a flat dict of equal-length column arrays."""
+        batch = {
+            "id": self.rng.integers(0, 2**32, size=n, dtype=np.uint32),  # 8 hex chars, like generate_id()
+            "timestamp": np.full(n, np.datetime64(timestamp or datetime.now(), "ms")),
+        }
+        batch.update(self.generate_diffusion_batch(n))
+        batch.update(self.generate_semantic_batch(n))
+        batch.update(self.generate_forensics_batch(n))
+        batch.update(self.generate_source_batch(n))
+        return batch
+
+    def iter_batches(self, n, chunk_size=DEFAULT_CHUNK_SIZE, timestamp=None):
+        """Yields generate_batch() chunks totalling n rows; peak memory ~ one chunk."""
+        for start in range(0, n, chunk_size):
+            yield self.generate_batch(min(chunk_size, n - start), timestamp)
+
+    @staticmethod
+    def batch_to_samples(batch):
+        """Columnar batch -> list of nested dicts in the generate_full_sample() layout."""
+        def opt(v):
+            return None if np.isnan(v) else float(v)
+
+        intents, scenarios, tiers = (CATEGORIES[k] for k in ("s3_intent_class", "s4_scenario", "s5_reputation_tier"))
+        cols = {k: v.tolist() if v.dtype.kind != "f" else v for k, v in batch.items() if k != "timestamp"}
+        stamps = np.datetime_as_string(batch["timestamp"], unit="ms")
+        samples = []
+        for i in range(len(batch["id"])):
+            cluster = opt(batch["s2_cluster_size"][i])
+            history = opt(batch["s5_history_days"][i])
+            samples.append({
+                "id": f"{cols['id'][i]:08x}",
+                "timestamp": str(stamps[i]),
+                "signals": {
+                    "S2": {
+                        "signal_type": "S2_Diffusion",
+                        "is_coordinated": cols["s2_is_coordinated"][i],
+                        "cluster_size": int(cluster) if cluster is not None else None,
+                        "avg_iat_seconds": float(batch["s2_avg_iat_seconds"][i]),
+                        "iat_variance": opt(batch["s2_iat_variance"][i]),
+                        "measured_risk": float(batch["s2_measured_risk"][i]),
+                        "confidence": float(batch["s2_confidence"][i]),
+                    },
+                    "S3": {
+                        "signal_type": "S3_Semantic",
+                        "intent_class": intents[cols["s3_intent_class"][i]],
+                        "intent_confidence": float(batch["s3_intent_confidence"][i]),
+                        "drift_magnitude": opt(batch["s3_drift_magnitude"][i]),
+                        "measured_risk": opt(batch["s3_measured_risk"][i]),
+                        "uncertainty": float(batch["s3_uncertainty"][i]),
+                    },
+                    "S4": {
+                        "signal_type": "S4_Forensics",
+                        "scenario": scenarios[cols["s4_scenario"][i]],
+                        "ela_score": float(batch["s4_ela_score"][i]),
+                        "noise_residual": float(batch["s4_noise_residual"][i]),
+                        "measured_risk": float(batch["s4_measured_risk"][i]),
+                        "uncertainty": float(batch["s4_uncertainty"][i]),
+                    },
+                    "S5": {
+                        "signal_type": "S5_Source",
+                        "history_days": int(history) if history is not None else None,
+                        "reputation_tier": tiers[cols["s5_reputation_tier"][i]],
+                        "recent_correction": cols["s5_recent_correction"][i],
+                        "measured_risk": float(batch["s5_measured_risk"][i]),
+                        "uncertainty": float(batch["s5_uncertainty"][i]),
+                    },
+                },
+            })
+        return samples
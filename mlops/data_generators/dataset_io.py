@@ -0,0 +1,230 @@
+"""
+TRUSTLENS: STREAMING DATASET I/O
+Chunked columnar storage for BehaviorEngine batches.
+
+A dataset is a directory:
+    manifest.json             format, column dtypes, categories, per-chunk row counts, stats
+    data.arrow                "arrow": one Arrow IPC file, one record batch per chunk (mmap)
+    data.parquet              "parquet": one row group per chunk
+    chunk-XXXX/<col>.npy      "npy": one .npy per column per chunk (np.load mmap_mode="r")
+    data.jsonl                "jsonl": one flat JSON object per row
+
+Arrow/Parquet need pyarrow; without it the default falls back to "npy",
+which is memory-mappable with NumPy alone.
+
+    writer = DatasetWriter("../datasets/synthetic_v2", fmt="arrow", categories=CATEGORIES)
+    for batch in engine.iter_batches(10_000_000):
+        writer.write(batch)
+    writer.close()
+
+    reader = DatasetReader("../datasets/synthetic_v2")
+    for chunk in reader.iter_chunks(columns=["s2_avg_iat_seconds", "s2_is_coordinated"]):
+        ...
+"""
+
+import json
+import math
+import os
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:  # Optional: "npy" and "jsonl" work without it
+    pa = None
+
+FORMATS = ("arrow", "parquet", "npy", "jsonl")
+DEFAULT_FORMAT = "arrow" if pa is not None else "npy"
+MANIFEST = "manifest.json"
+
+
+class IncrementalStats:
+    """Per-column count / NaN count / mean / min / max, merged chunk by chunk."""
+
+    def __init__(self):
+        self.columns = {}
+
+    def update(self, batch):
+        for name, values in batch.items():
+            if values.dtype.kind not in "biuf":
+                continue
+            values = values.astype(np.float64, copy=False)
+            finite = values[~np.isnan(values)] if values.dtype.kind == "f" else values
+            col = self.columns.setdefault(name, {"count": 0, "missing": 0, "sum": 0.0, "min": math.inf, "max": -math.inf})
+            col["count"] += len(values)
+            col["missing"] += len(values) - len(finite)
+            if len(finite):
+                col["sum"] += float(finite.sum())
+                col["min"] = min(col["min"], float(finite.min()))
+                col["max"] = max(col["max"], float(finite.max()))
+
+    def summary(self):
+        out = {}
+        for name, col in self.columns.items():
+            present = col["count"] - col["missing"]
+            out[name] = {
+                "count": col["count"],
+                "missing": col["missing"],
+                "missing_rate": round(col["missing"] / col["count"], 6) if col["count"] else 0.0,
+                "mean": round(col["sum"] / present, 6) if present else None,
+                "min": col["min"] if present else None,
+                "max": col["max"] if present else None,
+            }
+        return out
+
+
+def merge_summaries(summaries):
+    """Combines IncrementalStats.summary() outputs (e.g. one per shard)."""
+    merged = {}
+    for summary in summaries:
+        for name, col in summary.items():
+            acc = merged.setdefault(name, {"count": 0, "missing": 0, "sum": 0.0, "min": math.inf, "max": -math.inf})
+            present = col["count"] - col["missing"]
+            acc["count"] += col["count"]
+            acc["missing"] += col["missing"]
+            if present:
+                acc["sum"] += col["mean"] * present
+                acc["min"] = min(acc["min"], col["min"])
+                acc["max"] = max(acc["max"], col["max"])
+    stats = IncrementalStats()
+    stats.columns = merged
+    return stats.summary()
+
+
+def _jsonable(value):
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+class DatasetWriter:
+    def __init__(self, path, fmt=DEFAULT_FORMAT, categories=None):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format {fmt!r} (expected one of {FORMATS})")
+        if fmt in ("arrow", "parquet") and pa is None:
+            raise RuntimeError(f"Format {fmt!r} needs pyarrow (pip install pyarrow)")
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.fmt = fmt
+        self.categories = categories or {}
+        self.chunks = []
+        self.dtypes = None
+        self.stats = IncrementalStats()
+        self._sink = None
+
+    def write(self, batch):
+        """Appends one chunk (dict of equal-length arrays); nothing is kept in memory afterwards."""
+        rows = len(next(iter(batch.values())))
+        if self.dtypes is None:
+            self.dtypes = {name: values.dtype.str for name, values in batch.items()}
+        self.stats.update(batch)
+
+        if self.fmt in ("arrow", "parquet"):
+            table = pa.Table.from_pydict({name: pa.array(values) for name, values in batch.items()})
+            if self._sink is None:
+                if self.fmt == "arrow":
+                    self._sink = pa_ipc.new_file(str(self.path / "data.arrow"), table.schema)
+                else:
+                    self._sink = pq.ParquetWriter(str(self.path / "data.parquet"), table.schema, compression="zstd")
+            if self.fmt == "arrow":
+                for record_batch in table.to_batches(max_chunksize=rows):
+                    self._sink.write_batch(record_batch)
+            else:
+                self._sink.write_table(table, row_group_size=rows)
+        elif self.fmt == "npy":
+            chunk_dir = self.path / f"chunk-{len(self.chunks):04d}"
+            chunk_dir.mkdir(exist_ok=True)
+            for name, values in batch.items():
+                np.save(chunk_dir / f"{name}.npy", values)
+        else:
+            if self._sink is None:
+                self._sink = open(self.path / "data.jsonl", "w", encoding="utf-8")
+            names = list(batch)
+            columns = [batch[n].astype(str).tolist() if batch[n].dtype.kind == "M" else batch[n].tolist() for n in names]
+            lines = (json.dumps({n: _jsonable(v) for n, v in zip(names, row)}) for row in zip(*columns))
+            self._sink.write("\n".join(lines) + "\n")
+
+        self.chunks.append(rows)
+
+    def close(self):
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+        manifest = {
+            "format": self.fmt,
+            "rows": sum(self.chunks),
+            "chunks": self.chunks,
+            "dtypes": self.dtypes or {},
+            "categories": {k: list(v) for k, v in self.categories.items()},
+            "stats": self.stats.summary(),
+        }
+        tmp = self.path / (MANIFEST + ".tmp")
+        tmp.write_text(json.dumps(manifest, indent=2))
+        os.replace(tmp, self.path / MANIFEST)  # Readers only ever see a complete manifest
+        return manifest
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class DatasetReader:
+    def __init__(self, path):
+        self.path = Path(path)
+        self.manifest = json.loads((self.path / MANIFEST).read_text())
+        self.fmt = self.manifest["format"]
+        # Sharded dataset: the top-level manifest lists one sub-dataset per shard
+        self.shards = [DatasetReader(self.path / shard["path"]) for shard in self.manifest.get("shards", [])]
+
+    def __len__(self):
+        return self.manifest["rows"]
+
+    @property
+    def columns(self):
+        return self.shards[0].columns if self.shards else list(self.manifest["dtypes"])
+
+    def iter_chunks(self, columns=None):
+        """Yields {column: array} per stored chunk. Arrow and npy chunks are memory-mapped (zero copy)."""
+        columns = columns or self.columns
+        if self.shards:
+            for shard in self.shards:
+                yield from shard.iter_chunks(columns)
+        elif self.fmt == "arrow":
+            with pa.memory_map(str(self.path / "data.arrow"), "r") as source:
+                reader = pa_ipc.open_file(source)
+                for i in range(reader.num_record_batches):
+                    batch = reader.get_batch(i)
+                    yield {c: batch.column(c).to_numpy(zero_copy_only=False) for c in columns}
+        elif self.fmt == "parquet":
+            pf = pq.ParquetFile(str(self.path / "data.parquet"), memory_map=True)
+            for i in range(pf.num_row_groups):
+                table = pf.read_row_group(i, columns=columns)
+                yield {c: table.column(c).to_numpy() for c in columns}
+        elif self.fmt == "npy":
+            for i in range(len(self.manifest["chunks"])):
+                chunk_dir = self.path / f"chunk-{i:04d}"
+                yield {c: np.load(chunk_dir / f"{c}.npy", mmap_mode="r") for c in columns}
+        else:
+            yield from self._iter_jsonl(columns)
+
+    def _iter_jsonl(self, columns):
+        dtypes = self.manifest["dtypes"]
+        with open(self.path / "data.jsonl", "r", encoding="utf-8") as f:
+            for rows in self.manifest["chunks"]:
+                records = [json.loads(next(f)) for _ in range(rows)]
+                out = {}
+                for c in columns:
+                    values = [r[c] for r in records]
+                    if np.dtype(dtypes[c]).kind == "f":
+                        values = [np.nan if v is None else v for v in values]
+                    out[c] = np.array(values, dtype=dtypes[c])
+                yield out
+
+    def decode(self, column, codes):
+        """Category codes -> labels."""
+        return np.asarray(self.manifest["categories"][column], dtype=object)[codes]
@@ -0,0 +1,358 @@
+"""
+TRUSTLENS: REPLAY HARNESS
+Drives the live pipeline (gateway -> signals -> TIG) with synthetic samples.
+
+Each BehaviorEngine sample becomes one ScanRequest:
+    S2  simulated_iat_sequence: 10 IATs drawn around avg_iat_seconds with the
+        sample's timing spread (tight for coordinated, log-normal for organic)
+    S3  text_content carrying the intent cue the semantic service keys on
+    S4  media_urls -> local stub server serving Clean / Compressed / Tampered JPEGs
+    S5  url on a per-sample domain, seeded into the source store beforehand
+        (samples whose history was "not scraped" stay unseeded: cold start)
+
+Requests are fired on a fixed open-loop schedule (uniform or Poisson
+arrivals) regardless of how fast the gateway answers, so queueing shows up
+as latency instead of silently lowering the offered load. Latency is
+measured from the scheduled send time. Every result row is written to
+logs/replay/<run>.jsonl next to its ground truth; the summary reports
+throughput, latency percentiles, status/admission mix and verdict vs label.
+
+    python replay_harness.py --samples 500 --rate 20
+    python replay_harness.py --dataset ../datasets/synthetic_dataset_v1 --samples 2000 --rate 50 --arrival poisson
+
+The services must already be running (start_system.bat / LOCAL_DEPLOYMENT.md).
+The source service must read the same store as --source-db (SOURCE_DB_PATH).
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+import numpy as np
+from behavior_engine import BehaviorEngine, CATEGORIES, DEFAULT_SEED, iat_sequences
+from dataset_io import DatasetReader
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+from signals.source.store import DEFAULT_DB_PATH, SourceStore  # noqa: E402
+
+GATEWAY_URL = "http://127.0.0.1:8000/scan"
+MEDIA_HOST = "127.0.0.1"
+MEDIA_PORT = 8901
+OUTPUT_DIR = REPO_ROOT / "logs" / "replay"
+DOMAIN_SUFFIX = "replay.test"
+IMAGE_VARIANTS = 8
+REQUEST_TIMEOUT_S = 15.0
+MAX_IN_FLIGHT = 512
+RISKY_POSTURES = ("caution", "high_risk")
+
+INTENT_TEXT = {
+    "Factual": "Officials confirmed the figures in a statement on {day}; the report cites {n} primary sources.",
+    "Opinion": "In my opinion the decision announced on {day} was a mistake, and {n} readers agreed.",
+    "Satire": "Satire: local man declares {day} a national holiday after winning {n} arguments online.",
+    "Personal": "Just got back from the trip on {day}, {n} photos coming soon for everyone.",
+}
+
+
+# --- Ground truth ---
+
+def ground_truth(batch):
+    """Per-signal and overall 'should be flagged' labels from the generative parameters."""
+    intents, scenarios, tiers = (CATEGORIES[k] for k in ("s3_intent_class", "s4_scenario", "s5_reputation_tier"))
+    truth = {
+        "diffusion": batch["s2_is_coordinated"].astype(bool),
+        "semantic": np.nan_to_num(batch["s3_measured_risk"], nan=0.0) >= 0.6,
+        "forensics": batch["s4_scenario"] == scenarios.index("Tampered"),
+        "source": batch["s5_reputation_tier"] == tiers.index("Unreliable"),
+    }
+    truth["any"] = truth["diffusion"] | truth["semantic"] | truth["forensics"] | truth["source"]
+    return truth
+
+
+# --- Stub media server ---
+
+def render_images(rng, variants=IMAGE_VARIANTS):
+    """Few JPEG variants per S4 scenario; only the bytes, never the URL, carry the scenario."""
+    from PIL import Image
+
+    def encode(img, quality):
+        buf = io.BytesIO()
+        img.save(buf, format="JPEG", quality=quality)
+        return buf.getvalue()
+
+    def base(size=256):
+        y, x = np.mgrid[0:size, 0:size].astype(np.float32)
+        freq = rng.uniform(0.01, 0.05, 3)
+        rgb = np.stack([127 + 100 * np.sin(x * f + y * f * 0.7) for f in freq], axis=-1)
+        rgb += rng.normal(0, 4, rgb.shape)
+        return Image.fromarray(np.clip(rgb, 0, 255).astype(np.uint8))
+
+    images = {}
+    for _ in range(variants):
+        images.setdefault("Clean", []).append(encode(base(), 95))
+        images.setdefault("Compressed", []).append(encode(base(), 12))
+        # Tampered: a heavily recompressed, noisier patch spliced into a clean frame
+        host = Image.open(io.BytesIO(encode(base(), 95))).convert("RGB")
+        patch = np.asarray(base(96), dtype=np.float32) + rng.normal(0, 25, (96, 96, 3))
+        patch = Image.open(io.BytesIO(encode(Image.fromarray(np.clip(patch, 0, 255).astype(np.uint8)), 20)))
+        host.paste(patch, tuple(int(v) for v in rng.integers(0, 160, 2)))
+        images.setdefault("Tampered", []).append(encode(host, 92))
+    return images
+
+
+class MediaServer:
+    """Serves /media/<key>/<sample>.jpg from an in-memory table, in a background thread."""
+
+    def __init__(self, host=MEDIA_HOST, port=MEDIA_PORT, seed=DEFAULT_SEED):
+        rng = np.random.default_rng(seed)
+        self.images = render_images(rng)
+        self.table = [(scenario, blob) for scenario, blobs in self.images.items() for blob in blobs]
+        order = rng.permutation(len(self.table))  # Opaque keys: no scenario leaks through the path
+        self.table = [self.table[i] for i in order]
+        self.keys = {s: [k for k, (scenario, _) in enumerate(self.table) if scenario == s] for s in self.images}
+        self.base_url = f"http://{host}:{port}"
+        self.hits = 0
+        table = self.table
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                parts = self.path.strip("/").split("/")
+                try:
+                    blob = table[int(parts[1])][1]
+                except (IndexError, ValueError):
+                    self.send_error(404)
+                    return
+                server.hits += 1
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(blob)))
+                self.end_headers()
+                self.wfile.write(blob)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def url_for(self, scenario, sample_id, pick):
+        keys = self.keys[scenario]
+        return f"{self.base_url}/media/{keys[pick % len(keys)]:03d}/{sample_id}.jpg"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# --- Samples -> requests ---
+
+def load_batch(samples, dataset=None, seed=DEFAULT_SEED):
+    """First `samples` rows of a stored dataset, or a fresh seeded batch."""
+    if dataset is None:
+        return BehaviorEngine(seed=seed).generate_batch(samples)
+    parts = {}
+    remaining = samples
+    for chunk in DatasetReader(dataset).iter_chunks():
+        take = min(remaining, len(chunk["id"]))
+        for name, values in chunk.items():
+            parts.setdefault(name, []).append(np.asarray(values[:take]))
+        remaining -= take
+        if remaining <= 0:
+            break
+    return {name: np.concatenate(values) for name, values in parts.items()}
+
+
+def build_requests(batch, media, run_id, seed=DEFAULT_SEED):
+    """ScanRequest payloads plus the source-store rows to seed before replaying."""
+    rng = np.random.default_rng(seed)
+    intents, scenarios = CATEGORIES["s3_intent_class"], CATEGORIES["s4_scenario"]
+    iats = iat_sequences(batch, rng).round(3).tolist()
+    stamps = np.datetime_as_string(batch["timestamp"], unit="s")
+    history = batch["s5_history_days"]
+    picks = rng.integers(0, 1 << 16, len(batch["id"]))
+
+    requests, seed_rows = [], []
+    for i, sample_id in enumerate(f"{v:08x}" for v in batch["id"].tolist()):
+        domain = f"s{i}-{sample_id}.{run_id}.{DOMAIN_SUFFIX}"
+        intent = intents[int(batch["s3_intent_class"][i])]
+        text = INTENT_TEXT[intent].format(day=stamps[i][:10], n=int(picks[i]) % 97 + 2)
+        requests.append({
+            "url": f"https://{domain}/article/{sample_id}",
+            "content_hash": f"replay-{run_id}-{i}-{sample_id}",
+            "text_content": text,
+            "media_urls": [media.url_for(scenarios[int(batch["s4_scenario"][i])], sample_id, int(picks[i]))],
+            "timestamp": f"{stamps[i]}Z",
+            "simulated_iat_sequence": iats[i],
+        })
+        if not np.isnan(history[i]):
+            seed_rows.append((domain, float(batch["s5_measured_risk"][i]), int(history[i]),
+                              int(bool(batch["s5_recent_correction"][i]))))
+    return requests, seed_rows
+
+
+# --- Open-loop replay ---
+
+def schedule(n, rate, arrival, rng):
+    """Send offsets (seconds from start) for n requests at `rate` req/s."""
+    if arrival == "poisson":
+        return np.cumsum(rng.exponential(1.0 / rate, n)) - 1.0 / rate
+    return np.arange(n) / rate
+
+
+async def replay(requests, offsets, gateway_url, clients, max_in_flight=MAX_IN_FLIGHT):
+    results = [None] * len(requests)
+    in_flight = 0
+    limits = httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight)
+
+    async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT_S, limits=limits) as client:
+        async def fire(i, intended):
+            nonlocal in_flight
+            in_flight += 1
+            row = {"i": i, "offset_s": round(float(offsets[i]), 4)}
+            try:
+                resp = await client.post(gateway_url, json=requests[i],
+                                         headers={"X-Client-Id": f"replay-{i % clients}"})
+                row["status"] = resp.status_code
+                row["admission"] = resp.headers.get("X-TrustLens-Admission")
+                if resp.status_code == 200:
+                    body = resp.json()
+                    row["posture"] = body.get("trust_posture")
+                    row["risk"] = body.get("tig_result", {}).get("risk_score")
+                    row["signal_risk"] = {name: sig.get("risk_score") for name, sig in body.get("signals", {}).items()}
+            except Exception as e:
+                row["status"] = 0
+                row["error"] = type(e).__name__
+            finally:
+                in_flight -= 1
+            row["latency_ms"] = round((time.perf_counter() - intended) * 1000, 2)
+            results[i] = row
+
+        tasks = []
+        start = time.perf_counter() + 0.05
+        for i, offset in enumerate(offsets):
+            intended = start + float(offset)
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if in_flight >= max_in_flight:
+                # Client-side saturation: recorded, never silently retried or delayed
+                results[i] = {"i": i, "offset_s": round(float(offset), 4), "status": -1, "error": "dropped_in_flight_cap"}
+                continue
+            tasks.append(asyncio.create_task(fire(i, intended)))
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+# --- Report ---
+
+def _percentiles(values):
+    if not values:
+        return {}
+    arr = np.asarray(values)
+    return {f"p{q}": round(float(np.percentile(arr, q)), 1) for q in (50, 90, 99)} | {"max": round(float(arr.max()), 1)}
+
+
+def summarize(results, truth, elapsed, rate):
+    ok = [r for r in results if r.get("status") == 200]
+    statuses, admissions = {}, {}
+    for r in results:
+        statuses[str(r.get("status"))] = statuses.get(str(r.get("status")), 0) + 1
+        if r.get("admission"):
+            admissions[r["admission"]] = admissions.get(r["admission"], 0) + 1
+
+    confusion = {"tp": 0, "fp": 0, "tn": 0, "fn": 0}
+    for r in ok:
+        flagged = r["posture"] in RISKY_POSTURES
+        actual = bool(truth["any"][r["i"]])
+        confusion[("t" if flagged == actual else "f") + ("p" if flagged else "n")] += 1
+    tp, fp, fn = confusion["tp"], confusion["fp"], confusion["fn"]
+
+    separation = {}
+    for name in ("diffusion", "semantic", "forensics", "source"):
+        pos = [r["signal_risk"][name] for r in ok if truth[name][r["i"]] and r["signal_risk"].get(name) is not None]
+        neg = [r["signal_risk"][name] for r in ok if not truth[name][r["i"]] and r["signal_risk"].get(name) is not None]
+        separation[name] = {
+            "mean_risk_positive": round(float(np.mean(pos)), 3) if pos else None,
+            "mean_risk_negative": round(float(np.mean(neg)), 3) if neg else None,
+        }
+
+    return {
+        "requests": len(results),
+        "offered_rps": rate,
+        "achieved_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "seconds": round(elapsed, 2),
+        "statuses": statuses,
+        "admission": admissions,
+        "latency_ms": _percentiles([r["latency_ms"] for r in ok]),
+        "postures": {p: sum(r["posture"] == p for r in ok) for p in sorted({r["posture"] for r in ok})},
+        "confusion": confusion,
+        "precision": round(tp / (tp + fp), 3) if tp + fp else None,
+        "recall": round(tp / (tp + fn), 3) if tp + fn else None,
+        "accuracy": round((tp + confusion["tn"]) / len(ok), 3) if ok else None,
+        "signal_separation": separation,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TrustLens replay harness")
+    parser.add_argument("--samples", type=int, default=500)
+    parser.add_argument("--dataset", help="Stored dataset directory (default: generate a fresh batch)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--rate", type=float, default=20.0, help="Offered load, requests/s")
+    parser.add_argument("--arrival", choices=("uniform", "poisson"), default="uniform")
+    parser.add_argument("--clients", type=int, default=16, help="Distinct X-Client-Id values (admission rate limits)")
+    parser.add_argument("--gateway", default=GATEWAY_URL)
+    parser.add_argument("--source-db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--media-port", type=int, default=MEDIA_PORT)
+    parser.add_argument("--out", default=str(OUTPUT_DIR))
+    args = parser.parse_args()
+
+    # A fresh domain namespace per run: the source service's LRU never serves stale cold-start misses
+    run_id = datetime.now().strftime("%Y%m%d%H%M%S") + "-" + uuid.uuid4().hex[:4]
+    batch = load_batch(args.samples, args.dataset, args.seed)
+    truth = ground_truth(batch)
+
+    with MediaServer(port=args.media_port, seed=args.seed) as media:
+        requests, seed_rows = build_requests(batch, media, run_id, args.seed)
+        seeded = SourceStore(args.source_db).bulk_import(seed_rows)
+        print(f"🌱 Seeded {seeded} domains into {args.source_db} ({len(requests) - len(seed_rows)} left cold-start)")
+
+        offsets = schedule(len(requests), args.rate, args.arrival, np.random.default_rng(args.seed))
+        print(f"🚀 Replaying {len(requests)} samples at {args.rate:g} req/s ({args.arrival}) -> {args.gateway}")
+        results, elapsed = asyncio.run(replay(requests, offsets, args.gateway, args.clients))
+        media_hits = media.hits
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / f"{run_id}.jsonl"
+    with open(out_path, "w", encoding="utf-8") as f:
+        for r in results:
+            r["truth"] = {name: bool(values[r["i"]]) for name, values in truth.items()}
+            r["content_hash"] = requests[r["i"]]["content_hash"]
+            f.write(json.dumps(r) + "\n")
+
+    summary = summarize(results, truth, elapsed, args.rate)
+    summary["media_fetches"] = media_hits
+    print(json.dumps(summary, indent=2))
+    (out_dir / f"{run_id}.summary.json").write_text(json.dumps(summary, indent=2))
+    print(f"✅ Results -> {out_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+TRUSTLENS: SHARDED SYNTHETIC GENERATION
+Parallel BehaviorEngine generation over a process pool.
+
+The dataset is cut into fixed-size shards. Shard i is seeded with child i of
+SeedSequence(seed).spawn(n_shards) and stamped with the run's generated_at,
+so every shard's contents depend only on (seed, shard_size, i), never on the
+number of workers. Each worker streams its shard straight into its own
+dataset directory; the top-level manifest records seeds, row counts, a
+content digest per shard and merged stats, and DatasetReader reads the
+whole thing as one dataset.
+
+    python sharded_generation.py --samples 10000000 --shard-size 1000000 --workers 8
+    python sharded_generation.py --bench --samples 4000000 --max-workers 8
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from behavior_engine import BehaviorEngine, CATEGORIES, DEFAULT_SEED
+from dataset_io import DatasetWriter, DEFAULT_FORMAT, FORMATS, MANIFEST, merge_summaries
+
+OUTPUT_DIR = "../datasets"
+DATASET_NAME = "synthetic_dataset_sharded"
+DEFAULT_SHARD_SIZE = 1_000_000
+DEFAULT_CHUNK_SIZE = 250_000
+
+
+def _generate_shard(task):
+    """Worker entry point: generates and writes one shard, returns its manifest entry."""
+    index, seed_seq, rows, out_dir, fmt, chunk_size, generated_at = task
+    engine = BehaviorEngine(seed=seed_seq)
+    digest = hashlib.sha256()
+    shard_path = f"shard-{index:05d}"
+    t0 = time.perf_counter()
+    with DatasetWriter(Path(out_dir) / shard_path, fmt=fmt, categories=CATEGORIES) as writer:
+        for batch in engine.iter_batches(rows, chunk_size, timestamp=generated_at):
+            for name in sorted(batch):
+                digest.update(np.ascontiguousarray(batch[name]).tobytes())
+            writer.write(batch)
+    return {
+        "index": index,
+        "path": shard_path,
+        "rows": rows,
+        "spawn_key": list(seed_seq.spawn_key),
+        "digest": digest.hexdigest(),
+        "seconds": round(time.perf_counter() - t0, 3),
+        "stats": writer.stats.summary(),
+    }
+
+
+def generate_sharded(samples, out_dir, workers=None, shard_size=DEFAULT_SHARD_SIZE,
+                     chunk_size=DEFAULT_CHUNK_SIZE, fmt=DEFAULT_FORMAT, seed=DEFAULT_SEED, generated_at=None):
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    generated_at = generated_at or datetime.now().replace(microsecond=0)
+
+    n_shards = max(1, -(-samples // shard_size))
+    children = np.random.SeedSequence(seed).spawn(n_shards)
+    tasks = [
+        (i, children[i], min(shard_size, samples - i * shard_size), str(out_dir), fmt, chunk_size, generated_at)
+        for i in range(n_shards)
+    ]
+
+    t0 = time.perf_counter()
+    if workers == 1:
+        shards = [_generate_shard(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = list(pool.map(_generate_shard, tasks))
+    elapsed = time.perf_counter() - t0
+
+    manifest = {
+        "format": "sharded",
+        "shard_format": fmt,
+        "rows": sum(s["rows"] for s in shards),
+        "seed": seed,
+        "shard_size": shard_size,
+        "generated_at": generated_at.isoformat(),
+        "workers": workers,
+        "seconds": round(elapsed, 3),
+        "categories": {k: list(v) for k, v in CATEGORIES.items()},
+        "stats": merge_summaries(s.pop("stats") for s in shards),
+        "shards": shards,
+    }
+    tmp = out_dir / (MANIFEST + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp, out_dir / MANIFEST)
+    return manifest
+
+
+def bench(samples, max_workers, shard_size, fmt):
+    """Same seed/shards at 1..N workers: throughput, speedup and identical shard digests."""
+    generated_at = datetime(2026, 1, 1)
+    baseline = None
+    print(f"{'workers':>7} {'seconds':>8} {'samples/s':>12} {'speedup':>8} {'reproducible':>13}")
+    for workers in range(1, max_workers + 1):
+        tmp = tempfile.mkdtemp(prefix="trustlens-shards-")
+        try:
+            manifest = generate_sharded(samples, tmp, workers, shard_size, fmt=fmt, generated_at=generated_at)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+        digests = [s["digest"] for s in manifest["shards"]]
+        if baseline is None:
+            baseline = (manifest["seconds"], digests)
+        speedup = baseline[0] / manifest["seconds"]
+        print(f"{workers:>7} {manifest['seconds']:>8.2f} {samples / manifest['seconds']:>12,.0f} "
+              f"{speedup:>7.2f}x {str(digests == baseline[1]):>13}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TrustLens sharded synthetic generation")
+    parser.add_argument("--samples", type=int, default=10_000_000)
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--format", choices=FORMATS, default=DEFAULT_FORMAT)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--bench", action="store_true", help="Scaling benchmark over 1..--max-workers")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    if args.bench:
+        bench(args.samples, args.max_workers, args.shard_size, args.format)
+    else:
+        out = f"{OUTPUT_DIR}/{DATASET_NAME}"
+        print(f"🚀 Generating {args.samples} samples in shards of {args.shard_size} on {args.workers} workers...")
+        manifest = generate_sharded(args.samples, out, args.workers, args.shard_size, args.chunk_size, args.format, args.seed)
+        print(f"✅ {manifest['rows']} rows in {len(manifest['shards'])} shards, {manifest['seconds']:.2f}s -> {out}")
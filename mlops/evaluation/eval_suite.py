@@ -0,0 +1,490 @@
+"""
+TRUSTLENS: ARTIFACT EVALUATION SUITE
+Scores every locked artifact on a held-out synthetic set, in batch, through
+the same scoring functions the signal services serve with, and compares the
+results against mlops/evaluation/baselines.json.
+
+    S2  diffusion_isolation_forest.pkl -> risk_from_decision()
+        "reference": the training distributions (log-normal vs exponential IATs)
+        "engine":    BehaviorEngine IAT sequences (what the replay harness sends)
+        "distilled": distilled_lookup.npz with forest fallback, as the service serves it
+    S3  classify_intent() on cued / uncued intent texts (failure-safe: non-factual
+        must never continue to drift analysis). drift_thresholds.json is not
+        evaluated: the service's similarity is a hash placeholder, not a model
+    S4  tiers.analyze_media() + ensemble() with filter_ensemble_weights.json on
+        rendered Clean / Compressed / Tampered JPEGs, tiered and full modes
+    S5  dynamics.current_risk() with behavior_decay_params.json on source anchors
+
+Metrics are plain NumPy: ROC AUC (rank statistic, ties averaged), TPR at 1% FPR,
+10-bin calibration curve and ECE. Scoring wall-time per sample is gated too,
+so a model change that slows serving fails like an accuracy regression.
+
+Besides the baseline comparison, FLOORS sets absolute limits a metric must
+meet (a detector at chance fails even if its baseline was recorded at
+chance, and --update-baselines refuses to record it). FASTER_THAN pairs a fast
+path with the path it replaces; it must stay cheaper per sample, whatever
+the baselines say. Metrics that cannot meet a floor yet are listed in
+FLOOR_EXEMPT with the reason: their floor miss is only a warning, but they
+are still baselined and gated relatively, so a known gap cannot get worse.
+
+    python mlops/evaluation/eval_suite.py                     # exit 1 on regression
+    python mlops/evaluation/eval_suite.py --update-baselines  # accept current numbers
+    python mlops/evaluation/eval_suite.py --only s2_reference s4_full --json report.json
+"""
+
+import argparse
+import json
+import pickle
+import sys
+import time
+import warnings
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "mlops" / "data_generators"))
+
+from behavior_engine import BehaviorEngine, CATEGORIES, iat_sequences  # noqa: E402
+
+BASELINES_PATH = Path(__file__).resolve().parent / "baselines.json"
+REPORT_DIR = REPO_ROOT / "logs" / "eval"
+EVAL_SEED = 20261019  # Held out: training scripts and generators default to 42
+N_BINS = 10
+TARGET_FPR = 0.01
+DEFAULT_SAMPLES = 20_000
+DEFAULT_IMAGES = 60  # Per S4 scenario
+TOTAL_BUDGET_S = 60.0
+
+# metric -> (direction, tolerance). "time" tolerances are relative slack.
+GATES = {
+    "auc": ("higher", 0.01),
+    "tpr_at_1pct_fpr": ("higher", 0.03),
+    "ece": ("lower", 0.02),
+    "failsafe_violations_cued": ("lower", 0),
+    "failsafe_violation_rate": ("lower", 0.005),
+    "recovery_gap": ("higher", 0.02),
+    "fallback_rate": ("lower", 0.02),
+    "mae_vs_forest": ("lower", 0.01),
+    "score_us_per_sample": ("time", 0.5),
+}
+MIN_TIME_DELTA_US = 5.0  # Ignore jitter on sub-microsecond-scale scorers
+
+# Absolute limits per eval: minimum for "higher" metrics, maximum for "lower" ones
+FLOORS = {
+    "s2_reference": {"auc": 0.9},
+    "s2_engine": {"auc": 0.9},
+    "s2_distilled": {"auc": 0.9},
+    "s3_intent": {"failsafe_violations_cued": 0, "failsafe_violation_rate": 0.2},
+    "s4_tiered": {"auc": 0.6, "tpr_at_1pct_fpr": 0.05},
+    "s4_full": {"auc": 0.6, "tpr_at_1pct_fpr": 0.05},
+    "s5_source": {"auc": 0.75, "recovery_gap": 0.01},
+}
+
+# eval -> eval it must beat on score_us_per_sample (checked whenever both run)
+FASTER_THAN = {"s4_tiered": "s4_full"}
+
+_S4_GAP = ("Compressed JPEGs outrank Tampered: the compression score (1.0 on recompressed "
+               "images) dominates filter_ensemble_weights.json, so Tampered sits between Clean and "
+               "Compressed (AUC 0.5, nothing flagged). Gate once the ensemble is re-weighted.")
+# eval -> {metric: reason}. Known gaps: floor not enforced, baseline still is
+FLOOR_EXEMPT = {
+    "s3_intent": {"failsafe_violation_rate": "Uncued opinion/satire/personal text carries no marker the "
+                                             "keyword classifier can see; only the cued failure-safe is gated."},
+    "s4_tiered": {"auc": _S4_GAP, "tpr_at_1pct_fpr": _S4_GAP},
+    "s4_full": {"auc": _S4_GAP, "tpr_at_1pct_fpr": _S4_GAP},
+}
+
+
+# --- Metrics ---
+
+def roc_auc(y_true, scores):
+    """Mann-Whitney AUC with average ranks for ties."""
+    y_true = np.asarray(y_true, dtype=bool)
+    n_pos = int(y_true.sum())
+    n_neg = len(y_true) - n_pos
+    if n_pos == 0 or n_neg == 0:
+        return None
+    _, inverse, counts = np.unique(scores, return_inverse=True, return_counts=True)
+    avg_rank = np.cumsum(counts) - (counts - 1) / 2.0
+    ranks = avg_rank[inverse]
+    return float((ranks[y_true].sum() - n_pos * (n_pos + 1) / 2.0) / (n_pos * n_neg))
+
+
+def tpr_at_fpr(y_true, scores, fpr=TARGET_FPR):
+    """TPR at the strictest threshold whose FPR on negatives is <= fpr."""
+    y_true = np.asarray(y_true, dtype=bool)
+    neg, pos = scores[~y_true], scores[y_true]
+    if len(neg) == 0 or len(pos) == 0:
+        return None
+    threshold = np.quantile(neg, 1.0 - fpr)
+    return float((pos > threshold).mean())
+
+
+def calibration(y_true, probs, n_bins=N_BINS):
+    """Equal-width reliability curve and expected calibration error."""
+    probs = np.clip(np.asarray(probs, dtype=np.float64), 0.0, 1.0)
+    y = np.asarray(y_true, dtype=np.float64)
+    idx = np.minimum((probs * n_bins).astype(int), n_bins - 1)
+    counts = np.bincount(idx, minlength=n_bins)
+    nonzero = counts > 0
+    mean_pred = np.bincount(idx, probs, n_bins)[nonzero] / counts[nonzero]
+    frac_pos = np.bincount(idx, y, n_bins)[nonzero] / counts[nonzero]
+    ece = float((counts[nonzero] / len(probs) * np.abs(frac_pos - mean_pred)).sum())
+    curve = [
+        {"bin": int(b), "count": int(c), "mean_predicted": round(float(m), 4), "fraction_positive": round(float(f), 4)}
+        for b, c, m, f in zip(np.flatnonzero(nonzero), counts[nonzero], mean_pred, frac_pos)
+    ]
+    return curve, ece
+
+
+def score_report(y_true, risk, **extra):
+    curve, ece = calibration(y_true, risk)
+    auc = roc_auc(y_true, risk)
+    tpr = tpr_at_fpr(y_true, np.asarray(risk))
+    return {
+        "n": int(len(y_true)),
+        "positives": int(np.sum(y_true)),
+        "auc": None if auc is None else round(auc, 4),
+        "tpr_at_1pct_fpr": None if tpr is None else round(tpr, 4),
+        "ece": round(ece, 4),
+        "calibration": curve,
+        **extra,
+    }
+
+
+def _timed(fn, *args):
+    t0 = time.perf_counter()
+    out = fn(*args)
+    return out, time.perf_counter() - t0
+
+
+def _timing(load_s, score_s, n):
+    return {"load_s": round(load_s, 4), "score_s": round(score_s, 4), "score_us_per_sample": round(score_s / n * 1e6, 2)}
+
+
+# --- S2: Diffusion ---
+
+def _load_diffusion():
+    """The pickled forest, plus any unpickling warnings (e.g. sklearn version skew) as strings."""
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        with open(REPO_ROOT / "diffusion_model_artifact" / "diffusion_isolation_forest.pkl", "rb") as f:
+            clf = pickle.load(f)
+    return clf, sorted({f"{w.category.__name__}: {str(w.message).split('.')[0]}" for w in caught})
+
+
+def eval_s2_reference(samples):
+    from signals.diffusion.features import risk_from_decision
+
+    (clf, load_warnings), load_s = _timed(_load_diffusion)
+    rng = np.random.default_rng(EVAL_SEED)
+    half = samples // 2
+    X = np.vstack([rng.lognormal(2.0, 1.0, (half, 10)), rng.exponential(0.2, (half, 10))])
+    y = np.r_[np.zeros(half, bool), np.ones(half, bool)]
+    risk, score_s = _timed(lambda: risk_from_decision(clf.decision_function(X)))
+    return score_report(y, risk, load_warnings=load_warnings, **_timing(load_s, score_s, len(y)))
+
+
+def eval_s2_engine(samples):
+    from signals.diffusion.features import risk_from_decision
+
+    (clf, load_warnings), load_s = _timed(_load_diffusion)
+    batch = BehaviorEngine(seed=EVAL_SEED).generate_diffusion_batch(samples)
+    X = iat_sequences(batch, np.random.default_rng(EVAL_SEED))
+    risk, score_s = _timed(lambda: risk_from_decision(clf.decision_function(X)))
+    return score_report(batch["s2_is_coordinated"], risk, load_warnings=load_warnings,
+                        **_timing(load_s, score_s, samples))
+
+
+def eval_s2_distilled(samples):
+    from signals.diffusion.distilled import DistilledScorer
+    from signals.diffusion.features import risk_from_decision
+
+    (clf, load_warnings), load_s = _timed(_load_diffusion)
+    path = REPO_ROOT / "diffusion_model_artifact" / "distilled_lookup.npz"
+    if not path.exists():
+        return {"n": 0, "skipped": "no distilled_lookup.npz", **_timing(load_s, 0.0, 1)}
+    scorer, table_s = _timed(DistilledScorer, path)
+    batch = BehaviorEngine(seed=EVAL_SEED).generate_diffusion_batch(samples)
+    X = iat_sequences(batch, np.random.default_rng(EVAL_SEED))
+
+    def served():
+        # Serving path: table first, forest for the uncertain rows only
+        risk, uncertain = scorer.score(X)
+        if uncertain.any():
+            risk[uncertain] = risk_from_decision(clf.decision_function(X[uncertain]))
+        return risk, uncertain
+    (risk, uncertain), score_s = _timed(served)
+    forest = risk_from_decision(clf.decision_function(X))
+    return score_report(batch["s2_is_coordinated"], risk, load_warnings=load_warnings,
+                        fallback_rate=round(float(uncertain.mean()), 4),
+                        mae_vs_forest=round(float(np.abs(risk - forest).mean()), 4),
+                        **_timing(load_s + table_s, score_s, samples))
+
+
+# --- S3: Semantic ---
+
+INTENT_TEMPLATES = {
+    # (cued, text): cued texts carry the explicit marker the failure-safe relies on
+    "Factual": [
+        (False, "GDP grew by {n}% in the last quarter, the statistics office said on {day}."),
+        (False, "The council approved {n} new housing permits during the meeting on {day}."),
+        (False, "Officials confirmed {n} cases in the region as of {day}, according to the health ministry."),
+    ],
+    "Opinion": [
+        (True, "In my opinion the budget passed on {day} wastes {n} million on the wrong priorities."),
+        (True, "Opinion: the {n} new permits approved on {day} will not fix the housing crisis."),
+        (False, "I think the decision on {day} was a mistake, and {n} of my neighbours agree."),
+        (False, "Editorial: we believe the {n} cuts announced on {day} go too far."),
+    ],
+    "Satire": [
+        (True, "Satire: man declares {day} a national holiday after winning {n} arguments online."),
+        (True, "Why the chicken crossed the road on {day}: a satire in {n} parts."),
+        (False, "Area man heroically refreshes inbox {n} times before lunch on {day}."),
+    ],
+    "Personal": [
+        (False, "Just got back from the trip on {day}, {n} photos coming soon for everyone."),
+        (False, "My grandmother turned {n} on {day} and we baked her favourite cake."),
+    ],
+}
+
+
+def eval_s3_intent(samples):
+    from signals.semantic.main import classify_intent
+
+    rng = np.random.default_rng(EVAL_SEED)
+    intents = CATEGORIES["s3_intent_class"]
+    labels = rng.choice(len(intents), size=samples)
+    texts, cued = [], []
+    for label in labels:
+        options = INTENT_TEMPLATES[intents[label]]
+        is_cued, template = options[rng.integers(len(options))]
+        texts.append(template.format(n=int(rng.integers(2, 500)), day=f"2026-{rng.integers(1, 13):02d}-{rng.integers(1, 29):02d}"))
+        cued.append(is_cued)
+    cued = np.array(cued)
+
+    t0 = time.perf_counter()
+    continues = np.array([classify_intent(t) == "factual" for t in texts])  # True -> drift analysis runs
+    score_s = time.perf_counter() - t0
+
+    factual = labels == intents.index("Factual")
+    violations = ~factual & continues
+    return {
+        "n": samples,
+        "failsafe_violations_cued": int((violations & cued).sum()),
+        "failsafe_violation_rate": round(float(violations[~factual].mean()), 4),
+        "violation_rate_by_intent": {
+            intents[i]: round(float(continues[labels == i].mean()), 4)
+            for i in range(len(intents)) if intents[i] != "Factual"
+        },
+        "factual_continue_rate": round(float(continues[factual].mean()), 4),
+        **_timing(0.0, score_s, samples),
+    }
+
+
+# --- S4: Forensics ---
+
+def _eval_s4(images_per_scenario, mode):
+    from replay_harness import render_images
+    from signals.forensics.main import ensemble
+    from signals.forensics.tiers import analyze_media
+
+    t0 = time.perf_counter()
+    weights = json.loads((REPO_ROOT / "forensics_model_artifact" / "filter_ensemble_weights.json").read_text())
+    load_s = time.perf_counter() - t0
+
+    images = render_images(np.random.default_rng(EVAL_SEED), images_per_scenario)
+    blobs = [(scenario, blob) for scenario, items in images.items() for blob in items]
+    t0 = time.perf_counter()
+    scores = np.array([[r["scores"]["ela"], r["scores"]["noise"], r["scores"]["compression"]]
+                       for r in (analyze_media(blob, mode) for _, blob in blobs)])
+    risk, _ = ensemble(scores[:, 0], scores[:, 1], scores[:, 2], weights)
+    score_s = time.perf_counter() - t0
+
+    scenario = np.array([s for s, _ in blobs])
+    tampered = scenario == "Tampered"
+    threshold = weights.get("global_sensitivity_threshold", 0.65)
+    report = score_report(tampered, risk, **_timing(load_s, score_s, len(blobs)))
+    report.update({
+        "flag_rate_at_threshold": {s: round(float((risk[scenario == s] >= threshold).mean()), 4) for s in images},
+        "mean_risk": {s: round(float(risk[scenario == s].mean()), 4) for s in images},
+    })
+    return report
+
+
+def eval_s4_tiered(images):
+    return _eval_s4(images, "tiered")
+
+
+def eval_s4_full(images):
+    return _eval_s4(images, "full")
+
+
+# --- S5: Source ---
+
+def eval_s5_source(samples):
+    from signals.source.dynamics import current_risk
+
+    t0 = time.perf_counter()
+    params = json.loads((REPO_ROOT / "source_model_artifact" / "behavior_decay_params.json").read_text())
+    load_s = time.perf_counter() - t0
+
+    engine = BehaviorEngine(seed=EVAL_SEED)
+    batch = engine.generate_source_batch(samples)
+    now = time.time()
+    age_s = engine.rng.uniform(0, 30, samples) * 86400
+    anchors = [
+        None if np.isnan(h) else {"risk": float(r), "history": int(h), "corrections": int(c), "updated_at": now - a}
+        for h, r, c, a in zip(batch["s5_history_days"], batch["s5_measured_risk"], batch["s5_recent_correction"], age_s)
+    ]
+    t0 = time.perf_counter()
+    # Unscraped history -> not in the store -> the service's cold-start answer
+    risk = np.array([0.3 if a is None else min(1.0, max(0.0, current_risk(a, params, now))) for a in anchors])
+    score_s = time.perf_counter() - t0
+
+    tiers = CATEGORIES["s5_reputation_tier"]
+    mixed = batch["s5_reputation_tier"] == tiers.index("Mixed")
+    corrected = batch["s5_recent_correction"].astype(bool)
+    report = score_report(batch["s5_reputation_tier"] == tiers.index("Unreliable"), risk,
+                          **_timing(load_s, score_s, samples))
+    # Fairness: corrected Mixed sources must end up less risky than uncorrected ones
+    report["recovery_gap"] = round(float(risk[mixed & ~corrected].mean() - risk[mixed & corrected].mean()), 4)
+    return report
+
+
+EVALS = {
+    "s2_reference": (eval_s2_reference, "samples"),
+    "s2_engine": (eval_s2_engine, "samples"),
+    "s2_distilled": (eval_s2_distilled, "samples"),
+    "s3_intent": (eval_s3_intent, "samples"),
+    "s4_tiered": (eval_s4_tiered, "images"),
+    "s4_full": (eval_s4_full, "images"),
+    "s5_source": (eval_s5_source, "samples"),
+}
+
+
+# --- Regression gate ---
+
+def floor_misses(name, report):
+    """[(metric, message)] for every metric of `report` outside its absolute floor."""
+    misses = []
+    for metric, limit in FLOORS.get(name, {}).items():
+        actual = report.get(metric)
+        direction = GATES[metric][0]
+        if actual is None:
+            misses.append((metric, f"{name}.{metric}: missing (floor {limit})"))
+        elif direction == "higher" and actual < limit:
+            misses.append((metric, f"{name}.{metric}: {actual} below floor {limit}"))
+        elif direction == "lower" and actual > limit:
+            misses.append((metric, f"{name}.{metric}: {actual} above limit {limit}"))
+    return misses
+
+
+def compare(name, report, baseline):
+    """List of human-readable regressions of `report` against its baseline entry and floors."""
+    exempt = FLOOR_EXEMPT.get(name, {})
+    failures = [message for metric, message in floor_misses(name, report) if metric not in exempt]
+    for metric, expected in (baseline or {}).items():
+        actual = report.get(metric)
+        direction, tolerance = GATES[metric]
+        if actual is None:
+            failures.append(f"{name}.{metric}: missing (baseline {expected})")
+        elif direction == "higher" and actual < expected - tolerance:
+            failures.append(f"{name}.{metric}: {actual} < {expected} - {tolerance}")
+        elif direction == "lower" and actual > expected + tolerance:
+            failures.append(f"{name}.{metric}: {actual} > {expected} + {tolerance}")
+        elif direction == "time" and actual > expected * (1 + tolerance) and actual - expected > MIN_TIME_DELTA_US:
+            failures.append(f"{name}.{metric}: {actual}us > {expected}us (+{tolerance:.0%} slack)")
+    return failures
+
+
+def gated(report):
+    return {metric: report[metric] for metric in GATES if report.get(metric) is not None}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TrustLens artifact evaluation suite")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES)
+    parser.add_argument("--images", type=int, default=DEFAULT_IMAGES, help="Rendered images per S4 scenario")
+    parser.add_argument("--only", nargs="+", choices=list(EVALS))
+    parser.add_argument("--baselines", default=str(BASELINES_PATH))
+    parser.add_argument("--update-baselines", action="store_true")
+    parser.add_argument("--budget-s", type=float, default=TOTAL_BUDGET_S, help="Fail if the whole suite takes longer")
+    parser.add_argument("--json", help="Also write the full report here")
+    args = parser.parse_args()
+
+    baselines_path = Path(args.baselines)
+    baselines = json.loads(baselines_path.read_text()) if baselines_path.exists() else {}
+    sizes = {"samples": args.samples, "images": args.images}
+
+    reports, failures = {}, []
+    t_suite = time.perf_counter()
+    print(f"{'eval':<14} {'auc':>7} {'tpr@1%':>7} {'ece':>7} {'us/sample':>10} {'wall s':>7}  status")
+    for name in args.only or EVALS:
+        fn, size_key = EVALS[name]
+        t0 = time.perf_counter()
+        report = fn(sizes[size_key])
+        report["wall_s"] = round(time.perf_counter() - t0, 3)
+        reports[name] = report
+        if args.update_baselines:
+            # Never record a baseline that misses its floor
+            problems = [message for metric, message in floor_misses(name, report) if metric not in FLOOR_EXEMPT.get(name, {})]
+        else:
+            problems = compare(name, report, baselines.get(name))
+        failures += problems
+
+        def fmt(key):
+            return f"{report[key]:.4f}" if report.get(key) is not None else "-"
+        exempt = FLOOR_EXEMPT.get(name, {})
+        below_floor = [message for metric, message in floor_misses(name, report) if metric in exempt]
+        if exempt:
+            report["floor_exempt"] = exempt
+        status = ("❌ " + "; ".join(problems) if problems else "⚠️ known gaps below floor" if below_floor
+                  else "✅" if name in baselines else "🆕 no baseline")
+        print(f"{name:<14} {fmt('auc'):>7} {fmt('tpr_at_1pct_fpr'):>7} {fmt('ece'):>7} "
+              f"{report['score_us_per_sample']:>10.2f} {report['wall_s']:>7.2f}  {status}")
+        for message in below_floor:
+            print(f"{'':<14}   - {message}")
+    for fast, slow in FASTER_THAN.items():
+        if fast in reports and slow in reports:
+            fast_us, slow_us = reports[fast]["score_us_per_sample"], reports[slow]["score_us_per_sample"]
+            if fast_us >= slow_us:
+                failures.append(f"{fast}.score_us_per_sample: {fast_us}us not faster than {slow} ({slow_us}us)")
+    total_s = time.perf_counter() - t_suite
+    if total_s > args.budget_s:
+        failures.append(f"suite wall-time {total_s:.1f}s > budget {args.budget_s:.0f}s")
+
+    summary = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "seed": EVAL_SEED,
+        "sizes": sizes,
+        "total_wall_s": round(total_s, 3),
+        "reports": reports,
+        "regressions": failures,
+    }
+    REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    report_path = REPORT_DIR / f"eval-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    report_path.write_text(json.dumps(summary, indent=2))
+    if args.json:
+        Path(args.json).write_text(json.dumps(summary, indent=2))
+
+    if args.update_baselines and not failures:
+        for name, report in reports.items():
+            baselines[name] = gated(report)
+        baselines_path.write_text(json.dumps(baselines, indent=2) + "\n")
+        print(f"📌 Baselines updated for {len(reports)} evals -> {baselines_path}")
+    print(f"⏱️ Suite wall-time {total_s:.2f}s (budget {args.budget_s:.0f}s); report -> {report_path}")
+
+    if failures:
+        print(f"❌ {len(failures)} regression(s):")
+        for failure in failures:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print("✅ No regressions.")
+
+
+if __name__ == "__main__":
+    main()
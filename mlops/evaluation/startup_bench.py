@@ -0,0 +1,245 @@
+"""
+TRUSTLENS: STARTUP BENCHMARK
+Cold-starts every service as its own uvicorn process (as start_system.bat and
+Sentinel do) and measures process spawn -> first successful request on its
+main endpoint (/analyze for the five signals, /inference for TIG, /health for
+the gateway, whose /scan needs the whole stack). Results are compared against
+the per-service budget in mlops/evaluation/startup_budget.json.
+
+Per service and run:
+    first_ok_ms     spawn -> first 200 from the probe (the gated number)
+    ready_ms        process start -> lifespan startup complete (service-reported)
+    import_ms       process start -> app built (service-reported)
+    first_req_ms    latency of that first successful request
+    warm_req_ms     median latency of the next WARM_REQUESTS probes
+    deferred        lazy artifacts and their background load times (e.g. the S2 forest)
+
+An import-time profile (python -X importtime) of every service module is
+aggregated by top-level package, so a new heavy import shows up by name.
+
+    python mlops/evaluation/startup_bench.py                     # exit 1 if over budget
+    python mlops/evaluation/startup_bench.py --update-budget     # accept current numbers
+    python mlops/evaluation/startup_bench.py --only diffusion gateway --runs 5 --json startup.json
+"""
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+BUDGET_PATH = Path(__file__).resolve().parent / "startup_budget.json"
+REPORT_DIR = REPO_ROOT / "logs" / "startup"
+BASE_PORT = 8920  # Clear of the live stack (8000-8006) and the replay/prefork benches
+DEFAULT_RUNS = 3
+WARM_REQUESTS = 20
+POLL_INTERVAL_S = 0.01
+START_TIMEOUT_S = 60.0
+DEFERRED_WAIT_S = 15.0
+TOP_PACKAGES = 8
+BUDGET_SLACK = 0.25        # Relative slack over the budget before failing
+MIN_BUDGET_DELTA_MS = 150  # Ignore scheduler jitter on fast-starting services
+
+ANALYZE_PAYLOAD = {
+    "content_hash": "startup-bench",
+    "text_content": "Officials confirmed the figures in a statement on Tuesday.",
+    "media_urls": [],
+    "timestamp": "2026-01-01T00:00:00Z",
+    "source_url": "https://startup-bench.example/article",
+    # Organic-looking sequence: answered by the distilled S2 table, not the lazy forest
+    "simulated_iat_sequence": [5.0, 10.0, 2.0, 40.0, 5.0, 6.0, 12.0, 3.0, 8.0, 1.0],
+}
+SIGNAL_RESULT = {"risk_score": 0.2, "confidence_score": 0.8}
+
+# name -> (app, module, probe method, probe path, probe body)
+SERVICES = {
+    "gateway": ("gateway.main:app", "gateway.main", "GET", "/health", None),
+    "provenance": ("signals.provenance.main:app", "signals.provenance.main", "POST", "/analyze", ANALYZE_PAYLOAD),
+    "diffusion": ("signals.diffusion.main:app", "signals.diffusion.main", "POST", "/analyze", ANALYZE_PAYLOAD),
+    "semantic": ("signals.semantic.main:app", "signals.semantic.main", "POST", "/analyze", ANALYZE_PAYLOAD),
+    "forensics": ("signals.forensics.main:app", "signals.forensics.main", "POST", "/analyze", ANALYZE_PAYLOAD),
+    "source": ("signals.source.main:app", "signals.source.main", "POST", "/analyze", ANALYZE_PAYLOAD),
+    "tig": ("trust_graph.main:app", "trust_graph.main", "POST", "/inference",
+            {"signals": {"diffusion": SIGNAL_RESULT, "semantic": SIGNAL_RESULT}}),
+}
+
+
+def _env():
+    return dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(REPO_ROOT), os.environ.get("PYTHONPATH")])))
+
+
+def import_profile(module):
+    """Self import time (ms) per top-level package for `import module` in a fresh interpreter."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=REPO_ROOT, env=_env(), capture_output=True, text=True)
+    per_package = Counter()
+    for line in proc.stderr.splitlines():
+        m = re.match(r"import time:\s+(\d+) \|\s+\d+ \| \s*(\S+)", line)
+        if m:
+            per_package[m.group(2).split(".")[0]] += int(m.group(1))
+    total_ms = sum(per_package.values()) / 1000
+    top = {pkg: round(us / 1000, 1) for pkg, us in per_package.most_common(TOP_PACKAGES)}
+    return {"total_ms": round(total_ms, 1), "top_packages_ms": top, "ok": proc.returncode == 0}
+
+
+def cold_start(name, port):
+    app, _, method, path, body = SERVICES[name]
+    cmd = [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"]
+    REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    log_path = REPORT_DIR / f"{name}.log"
+    url = f"http://127.0.0.1:{port}"
+    with open(log_path, "w") as log, httpx.Client(timeout=5.0) as client:
+        t0 = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=REPO_ROOT, env=_env(), stdout=log, stderr=subprocess.STDOUT)
+        try:
+            first_ok_ms = first_req_ms = None
+            while time.perf_counter() - t0 < START_TIMEOUT_S:
+                if proc.poll() is not None:
+                    raise RuntimeError(f"{name} exited with {proc.returncode} (see {log_path})")
+                t_req = time.perf_counter()
+                try:
+                    response = client.request(method, url + path, json=body)
+                except httpx.TransportError:
+                    time.sleep(POLL_INTERVAL_S)
+                    continue
+                if response.status_code == 200:
+                    now = time.perf_counter()
+                    first_ok_ms, first_req_ms = (now - t0) * 1000, (now - t_req) * 1000
+                    break
+                time.sleep(POLL_INTERVAL_S)
+            if first_ok_ms is None:
+                raise RuntimeError(f"{name}: no 200 from {method} {path} within {START_TIMEOUT_S:.0f}s (see {log_path})")
+
+            warm = []
+            for _ in range(WARM_REQUESTS):
+                t_req = time.perf_counter()
+                client.request(method, url + path, json=body).raise_for_status()
+                warm.append((time.perf_counter() - t_req) * 1000)
+            # Lazy artifacts are prefetched after ready: wait for them so their load time is reported
+            deadline = time.perf_counter() + DEFERRED_WAIT_S
+            while True:
+                startup = client.get(url + "/metrics").json().get("startup", {})
+                pending = [a for a in startup.get("artifacts", {}).values() if not a["loaded"] and not a["error"]]
+                if not pending or time.perf_counter() > deadline:
+                    break
+                time.sleep(0.1)
+        finally:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    deferred = {key: a["load_ms"] for key, a in startup.get("artifacts", {}).items() if a["load"] != "eager"}
+    return {
+        "first_ok_ms": round(first_ok_ms, 1),
+        "ready_ms": startup.get("cold_start_ms"),
+        "import_ms": startup.get("import_ms"),
+        "first_req_ms": round(first_req_ms, 2),
+        "warm_req_ms": round(statistics.median(warm), 2),
+        "deferred": deferred,
+    }
+
+
+def summarize(runs):
+    """Median of every numeric field across runs."""
+    keys = ("first_ok_ms", "ready_ms", "import_ms", "first_req_ms", "warm_req_ms")
+    out = {key: round(statistics.median(r[key] for r in runs if r[key] is not None), 2)
+           if any(r[key] is not None for r in runs) else None for key in keys}
+    out["deferred"] = runs[-1]["deferred"]
+    out["runs"] = len(runs)
+    return out
+
+
+def check(name, result, budget):
+    """Human-readable budget violations (empty if within budget or no budget yet)."""
+    limit = (budget or {}).get("first_ok_ms")
+    actual = result["first_ok_ms"]
+    if limit is None or actual <= limit * (1 + BUDGET_SLACK) or actual - limit <= MIN_BUDGET_DELTA_MS:
+        return []
+    return [f"{name}.first_ok_ms: {actual:.0f}ms > budget {limit:.0f}ms (+{BUDGET_SLACK:.0%} slack)"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TrustLens service cold-start benchmark")
+    parser.add_argument("--only", nargs="+", choices=list(SERVICES))
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS)
+    parser.add_argument("--budget", default=str(BUDGET_PATH))
+    parser.add_argument("--update-budget", action="store_true")
+    parser.add_argument("--no-import-profile", dest="import_profile", action="store_false")
+    parser.add_argument("--json", help="Also write the full report here")
+    args = parser.parse_args()
+
+    budget_path = Path(args.budget)
+    budgets = json.loads(budget_path.read_text()) if budget_path.exists() else {}
+    results, failures = {}, []
+    print(f"{'service':<11} {'first ok':>9} {'ready':>8} {'import':>8} {'1st req':>8} {'warm req':>9} {'budget':>8}  status")
+    for i, name in enumerate(args.only or SERVICES):
+        try:
+            runs = [cold_start(name, BASE_PORT + i) for _ in range(args.runs)]
+        except RuntimeError as e:
+            failures.append(str(e))
+            print(f"{name:<11} ❌ {e}")
+            continue
+        result = summarize(runs)
+        if args.import_profile:
+            result["import_profile"] = import_profile(SERVICES[name][1])
+        results[name] = result
+        problems = [] if args.update_budget else check(name, result, budgets.get(name))
+        failures += problems
+
+        def ms(key):
+            return f"{result[key]:.0f}ms" if result.get(key) is not None else "-"
+        limit = budgets.get(name, {}).get("first_ok_ms")
+        status = "❌ " + "; ".join(problems) if problems else ("✅" if limit else "🆕 no budget")
+        print(f"{name:<11} {ms('first_ok_ms'):>9} {ms('ready_ms'):>8} {ms('import_ms'):>8} "
+              f"{result['first_req_ms']:>6.1f}ms {result['warm_req_ms']:>7.1f}ms "
+              f"{f'{limit:.0f}ms' if limit else '-':>8}  {status}")
+        if result["deferred"]:
+            print(f"{'':<11} deferred: " + ", ".join(f"{k} {'%.0fms' % v if v is not None else 'not loaded'}"
+                                                     for k, v in result["deferred"].items()))
+        if args.import_profile:
+            profile = result["import_profile"]
+            print(f"{'':<11} imports {profile['total_ms']:.0f}ms: " +
+                  ", ".join(f"{pkg} {t:.0f}" for pkg, t in list(profile["top_packages_ms"].items())[:5]))
+
+    summary = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "runs": args.runs,
+        "cpu_count": os.cpu_count(),
+        "python": sys.version.split()[0],
+        "services": results,
+        "regressions": failures,
+    }
+    report_path = REPORT_DIR / f"startup-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    REPORT_DIR.mkdir(parents=True, exist_ok=True)
+    report_path.write_text(json.dumps(summary, indent=2))
+    if args.json:
+        Path(args.json).write_text(json.dumps(summary, indent=2))
+
+    if args.update_budget:
+        for name, result in results.items():
+            budgets[name] = {"first_ok_ms": result["first_ok_ms"], "ready_ms": result["ready_ms"]}
+        budget_path.write_text(json.dumps(budgets, indent=2) + "\n")
+        print(f"📌 Budget updated for {len(results)} services -> {budget_path}")
+    print(f"📄 Report -> {report_path}")
+
+    if failures:
+        print(f"❌ {len(failures)} startup regression(s):")
+        for failure in failures:
+            print(f"   - {failure}")
+        sys.exit(1)
+    print("✅ All services within their startup budget.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+TRUSTLENS: SENTINEL ARTIFACT INTEGRITY
+Compares every artifact in artifact_manifest.json (everything a service
+loads) against the sha256 recorded there. The expected digests are pinned
+when Sentinel starts: anyone able to swap an artifact can usually rewrite the
+manifest next to it too, so a later change to the manifest (including
+`python -m common.artifacts --refresh`) is itself reported as a violation,
+and is only accepted by restarting Sentinel.
+
+Re-hashing is incremental: a file is only re-read when its (mtime, size,
+inode) fingerprint changes. Hashing streams the file through
+mmap in large blocks on a worker thread, so the event loop never blocks on
+disk I/O.
+
+The manifest hashes json/text artifacts with LF line endings (git may check
+them out with CRLF), so a small text file whose raw bytes differ is also
+accepted when its LF-normalized form matches.
+"""
+
+import asyncio
+import hashlib
+import json
+import mmap
+import os
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+MANIFEST_PATH = REPO_ROOT / "artifact_manifest.json"
+ARTIFACT_ROOT = Path(os.environ.get("TRUSTLENS_ARTIFACT_ROOT", REPO_ROOT))
+BLOCK_SIZE = 8 * 1024 * 1024
+
+TEXT_FORMATS = ("json", "text")  # Same rule as common.artifacts.TEXT_FORMATS
+MAX_TEXT_BYTES = 1024 * 1024
+
+
+def sha256_file(path):
+    """Streams a file through mmap in BLOCK_SIZE slices."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                for offset in range(0, size, BLOCK_SIZE):
+                    digest.update(view[offset:offset + BLOCK_SIZE])
+            finally:
+                view.release()
+    return digest.hexdigest()
+
+
+def sha256_lf(path):
+    """Digest of a small text file with LF line endings (how the manifest records it)."""
+    data = Path(path).read_bytes().replace(b"\r\n", b"\n")
+    return hashlib.sha256(data).hexdigest()
+
+
+def _fingerprint(path):
+    st = os.stat(path)
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def manifest_targets(manifest, root=ARTIFACT_ROOT):
+    """{"service.artifact": (path, format, expected sha256)} for every manifest entry."""
+    return {
+        f"{service}.{name}": (Path(root) / spec["path"], spec["format"], spec.get("sha256"))
+        for service, specs in manifest.items()
+        for name, spec in specs.items()
+    }
+
+
+class IntegrityChecker:
+    def __init__(self, manifest_path=MANIFEST_PATH, root=ARTIFACT_ROOT):
+        self.manifest_path = Path(manifest_path)
+        self.root = Path(root)
+        self.targets = {}            # Pinned at construction, never reloaded
+        self.manifest_sha256 = None
+        try:
+            data = self.manifest_path.read_bytes()
+            self.targets = manifest_targets(json.loads(data), self.root)
+            self.manifest_sha256 = hashlib.sha256(data).hexdigest()
+            self._manifest_fp = _fingerprint(self.manifest_path)
+        except FileNotFoundError:
+            self._manifest_fp = None
+        self._seen = {}      # name -> artifact fingerprint
+        self.results = {}    # name -> {"status", "expected", "actual"}
+        self.rehashes = 0
+
+    async def _check_manifest(self):
+        """The manifest against its digest at startup (re-hashed only when its fingerprint moves)."""
+        try:
+            fingerprint = _fingerprint(self.manifest_path)
+        except FileNotFoundError:
+            return {"status": "missing", "expected": self.manifest_sha256, "actual": None}
+        actual = self.manifest_sha256
+        if fingerprint != self._manifest_fp:
+            actual = await asyncio.to_thread(sha256_file, self.manifest_path)
+            self.rehashes += 1
+            if actual == self.manifest_sha256:
+                self._manifest_fp = fingerprint  # Touched, not changed
+        if self.manifest_sha256 is None:
+            return {"status": "missing_at_start", "expected": None, "actual": actual}
+        return {"status": "ok" if actual == self.manifest_sha256 else "mismatch",
+                "expected": self.manifest_sha256, "actual": actual}
+
+    def _record(self, changed, name, result):
+        if self.results.get(name) != result:
+            changed[name] = result
+        self.results[name] = result
+
+    async def check(self):
+        """Returns {name: result} for artifacts whose status changed since the last check."""
+        changed = {}
+        manifest = await self._check_manifest()
+        if manifest["status"] != "ok" or "manifest" in self.results:
+            self._record(changed, "manifest", manifest)
+
+        for name, (artifact, fmt, expected) in self.targets.items():
+            try:
+                fingerprint = _fingerprint(artifact)
+            except FileNotFoundError:
+                self._seen.pop(name, None)
+                self._record(changed, name, {"status": "missing", "expected": expected, "actual": None})
+                continue
+
+            if self._seen.get(name) == fingerprint:
+                continue  # Unchanged on disk: keep previous verdict, no I/O
+
+            actual = await asyncio.to_thread(sha256_file, artifact)
+            self.rehashes += 1
+            self._seen[name] = fingerprint
+            status = "ok" if actual == expected else "mismatch"
+            if (status == "mismatch" and fmt in TEXT_FORMATS
+                    and fingerprint[1] <= MAX_TEXT_BYTES
+                    and await asyncio.to_thread(sha256_lf, artifact) == expected):
+                status = "ok_eol_normalized"
+            self._record(changed, name, {"status": status, "expected": expected, "actual": actual})
+        return changed
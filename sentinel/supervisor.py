@@ -0,0 +1,278 @@
+"""
+TRUSTLENS: SENTINEL SUPERVISOR
+Local process supervisor for the gateway, signals and TIG.
+
+- Every service runs in its own process group, so a stop kills uvicorn and
+  all of its children (no zombie holding the port).
+- A port is only reused once it is free again; a busy port is retried on the
+  next heartbeat instead of blocking the reconcile pass.
+- Failed services restart with exponential backoff.
+- Signal services scale between min/max replicas on in-flight depth and p99.
+  Replicas listen on base_port + 100*i and are published to run/endpoints.json,
+  which the gateway round-robins over. A replica is published only once its
+  /health has passed, and unpublished as soon as it fails; a replica scaled
+  down is unpublished first and killed after DRAIN_S, once the gateway can no
+  longer have requests in flight to it.
+"""
+
+import json
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+ENDPOINTS_FILE = Path(os.environ.get("TRUSTLENS_ENDPOINTS", REPO_ROOT / "run" / "endpoints.json"))
+LOG_DIR = REPO_ROOT / "logs"
+HOST = "127.0.0.1"
+REPLICA_PORT_STEP = 100
+# >1: each replica is a prefork server (common/prefork.py) sharing its models across workers
+WORKERS_PER_REPLICA = int(os.environ.get("TRUSTLENS_WORKERS", "1"))
+
+# name: (module, base_port, min_replicas, max_replicas)
+SERVICE_SPECS = {
+    "provenance": ("signals.provenance.main:app", 8001, 1, 3),
+    "diffusion": ("signals.diffusion.main:app", 8002, 1, 4),
+    "semantic": ("signals.semantic.main:app", 8003, 1, 4),
+    "forensics": ("signals.forensics.main:app", 8004, 1, 4),
+    "source": ("signals.source.main:app", 8005, 1, 3),
+    "tig": ("trust_graph.main:app", 8006, 1, 1),
+    "gateway": ("gateway.main:app", 8000, 1, 1),
+}
+
+# Restart policy
+UNHEALTHY_CHECKS_BEFORE_RESTART = 2
+BACKOFF_BASE_S = 2.0
+BACKOFF_MAX_S = 120.0
+STABLE_AFTER_S = 60.0        # Healthy this long -> failure count resets
+STOP_GRACE_S = 5.0
+PORT_WAIT_S = 30.0           # Busy this long -> logged as an error (still retried)
+# Gateway side of a scale-down: endpoints.json is re-read on its next request
+# (mtime check) and a signal call times out after 5s (gateway/main.py)
+GATEWAY_RELOAD_S = 1.0
+GATEWAY_SIGNAL_TIMEOUT_S = 5.0
+DRAIN_S = GATEWAY_RELOAD_S + GATEWAY_SIGNAL_TIMEOUT_S + 1.0
+
+# Scaling policy
+SCALE_UP_IN_FLIGHT = 4.0     # Avg in-flight requests per replica
+SCALE_DOWN_IN_FLIGHT = 0.5
+P99_SLO_MS = 1000.0
+SCALE_COOLDOWN_S = 60.0
+
+
+def port_free(port):
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        try:
+            sock.bind((HOST, port))
+            return True
+        except OSError:
+            return False
+
+
+class ManagedProcess:
+    def __init__(self, name, module, port):
+        self.name = name
+        self.module = module
+        self.port = port
+        self.proc = None
+        self.failures = 0
+        self.unhealthy_checks = 0
+        self.started_at = 0.0
+        self.next_start_at = 0.0
+        self.port_busy_since = None
+        self.ready = False  # /health passed since the last start: safe to publish
+        self._log = None
+
+    @property
+    def key(self):
+        return f"{self.name}@{self.port}"
+
+    @property
+    def base_url(self):
+        return f"http://localhost:{self.port}"
+
+    def running(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self):
+        """Never blocks on a busy port: returns False and the next reconcile retries."""
+        if not port_free(self.port):
+            now = time.time()
+            if self.port_busy_since is None:
+                self.port_busy_since = now
+                logging.info(f"Supervisor: port {self.port} busy, {self.key} waiting for it")
+            elif now - self.port_busy_since > PORT_WAIT_S:
+                logging.error(f"Supervisor: port {self.port} still busy after {now - self.port_busy_since:.0f}s, "
+                              f"{self.key} not started")
+            return False
+        self.port_busy_since = None
+
+        LOG_DIR.mkdir(exist_ok=True)
+        self._log = open(LOG_DIR / f"{self.name}-{self.port}.log", "ab")
+        if WORKERS_PER_REPLICA > 1 and hasattr(os, "fork"):
+            cmd = [sys.executable, "-m", "common.prefork", "serve", self.module,
+                   "--host", HOST, "--port", str(self.port), "--workers", str(WORKERS_PER_REPLICA)]
+        else:
+            cmd = [sys.executable, "-m", "uvicorn", self.module, "--host", HOST, "--port", str(self.port)]
+        kwargs = {"cwd": str(REPO_ROOT), "stdout": self._log, "stderr": subprocess.STDOUT}
+        if os.name == "nt":
+            kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs["start_new_session"] = True  # New session = new process group
+        self.proc = subprocess.Popen(cmd, **kwargs)
+        self.started_at = time.time()
+        self.unhealthy_checks = 0
+        self.ready = False
+        logging.info(f"Supervisor: started {self.key} (pid {self.proc.pid})")
+        return True
+
+    def stop(self):
+        """Kills the whole process group, escalating to a hard kill after a grace period."""
+        if self.proc is None:
+            return
+        pid = self.proc.pid
+        try:
+            if os.name == "nt":
+                subprocess.run(["taskkill", "/PID", str(pid), "/T", "/F"], capture_output=True)
+            else:
+                os.killpg(pid, signal.SIGTERM)
+                try:
+                    self.proc.wait(timeout=STOP_GRACE_S)
+                except subprocess.TimeoutExpired:
+                    os.killpg(pid, signal.SIGKILL)
+            self.proc.wait(timeout=STOP_GRACE_S)
+        except (ProcessLookupError, subprocess.TimeoutExpired):
+            pass
+        if self._log:
+            self._log.close()
+            self._log = None
+        self.proc = None
+        self.ready = False
+        logging.info(f"Supervisor: stopped {self.key}")
+
+    def schedule_restart(self):
+        self.stop()
+        self.failures += 1
+        delay = min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** (self.failures - 1))
+        self.next_start_at = time.time() + delay
+        logging.warning(f"Supervisor: {self.key} failed ({self.failures}x), restarting in {delay:.0f}s")
+        print(f"🔁 Restarting {self.key} in {delay:.0f}s")
+
+
+class Supervisor:
+    def __init__(self, specs=SERVICE_SPECS):
+        self.specs = specs
+        self.replicas = {name: [] for name in specs}
+        self.last_scaled = {name: 0.0 for name in specs}
+        self.draining = []  # (stop at, process): unpublished, still serving in-flight requests
+
+    def start_all(self):
+        for name, (module, port, min_replicas, _) in self.specs.items():
+            for i in range(min_replicas):
+                self._add_replica(name)
+        self.publish_endpoints()
+
+    def _add_replica(self, name):
+        module, base_port, _, _ = self.specs[name]
+        used = {p.port for p in self.replicas[name]}
+        port = next(base_port + REPLICA_PORT_STEP * i for i in range(64) if base_port + REPLICA_PORT_STEP * i not in used)
+        proc = ManagedProcess(name, module, port)
+        proc.start()  # Busy port: stays pending, reconcile retries it
+        self.replicas[name].append(proc)
+        return proc
+
+    def targets(self):
+        """(key, service name, base url) for every managed replica."""
+        return [(p.key, p.name, p.base_url) for procs in self.replicas.values() for p in procs]
+
+    def publish_endpoints(self):
+        ENDPOINTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        data = {name: [p.base_url for p in procs if p.running() and p.ready] for name, procs in self.replicas.items()}
+        tmp = ENDPOINTS_FILE.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, indent=2))
+        os.replace(tmp, ENDPOINTS_FILE)  # Atomic swap: the gateway never reads a partial file
+
+    def reconcile(self, health, windows):
+        """
+        health: key -> (healthy, error); windows: key -> telemetry window (or None).
+        Restarts failed replicas and rescales signals. Returns True if the endpoint set changed.
+        """
+        changed = False
+        now = time.time()
+        for stop_at, proc in list(self.draining):
+            if now >= stop_at:
+                proc.stop()
+                self.draining.remove((stop_at, proc))
+        for name, procs in self.replicas.items():
+            for proc in procs:
+                if proc.proc is None:
+                    if now >= proc.next_start_at and proc.start():
+                        changed = True
+                    continue
+
+                healthy, _ = health.get(proc.key, (False, None))
+                exited = not proc.running()
+                if healthy and not exited:
+                    proc.unhealthy_checks = 0
+                    if not proc.ready:
+                        proc.ready = changed = True  # First passing /health: publish it
+                    if proc.failures and now - proc.started_at > STABLE_AFTER_S:
+                        proc.failures = 0
+                    continue
+                if proc.ready:
+                    proc.ready = False  # Stop routing to it while it is failing
+                    changed = True
+                # Grace period while uvicorn boots
+                if not exited and now - proc.started_at < BACKOFF_BASE_S * 5:
+                    continue
+                proc.unhealthy_checks += 1
+                if exited or proc.unhealthy_checks >= UNHEALTHY_CHECKS_BEFORE_RESTART:
+                    proc.schedule_restart()
+                    changed = True
+
+            changed |= self._autoscale(name, [windows.get(p.key) for p in procs if p.running()], now)
+
+        if changed:
+            self.publish_endpoints()
+        return changed
+
+    def _autoscale(self, name, replica_windows, now):
+        _, _, min_replicas, max_replicas = self.specs[name]
+        if max_replicas <= min_replicas or now - self.last_scaled[name] < SCALE_COOLDOWN_S:
+            return False
+        replica_windows = [w for w in replica_windows if w]
+        if not replica_windows:
+            return False
+
+        in_flight = sum(w["in_flight"] for w in replica_windows) / len(replica_windows)
+        p99s = [w["p99_ms"] for w in replica_windows if w["p99_ms"] is not None]
+        p99 = max(p99s) if p99s else 0.0
+        count = len(self.replicas[name])
+
+        if count < max_replicas and (in_flight > SCALE_UP_IN_FLIGHT or p99 > P99_SLO_MS):
+            if self._add_replica(name):
+                logging.info(f"Supervisor: scaled {name} up to {count + 1} (in_flight={in_flight:.1f}, p99={p99:.0f}ms)")
+                self.last_scaled[name] = now
+                return True
+        elif count > min_replicas and in_flight < SCALE_DOWN_IN_FLIGHT and p99 < P99_SLO_MS / 2:
+            proc = self.replicas[name].pop()
+            self.publish_endpoints()  # Unpublish now, kill once the gateway can't be using it
+            self.draining.append((now + DRAIN_S, proc))
+            logging.info(f"Supervisor: scaled {name} down to {count - 1} ({proc.key} draining for {DRAIN_S:.0f}s)")
+            self.last_scaled[name] = now
+            return True
+        return False
+
+    def shutdown(self):
+        for _, proc in self.draining:
+            proc.stop()
+        self.draining = []
+        for procs in self.replicas.values():
+            for proc in procs:
+                proc.stop()
+        if ENDPOINTS_FILE.exists():
+            ENDPOINTS_FILE.unlink()
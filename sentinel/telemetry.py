@@ -0,0 +1,142 @@
+"""
+TRUSTLENS: SENTINEL TELEMETRY
+Rolling windows over scraped /metrics snapshots, kept in fixed-size ring
+buffers. Derives request rate, error rate and latency percentiles per
+window, and flags p99 regressions against the service's own baseline.
+
+Snapshots are kept per worker pid: a prefork service answers each scrape
+from whichever worker accepts it, and every worker has its own counters.
+The service window sums the per-worker deltas, so it keeps building across
+scrapes that alternate between workers.
+"""
+
+import statistics
+
+WINDOW_SNAPSHOTS = 7        # ~60s of scrapes at a 10s heartbeat
+BASELINE_WINDOWS = 60       # p99 history used for the baseline (~10 min)
+P99_REGRESSION_FACTOR = 2.0 # Alert when p99 doubles vs baseline...
+P99_MIN_DELTA_MS = 25.0     # ...and grows by at least this much
+MIN_WINDOW_REQUESTS = 20    # Too few samples -> no percentile alert
+ERROR_RATE_ALERT = 0.05
+STALE_WORKER_S = 300.0      # Drop a pid's snapshots once it hasn't been scraped for this long
+
+
+class RingBuffer:
+    """Fixed-capacity buffer; oldest entries are overwritten."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._items = [None] * capacity
+        self._next = 0
+        self._size = 0
+
+    def append(self, item):
+        self._items[self._next] = item
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def __len__(self):
+        return self._size
+
+    def items(self):
+        """Oldest to newest."""
+        start = (self._next - self._size) % self.capacity
+        return [self._items[(start + i) % self.capacity] for i in range(self._size)]
+
+    def oldest(self):
+        return self.items()[0] if self._size else None
+
+    def newest(self):
+        return self._items[(self._next - 1) % self.capacity] if self._size else None
+
+
+def histogram_percentile(bounds, counts, q):
+    """Percentile from bucket counts, linearly interpolated inside the bucket."""
+    total = sum(counts)
+    if total == 0:
+        return None
+    target = q * total
+    seen = 0
+    lower = 0.0
+    for i, count in enumerate(counts):
+        upper = bounds[i] if i < len(bounds) else bounds[-1] * 2  # +inf bucket
+        if seen + count >= target and count:
+            return lower + (upper - lower) * (target - seen) / count
+        seen += count
+        lower = upper
+    return lower
+
+
+class ServiceTelemetry:
+    def __init__(self, name):
+        self.name = name
+        self.workers = {}  # pid -> RingBuffer of that worker's snapshots
+        self.p99_history = RingBuffer(BASELINE_WINDOWS)
+        self.last_window = None
+
+    def ingest(self, snap):
+        ring = self.workers.get(snap["pid"])
+        newest = ring.newest() if ring else None
+        if newest is None or snap["requests_total"] < newest["requests_total"]:
+            # New worker, or counters reset (pid reused): start its window over
+            ring = self.workers[snap["pid"]] = RingBuffer(WINDOW_SNAPSHOTS)
+        ring.append(snap)
+        for pid in [pid for pid, r in self.workers.items() if snap["timestamp"] - r.newest()["timestamp"] > STALE_WORKER_S]:
+            del self.workers[pid]  # Exited or replaced worker
+        self.last_window = self.window()
+        return self.last_window
+
+    def window(self):
+        """Sum over workers of (newest - oldest) snapshot deltas; gauges sum (or max, for loop lag)."""
+        if not self.workers:
+            return None
+        requests = errors = 0
+        rps = cpu_pct = 0.0
+        deltas = None
+        in_flight, rss, lags = 0, 0, []
+        for ring in self.workers.values():
+            old, new = ring.oldest(), ring.newest()
+            elapsed = max(1e-6, new["timestamp"] - old["timestamp"])
+            worker_requests = new["requests_total"] - old["requests_total"]
+            requests += worker_requests
+            errors += new["errors_total"] - old["errors_total"]
+            worker_deltas = [n - o for n, o in zip(new["latency_counts"], old["latency_counts"])]
+            deltas = worker_deltas if deltas is None else [a + b for a, b in zip(deltas, worker_deltas)]
+            if old is not new:
+                rps += worker_requests / elapsed
+                cpu_pct += ((new.get("cpu_seconds") or 0.0) - (old.get("cpu_seconds") or 0.0)) / elapsed * 100
+            in_flight += new.get("in_flight", 0)
+            rss += new.get("rss_bytes") or 0
+            if new.get("loop_lag_ms") is not None:
+                lags.append(new["loop_lag_ms"])
+        bounds = max((r.newest() for r in self.workers.values()), key=lambda s: s["timestamp"])["latency_buckets_ms"]
+        return {
+            "requests": requests,
+            "rps": round(rps, 3),
+            "error_rate": round(errors / requests, 4) if requests else 0.0,
+            "p50_ms": histogram_percentile(bounds, deltas, 0.50),
+            "p99_ms": histogram_percentile(bounds, deltas, 0.99),
+            "in_flight": in_flight,
+            "loop_lag_ms": max(lags) if lags else None,
+            "rss_mb": round(rss / 2**20, 1) if rss else None,
+            "cpu_pct": round(cpu_pct, 1),
+            "workers": len(self.workers),
+        }
+
+    def check_alerts(self):
+        """Returns alert strings for the latest window and records its p99 into the baseline."""
+        w = self.last_window
+        alerts = []
+        if not w or w["requests"] < MIN_WINDOW_REQUESTS:
+            return alerts
+
+        if w["error_rate"] > ERROR_RATE_ALERT:
+            alerts.append(f"error rate {w['error_rate'] * 100:.1f}% over last window")
+
+        history = [p for p in self.p99_history.items() if p is not None]
+        if w["p99_ms"] is not None and len(history) >= 3:
+            baseline = statistics.median(history)
+            if w["p99_ms"] > baseline * P99_REGRESSION_FACTOR and w["p99_ms"] - baseline > P99_MIN_DELTA_MS:
+                alerts.append(f"p99 regression {w['p99_ms']:.0f}ms vs baseline {baseline:.0f}ms")
+        self.p99_history.append(w["p99_ms"])
+        return alerts
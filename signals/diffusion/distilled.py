@@ -0,0 +1,84 @@
+"""
+TRUSTLENS: SIGNAL 2 - DISTILLED DIFFUSION SCORER
+
+A binned lookup table fitted to the isolation forest's risk over the four
+log-space IAT features (features.py). Scoring a request is one feature pass
+plus four searchsorted calls and a table read, instead of walking every
+tree through sklearn's per-call overhead.
+
+Each cell also stores how many distillation rows landed in it and how much
+the forest's risk varied there. A row is "uncertain" (the caller re-scores
+it with the full forest) when its cell is sparse or noisy, when it falls
+outside the distilled feature range, or when the distilled risk sits close
+to the decision threshold, or when any feature is not finite (NaN/inf
+IATs would otherwise searchsorted into the last bin).
+
+Artifact: distilled_lookup.npz (edges, risk, count, spread, thresholds),
+written by mlops/colab_notebooks/s2_diffusion_distill.py.
+"""
+
+import os
+import threading
+
+import numpy as np
+
+from .features import iat_features
+
+DECISION_THRESHOLD = 0.6  # analyze_diffusion's "coordinated" explanation cut-off
+
+
+class DistilledScorer:
+    def __init__(self, source):
+        """source: path to distilled_lookup.npz, or its arrays already loaded (common.artifacts)."""
+        if isinstance(source, (str, os.PathLike)):
+            with np.load(source) as data:
+                source = {key: data[key] for key in data.files}
+        self.edges = [source[f"edges_{i}"] for i in range(int(source["n_features"]))]
+        self.risk = source["risk"]
+        self.count = source["count"]
+        self.spread = source["spread"]
+        self.min_count = int(source["min_count"])
+        self.max_spread = float(source["max_spread"])
+        self.boundary_band = float(source["boundary_band"])
+        self.forest_sha256 = str(source["forest_sha256"])
+        self.shape = self.risk.shape
+        self.confident = (self.count >= self.min_count) & (self.spread <= self.max_spread)
+
+    def score(self, X):
+        """(n, k) raw IATs -> (risk, uncertain) arrays; uncertain rows need the forest."""
+        feats = iat_features(X)
+        index = []
+        outside = ~np.isfinite(feats).all(axis=1)
+        for i, edges in enumerate(self.edges):
+            column = feats[:, i]
+            outside |= (column < edges[0]) | (column > edges[-1])
+            index.append(np.clip(np.searchsorted(edges, column, side="right") - 1, 0, len(edges) - 2))
+        cell = tuple(index)
+        risk = self.risk[cell].astype(np.float64)
+        uncertain = outside | ~self.confident[cell] | (np.abs(risk - DECISION_THRESHOLD) < self.boundary_band)
+        return risk, uncertain
+
+
+class ScorerStats:
+    """How often the distilled table answered vs fell back to the forest."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.distilled = 0
+        self.fallback = 0
+
+    def record(self, fallback):
+        with self._lock:
+            if fallback:
+                self.fallback += 1
+            else:
+                self.distilled += 1
+
+    def snapshot(self):
+        with self._lock:
+            total = self.distilled + self.fallback
+            return {
+                "distilled": self.distilled,
+                "forest_fallback": self.fallback,
+                "fallback_rate": round(self.fallback / total, 4) if total else 0.0,
+            }
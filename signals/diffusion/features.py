@@ -0,0 +1,30 @@
+"""
+TRUSTLENS: SIGNAL 2 - IAT FEATURES
+
+Summary statistics of a share-timing sequence in log space. Coordinated
+amplification shows up as a tight spread of log inter-arrival times,
+whatever the absolute pace, which raw per-position IATs hide from a forest.
+
+Referenced by pickled models (FunctionTransformer step), so this module
+path is part of the artifact format: keep it importable as
+signals.diffusion.features. Also holds the forest score -> risk mapping, so
+the trainers and the eval suite share it with the service without importing
+the FastAPI app.
+"""
+
+import numpy as np
+
+MIN_IAT_S = 1e-3
+FEATURE_NAMES = ("log_iat_mean", "log_iat_std", "log_iat_min", "log_iat_max")
+
+
+def iat_features(X):
+    """(n, k) raw IATs in seconds -> (n, 4) log-space summary features."""
+    logs = np.log(np.maximum(np.asarray(X, dtype=np.float64), MIN_IAT_S))
+    return np.column_stack([logs.mean(axis=1), logs.std(axis=1), logs.min(axis=1), logs.max(axis=1)])
+
+
+def risk_from_decision(decision):
+    """IsolationForest decision_function -> risk in [0, 1] (vectorized)."""
+    # Inverted: Higher = Anomaly/Coordinated. Normalize roughly -0.2 to 0.2 range to 0-1
+    return np.clip((-np.asarray(decision, dtype=np.float64) + 0.2) * 2.5, 0.0, 1.0)
@@ -1,33 +1,46 @@
 from fastapi import FastAPI, HTTPException, Request
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, FiniteFloat
 from typing import List, Optional, Dict, Any
 import uuid
 import os
-import pickle
 import hashlib
-import time
+
+
+from .distilled import DistilledScorer, ScorerStats
+from .features import risk_from_decision
+from common.artifacts import ArtifactRegistry
+from common.metrics import install_metrics
+from common.profiler import install_profiler
+from common.startup import ANALYZE_WARMUP, install_startup_report
+from common.tracing import install_tracing
 
 # --- MLOPS CONFIG ---
-MODEL_PATH = "../../diffusion_model_artifact/diffusion_isolation_forest.pkl"
-HASH_PATH = "../../diffusion_model_artifact/artifact_hash.sha256"
+# Paths, hashes and load strategies live in artifact_manifest.json; the forest is
+# lazy, so sklearn is only imported when a request first needs the full forest.
+artifacts = ArtifactRegistry("diffusion").load_eager()
+model_hash = artifacts.get("model_hash", "unknown")
 
-# Load Model
-clf = None
-model_hash = "unknown"
+# "distilled": lookup table first, forest only for uncertain rows; "forest": always the full forest
+DIFFUSION_SCORER = os.environ.get("DIFFUSION_SCORER", "distilled")
 
-try:
-    if os.path.exists(MODEL_PATH):
-        with open(MODEL_PATH, "rb") as f:
-            clf = pickle.load(f)
-        
-    if os.path.exists(HASH_PATH):
-        with open(HASH_PATH, "r") as f:
-            model_hash = f.read().strip()
-            
-except Exception as e:
-    print(f"CRITICAL: Failed to load S2 Model: {e}")
+# Optional distilled scorer (mlops/colab_notebooks/s2_diffusion_distill.py)
+distilled = None
+scorer_stats = ScorerStats()
+if DIFFUSION_SCORER == "distilled" and artifacts.get("distilled") is not None:
+    try:
+        distilled = DistilledScorer(artifacts.get("distilled"))
+        if distilled.forest_sha256 != model_hash:
+            # Table was distilled from a different forest: its answers would not match the fallback
+            print(f"Distilled S2 scorer is stale (forest {distilled.forest_sha256[:8]} != {model_hash[:8]}); serving the forest only")
+            distilled = None
+    except Exception as e:
+        print(f"Failed to load distilled S2 scorer, serving the forest only: {e}")
 
 app = FastAPI(title="TrustLens Signal: Diffusion Risk")
+install_metrics(app, "diffusion")
+install_tracing(app, "diffusion")
+install_profiler(app, "diffusion")
+install_startup_report(app, "diffusion", artifacts, warmup=[("POST", "/analyze", ANALYZE_WARMUP)])
 
 class AnalyzeRequest(BaseModel):
     content_hash: str
@@ -36,7 +49,7 @@ class AnalyzeRequest(BaseModel):
     timestamp: str
     source_url: str
     # Simulated metadata for local demo if extraction is weak
-    simulated_iat_sequence: Optional[List[float]] = None 
+    simulated_iat_sequence: Optional[List[FiniteFloat]] = None 
 
 class SignalResponse(BaseModel):
     signal_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -49,8 +62,6 @@ class SignalResponse(BaseModel):
 
 @app.post("/analyze", response_model=SignalResponse)
 async def analyze_diffusion(request: AnalyzeRequest):
-    global clf
-    
     # 1. Feature Extraction (Simulated for Extension MVP)
     # The extension sends hash/url. In a real crawler, we'd fetch share history.
     # For local proto, we accept "simulated_iat_sequence" or generate dummy features.
@@ -70,15 +81,22 @@ async def analyze_diffusion(request: AnalyzeRequest):
             # Unknown
             features = None
 
-    if not clf:
+    if not artifacts.available("forest"):
         return SignalResponse(risk_score=0.5, confidence_score=0.0, explanation="Model not loaded", calibrated_uncertainty=1.0, evidence_metadata={})
 
     if features:
         # Score
         try:
-             raw_score = -clf.decision_function(features)[0] # Inverted: Higher = Anomaly/Coordinated
-             # Normalize roughly -0.2 to 0.2 range to 0-1
-             risk = max(0.0, min(1.0, (raw_score + 0.2) * 2.5))
+             scorer = "forest"
+             if distilled is not None:
+                 risk, uncertain = distilled.score(features)
+                 risk, scorer = float(risk[0]), "distilled"
+                 if uncertain[0]:
+                     scorer = "forest_fallback"
+                 scorer_stats.record(uncertain[0])
+             if scorer != "distilled":
+                 clf = await artifacts.aget("forest")
+                 risk = float(risk_from_decision(clf.decision_function(features))[0])
              
              # Organic usually has score < 0 (risk < 0.5)
              # Coordinated usually has score > 0 (risk > 0.5)
@@ -87,11 +105,13 @@ async def analyze_diffusion(request: AnalyzeRequest):
              confidence = 0.8
              uncertainty = 0.2
         except:
+             scorer = None
              risk = 0.5
              explanation = "Feature extraction failed."
              confidence = 0.1
              uncertainty = 0.9
     else:
+        scorer = None
         risk = 0.3
         explanation = "Insufficient diffusion data."
         confidence = 0.2
@@ -100,12 +120,16 @@ async def analyze_diffusion(request: AnalyzeRequest):
     return SignalResponse(
         risk_score=risk,
         confidence_score=confidence,
-        evidence_metadata={"model_version": model_hash[:8]},
+        evidence_metadata={"model_version": model_hash[:8], "scorer": scorer},
         explanation=explanation,
         calibrated_uncertainty=uncertainty
     )
 
+@app.get("/stats")
+def scorer_statistics():
+    return {"scorer": "distilled" if distilled is not None else "forest", **scorer_stats.snapshot()}
+
 @app.get("/health")
 def health_check():
-    status = "healthy" if clf else "degraded"
+    status = "healthy" if artifacts.available("forest") else "degraded"
     return {"status": status, "service": "diffusion", "model_hash": model_hash}
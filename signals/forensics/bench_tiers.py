@@ -0,0 +1,122 @@
+"""
+TRUSTLENS: SIGNAL 4 - TIERED FORENSICS BENCHMARK
+
+Builds a synthetic corpus of Clean / Compressed / Tampered JPEGs (the mix of
+BehaviorEngine.generate_forensics_event) plus CleanNoExif (web images with
+metadata stripped, which is the norm) and Stripped ones (a splice laundered
+through a re-share that drops EXIF), and compares CPU time of the
+full-resolution baseline against the tiered screen. Compressed and Stripped
+must always escalate; clean media must mostly exit at the screen, EXIF or not.
+
+Usage (from repo root):
+    python -m signals.forensics.bench_tiers --count 60 --size 1600x1200
+"""
+
+import argparse
+import io
+import time
+import numpy as np
+from PIL import Image
+
+from .tiers import analyze_media, TierStats
+
+SCENARIO_MIX = {"Clean": 0.25, "CleanNoExif": 0.25, "Compressed": 0.3, "Stripped": 0.1, "Tampered": 0.1}
+MAX_CLEAN_ESCALATION = 0.2  # Above this the screen isn't saving anything
+
+
+def _scene(rng, width, height):
+    """Smooth photographic-ish scene: gradients + low-frequency texture + sensor noise."""
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    base = 120 + 60 * np.sin(x / rng.uniform(40, 120)) * np.cos(y / rng.uniform(40, 120))
+    base += (x / width) * rng.uniform(-40, 40) + (y / height) * rng.uniform(-40, 40)
+    rgb = np.stack([base * rng.uniform(0.8, 1.2) for _ in range(3)], axis=2)
+    rgb += rng.normal(0, 3.0, rgb.shape)
+    return np.clip(rgb, 0, 255).astype(np.uint8)
+
+
+def _encode(arr, quality, software=None, strip=False):
+    img = Image.fromarray(arr)
+    buf = io.BytesIO()
+    if strip:
+        img.save(buf, "JPEG", quality=quality)
+        return buf.getvalue()
+    exif = Image.Exif()
+    exif[0x010F] = "TrustLensCam"  # Make
+    if software:
+        exif[0x0131] = software    # Software
+    img.save(buf, "JPEG", quality=quality, exif=exif.tobytes())
+    return buf.getvalue()
+
+
+def make_sample(rng, scenario, width, height):
+    scene = _scene(rng, width, height)
+    if scenario == "Clean":
+        return _encode(scene, 92)
+    if scenario == "CleanNoExif":
+        return _encode(scene, 92, strip=True)
+    if scenario == "Compressed":
+        # Re-shared through a platform: aggressive re-encode, metadata kept
+        first = Image.open(io.BytesIO(_encode(scene, 90)))
+        return _encode(np.asarray(first), int(rng.integers(25, 45)))
+    # Tampered: splice a patch with a different noise floor, then re-save
+    ph, pw = height // 3, width // 3
+    y0, x0 = int(rng.integers(0, height - ph)), int(rng.integers(0, width - pw))
+    patch = scene[y0:y0 + ph, x0:x0 + pw].astype(np.float32)
+    patch += rng.normal(0, 14.0, patch.shape)
+    scene[y0:y0 + ph, x0:x0 + pw] = np.clip(patch, 0, 255).astype(np.uint8)
+    if scenario == "Stripped":
+        # Same splice, re-shared: metadata (and the software tag) dropped, moderate re-encode
+        return _encode(scene, int(rng.integers(70, 85)), strip=True)
+    return _encode(scene, 92, software="Adobe Photoshop 25.0")
+
+
+def build_corpus(count, width, height, seed=7):
+    rng = np.random.default_rng(seed)
+    names = list(SCENARIO_MIX)
+    scenarios = rng.choice(names, size=count, p=list(SCENARIO_MIX.values()))
+    return [(str(s), make_sample(rng, s, width, height)) for s in scenarios]
+
+
+def run(corpus, mode):
+    stats = TierStats()
+    per_scenario = {}
+    cpu0 = time.process_time()
+    for scenario, data in corpus:
+        result = analyze_media(data, mode=mode, stats=stats)
+        per_scenario.setdefault(scenario, []).append(result["tier"] == "full")
+    cpu = time.process_time() - cpu0
+    escalation = {s: round(sum(v) / len(v), 2) for s, v in per_scenario.items()}
+    return cpu, stats.snapshot(), escalation
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiered vs full forensics CPU benchmark")
+    parser.add_argument("--count", type=int, default=60)
+    parser.add_argument("--size", default="1600x1200")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.split("x"))
+
+    print(f"🚀 Building synthetic corpus: {args.count} images @ {width}x{height}...")
+    corpus = build_corpus(args.count, width, height)
+
+    full_cpu, full_stats, _ = run(corpus, "full")
+    tiered_cpu, tiered_stats, escalation = run(corpus, "tiered")
+
+    print(f"✅ Full-resolution baseline: {full_cpu:.2f}s CPU ({full_stats['mean_full_ms']:.1f} ms/image)")
+    print(f"✅ Tiered: {tiered_cpu:.2f}s CPU")
+    print(f"   - Mean screen: {tiered_stats['mean_screen_ms']:.1f} ms, mean full: {tiered_stats['mean_full_ms']:.1f} ms")
+    print(f"   - Escalation rate: {tiered_stats['escalation_rate'] * 100:.1f}%  per scenario: {escalation}")
+    saved = full_cpu - tiered_cpu
+    print(f"   - CPU saved: {saved:.2f}s ({saved / full_cpu * 100 if full_cpu else 0:.1f}%)")
+    cleared = [s for s in ("Compressed", "Stripped") if escalation.get(s, 1.0) < 1.0]
+    wasted = [s for s in ("Clean", "CleanNoExif") if escalation.get(s, 0.0) > MAX_CLEAN_ESCALATION]
+    if cleared:
+        print(f"⚠️ Screen cleared re-shared media: {cleared}")
+    if wasted:
+        print(f"⚠️ Screen escalates clean media: {wasted}")
+    if cleared or wasted or tiered_cpu >= full_cpu:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
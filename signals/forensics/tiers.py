@@ -0,0 +1,252 @@
+"""
+TRUSTLENS: SIGNAL 4 - TIERED MEDIA FORENSICS
+
+Tier 0 (screen): container metadata (JPEG quantization tables, EXIF) plus a
+cheap downsampled decode. Most clean media exits here.
+Tier 1 (full): full-resolution ELA + noise residual filters. Only media the
+screen marks as suspicious or uncertain escalates.
+
+Heavily recompressed JPEGs are always uncertain: blocking artifacts flatten
+the thumbnail's noise statistics, so a splice laundered through a re-share
+would screen as clean. Missing EXIF alone is normal on the web (most
+platforms strip it) and only nudges the screen risk.
+"""
+
+import io
+import time
+import threading
+import numpy as np
+from PIL import Image
+
+# Screen tuning
+SCREEN_SIZE = 256          # Longest edge of the tier-0 decode
+CLEAR_BELOW = 0.25         # Screen risk below this exits early as clean
+RECOMPRESSED_ABOVE = 0.5   # Compression score (quality <= 65) that always escalates
+NO_EXIF_BUMP = 0.05        # Weak evidence: only borderline screens escalate on it
+ELA_QUALITY = 90           # Re-save quality for Error Level Analysis
+BLOCK = 16                 # Block size for local consistency statistics
+
+EDITING_SOFTWARE = (b"Photoshop", b"GIMP", b"Affinity", b"Pixelmator", b"Lightroom", b"FaceApp")
+
+# Standard IJG luminance table (quality 50), used to estimate encoder quality
+STD_LUMA_TABLE = np.array([
+    16, 11, 10, 16, 24, 40, 51, 61, 12, 12, 14, 19, 26, 58, 60, 55,
+    14, 13, 16, 24, 40, 57, 69, 56, 14, 17, 22, 29, 51, 87, 80, 62,
+    18, 22, 37, 56, 68, 109, 103, 77, 24, 35, 55, 64, 81, 104, 113, 92,
+    49, 64, 78, 87, 103, 121, 120, 101, 72, 92, 95, 98, 112, 100, 103, 99,
+], dtype=np.float64)
+
+# JPEG stores DQT entries in zigzag order; the table above is row-major
+ZIGZAG = np.array([
+    0, 1, 8, 16, 9, 2, 3, 10, 17, 24, 32, 25, 18, 11, 4, 5,
+    12, 19, 26, 33, 40, 48, 41, 34, 27, 20, 13, 6, 7, 14, 21, 28,
+    35, 42, 49, 56, 57, 50, 43, 36, 29, 22, 15, 23, 30, 37, 44, 51,
+    58, 59, 52, 45, 38, 31, 39, 46, 53, 60, 61, 54, 47, 55, 62, 63,
+])
+
+
+class TierStats:
+    """Per-tier counters and timings, shared across requests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.screened = 0
+        self.escalated = 0
+        self.tier_ms = {"screen": 0.0, "full": 0.0}
+
+    def record(self, timings_ms, escalated):
+        with self._lock:
+            self.screened += 1
+            if escalated:
+                self.escalated += 1
+            for tier, ms in timings_ms.items():
+                self.tier_ms[tier] += ms
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "screened": self.screened,
+                "escalated": self.escalated,
+                "escalation_rate": round(self.escalated / self.screened, 4) if self.screened else 0.0,
+                "mean_screen_ms": round(self.tier_ms["screen"] / self.screened, 3) if self.screened else 0.0,
+                "mean_full_ms": round(self.tier_ms["full"] / self.escalated, 3) if self.escalated else 0.0,
+            }
+
+
+def inspect_container(data):
+    """
+    Walks JPEG markers up to Start-Of-Scan without touching entropy-coded data.
+    Returns quantization tables, EXIF presence and editing-software hints.
+    """
+    info = {"format": "unknown", "quant_tables": {}, "exif_present": False, "editing_software": None}
+    if data[:2] != b"\xff\xd8":
+        if data[:8] == b"\x89PNG\r\n\x1a\n":
+            info["format"] = "png"
+        return info
+
+    info["format"] = "jpeg"
+    pos = 2
+    while pos + 4 <= len(data):
+        if data[pos] != 0xFF:
+            break
+        marker = data[pos + 1]
+        if marker == 0xFF:  # Fill byte
+            pos += 1
+            continue
+        if marker == 0xDA:  # SOS: image data follows, headers are done
+            break
+        seg_len = int.from_bytes(data[pos + 2:pos + 4], "big")
+        segment = data[pos + 4:pos + 2 + seg_len]
+
+        if marker == 0xDB:  # DQT, may hold several tables
+            i = 0
+            while i < len(segment):
+                precision, table_id = segment[i] >> 4, segment[i] & 0x0F
+                width = 2 if precision else 1
+                raw = segment[i + 1:i + 1 + 64 * width]
+                values = np.frombuffer(raw, dtype=">u2" if width == 2 else np.uint8).astype(np.float64)
+                if len(values) == 64:
+                    table = np.empty(64)
+                    table[ZIGZAG] = values
+                    info["quant_tables"][table_id] = table
+                i += 1 + 64 * width
+        elif marker == 0xE1 and segment.startswith(b"Exif\x00\x00"):
+            info["exif_present"] = True
+            for name in EDITING_SOFTWARE:
+                if name in segment:
+                    info["editing_software"] = name.decode()
+                    break
+
+        pos += 2 + seg_len
+    return info
+
+
+def estimate_quality(quant_tables):
+    """IJG-style quality estimate from the luminance table (None if unknown)."""
+    luma = quant_tables.get(0)
+    if luma is None:
+        return None
+    scale = float(np.mean(luma / STD_LUMA_TABLE) * 100.0)
+    quality = (200.0 - scale) / 2.0 if scale <= 100.0 else 5000.0 / scale
+    return max(1.0, min(100.0, quality))
+
+
+def compression_score(quality):
+    # q>=90 -> ~0, q<=40 -> ~1. Unknown quality is treated as mid.
+    if quality is None:
+        return 0.5
+    return float(np.clip((90.0 - quality) / 50.0, 0.0, 1.0))
+
+
+def _block_view(arr, block=BLOCK):
+    h = (arr.shape[0] // block) * block
+    w = (arr.shape[1] // block) * block
+    return arr[:h, :w].reshape(h // block, block, w // block, block)
+
+
+def noise_inconsistency(gray):
+    """
+    High-pass residual (pixel minus 4-neighbour mean), std per block.
+    Spliced regions carry a different noise floor than the host image.
+    """
+    residual = gray[1:-1, 1:-1] - 0.25 * (gray[:-2, 1:-1] + gray[2:, 1:-1] + gray[1:-1, :-2] + gray[1:-1, 2:])
+    blocks = _block_view(residual)
+    if blocks.size == 0:
+        return 0.0
+    block_std = blocks.std(axis=(1, 3)).ravel()
+    lo, hi = np.percentile(block_std, [10, 90])
+    # Spread of the noise floor relative to its typical level
+    return float(np.clip((hi - lo) / (np.median(block_std) + 1e-6) / 4.0, 0.0, 1.0))
+
+
+def ela_inconsistency(img):
+    """Error Level Analysis: re-save at a fixed quality, look for blocks that re-compress differently."""
+    buf = io.BytesIO()
+    img.save(buf, "JPEG", quality=ELA_QUALITY)
+    resaved = Image.open(io.BytesIO(buf.getvalue())).convert(img.mode)
+    diff = np.abs(np.asarray(img, dtype=np.float32) - np.asarray(resaved, dtype=np.float32))
+    if diff.ndim == 3:
+        diff = diff.mean(axis=2)
+    blocks = _block_view(diff)
+    if blocks.size == 0:
+        return 0.0
+    block_err = blocks.mean(axis=(1, 3)).ravel()
+    median = np.median(block_err)
+    return float(np.clip((np.percentile(block_err, 99) - median) / (median + 1.0) / 3.0, 0.0, 1.0))
+
+
+def screen(data, container):
+    """Tier 0: downsampled decode + metadata. Returns (scores, screen_risk)."""
+    img = Image.open(io.BytesIO(data))
+    if container["format"] == "jpeg":
+        # DCT-domain downscale: the decoder skips most of the IDCT work
+        img.draft("L", (SCREEN_SIZE, SCREEN_SIZE))
+    img = img.convert("L")
+    img.thumbnail((SCREEN_SIZE, SCREEN_SIZE))
+    gray = np.asarray(img, dtype=np.float32)
+
+    quality = estimate_quality(container["quant_tables"])
+    scores = {
+        "ela": 0.0,  # ELA is meaningless at thumbnail scale; left to tier 1
+        "noise": noise_inconsistency(gray),
+        "compression": compression_score(quality),
+        "jpeg_quality": None if quality is None else round(quality, 1),
+    }
+    screen_risk = scores["noise"]
+    if container["editing_software"]:
+        screen_risk = max(screen_risk, 0.5)
+    if container["format"] != "jpeg":
+        # No quantization evidence: uncertain, not clean
+        screen_risk = max(screen_risk, CLEAR_BELOW)
+    elif scores["compression"] >= RECOMPRESSED_ABOVE:
+        # Re-shared: the thumbnail can't vouch for it
+        screen_risk = max(screen_risk, CLEAR_BELOW)
+    elif not container["exif_present"]:
+        screen_risk += NO_EXIF_BUMP
+    return scores, screen_risk
+
+
+def full_analysis(data, container):
+    """Tier 1: full-resolution ELA and noise residual."""
+    img = Image.open(io.BytesIO(data)).convert("RGB")
+    gray = np.asarray(img.convert("L"), dtype=np.float32)
+    quality = estimate_quality(container["quant_tables"])
+    return {
+        "ela": ela_inconsistency(img),
+        "noise": noise_inconsistency(gray),
+        "compression": compression_score(quality),
+        "jpeg_quality": None if quality is None else round(quality, 1),
+    }
+
+
+def analyze_media(data, mode="tiered", stats=None):
+    """
+    Runs the forensic tiers on raw media bytes.
+    mode="tiered": screen first, escalate only if suspicious/uncertain.
+    mode="full": always run full-resolution filters (baseline).
+    """
+    timings = {"screen": 0.0, "full": 0.0}
+    container = inspect_container(data)
+
+    escalated = True
+    if mode == "tiered":
+        t0 = time.perf_counter()
+        scores, screen_risk = screen(data, container)
+        timings["screen"] = (time.perf_counter() - t0) * 1000
+        escalated = screen_risk >= CLEAR_BELOW
+
+    if escalated:
+        t0 = time.perf_counter()
+        scores = full_analysis(data, container)
+        timings["full"] = (time.perf_counter() - t0) * 1000
+
+    if stats is not None:
+        stats.record(timings, escalated)
+
+    return {
+        "scores": scores,
+        "tier": "full" if escalated else "screen",
+        "exif_present": container["exif_present"],
+        "editing_software": container["editing_software"],
+        "timings_ms": {k: round(v, 3) for k, v in timings.items()},
+    }
@@ -0,0 +1,717 @@
+"""
+TRUSTLENS: SIGNAL 1 - C2PA MANIFEST EXTRACTION & VERIFICATION
+
+Streaming scan of fetched media for a C2PA manifest store (JUMBF), stopping
+as soon as the container headers are past (JPEG SOS / PNG IEND), so image
+data is never decoded. The active manifest's claim signature (COSE_Sign1)
+is verified against its x5chain, and the chain is validated as a certificate
+path to local trust anchors under the C2PA signer profile (issuers must be
+CAs with keyCertSign; the signer an end entity with digitalSignature and a
+C2PA extendedKeyUsage).
+
+Verified results are cached by manifest-store hash, and chain checks by
+chain hash, so re-shared signed assets skip all crypto work. Entries expire
+when a certificate on the path enters or leaves its validity window, so a
+signer is never reported trusted past its notAfter.
+
+Scope: claim signature, certificate chain, the hashes of every assertion
+the claim references, and the c2pa.hash.data hard binding (the asset bytes
+outside the manifest's exclusion ranges). The binding needs the whole file,
+so it is checked per asset and never cached; a manifest that doesn't bind
+(or whose asset wasn't available) is never reported trusted.
+"""
+
+import hashlib
+import hmac
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+C2PA_UUID = bytes.fromhex("6332706100110010800000AA00389B71")  # "c2pa" JUMBF type
+MAX_SCAN_BYTES = 8 * 1024 * 1024   # Give up if no manifest in the first 8MB (generic formats)
+HASH_ALGS = {"sha256": hashlib.sha256, "sha384": hashlib.sha384, "sha512": hashlib.sha512}
+CACHE_SIZE = 4096
+
+# COSE algorithm identifiers used by C2PA signers
+COSE_ES256, COSE_ES384, COSE_ES512 = -7, -35, -36
+COSE_PS256, COSE_PS384, COSE_PS512 = -37, -38, -39
+COSE_EDDSA = -8
+COSE_HDR_ALG, COSE_HDR_X5CHAIN = 1, 33
+
+# extendedKeyUsage purposes a C2PA claim signer may carry (C2PA 2.x, 14.5.1)
+C2PA_SIGNER_EKUS = {
+    "1.3.6.1.5.5.7.3.4",    # emailProtection
+    "1.3.6.1.5.5.7.3.36",   # documentSigning
+    "1.3.6.1.5.5.7.3.8",    # timeStamping
+    "1.3.6.1.5.5.7.3.9",    # OCSPSigning
+    "1.3.6.1.4.1.311.76.59.1.9",  # MS C2PA signing
+    "1.3.6.1.4.1.62558.2.1",      # c2pa-kp-claimSigning
+}
+
+
+# --- Minimal CBOR (RFC 8949) ---
+
+class CBORTag:
+    def __init__(self, tag, value):
+        self.tag, self.value = tag, value
+
+
+def cbor_loads(data):
+    value, _ = _cbor_decode(memoryview(data), 0)
+    return value
+
+
+def _cbor_read_arg(buf, pos, info):
+    if info < 24:
+        return info, pos
+    size = {24: 1, 25: 2, 26: 4, 27: 8}.get(info)
+    if size is None:
+        return None, pos  # Indefinite length
+    return int.from_bytes(buf[pos:pos + size], "big"), pos + size
+
+
+def _cbor_decode(buf, pos):
+    initial = buf[pos]
+    major, info = initial >> 5, initial & 0x1F
+    pos += 1
+
+    if major == 7:
+        if info == 20:
+            return False, pos
+        if info == 21:
+            return True, pos
+        if info in (22, 23):
+            return None, pos
+        if info == 25:
+            return struct.unpack(">e", buf[pos:pos + 2])[0], pos + 2
+        if info == 26:
+            return struct.unpack(">f", buf[pos:pos + 4])[0], pos + 4
+        if info == 27:
+            return struct.unpack(">d", buf[pos:pos + 8])[0], pos + 8
+        return info, pos  # Other simple values
+
+    arg, pos = _cbor_read_arg(buf, pos, info)
+    if major == 0:
+        return arg, pos
+    if major == 1:
+        return -1 - arg, pos
+    if major in (2, 3):
+        if arg is None:  # Indefinite: concatenate chunks until break
+            parts = []
+            while buf[pos] != 0xFF:
+                part, pos = _cbor_decode(buf, pos)
+                parts.append(part)
+            joined = b"".join(parts) if major == 2 else "".join(parts)
+            return joined, pos + 1
+        raw = bytes(buf[pos:pos + arg])
+        return (raw if major == 2 else raw.decode("utf-8")), pos + arg
+    if major == 4:
+        items = []
+        while (arg is None and buf[pos] != 0xFF) or (arg is not None and len(items) < arg):
+            item, pos = _cbor_decode(buf, pos)
+            items.append(item)
+        return items, (pos + 1 if arg is None else pos)
+    if major == 5:
+        out = {}
+        while (arg is None and buf[pos] != 0xFF) or (arg is not None and len(out) < arg):
+            key, pos = _cbor_decode(buf, pos)
+            out[key], pos = _cbor_decode(buf, pos)
+        return out, (pos + 1 if arg is None else pos)
+    # major == 6: tag
+    value, pos = _cbor_decode(buf, pos)
+    return CBORTag(arg, value), pos
+
+
+def _cbor_head(major, arg):
+    if arg < 24:
+        return bytes([(major << 5) | arg])
+    for info, size in ((24, 1), (25, 2), (26, 4), (27, 8)):
+        if arg < (1 << (8 * size)):
+            return bytes([(major << 5) | info]) + arg.to_bytes(size, "big")
+    raise ValueError("CBOR argument too large")
+
+
+def cbor_dumps(value):
+    """Canonical-enough encoder for COSE Sig_structure and fixtures."""
+    if value is None:
+        return b"\xf6"
+    if value is True:
+        return b"\xf5"
+    if value is False:
+        return b"\xf4"
+    if isinstance(value, int):
+        return _cbor_head(0, value) if value >= 0 else _cbor_head(1, -1 - value)
+    if isinstance(value, (bytes, bytearray)):
+        return _cbor_head(2, len(value)) + bytes(value)
+    if isinstance(value, str):
+        raw = value.encode("utf-8")
+        return _cbor_head(3, len(raw)) + raw
+    if isinstance(value, (list, tuple)):
+        return _cbor_head(4, len(value)) + b"".join(cbor_dumps(v) for v in value)
+    if isinstance(value, dict):
+        return _cbor_head(5, len(value)) + b"".join(cbor_dumps(k) + cbor_dumps(v) for k, v in value.items())
+    if isinstance(value, CBORTag):
+        return _cbor_head(6, value.tag) + cbor_dumps(value.value)
+    if isinstance(value, float):
+        return b"\xfb" + struct.pack(">d", value)
+    raise TypeError(f"Cannot CBOR-encode {type(value).__name__}")
+
+
+# --- JUMBF boxes (ISO 19566-5) ---
+
+def iter_boxes(data, start=0, end=None):
+    """Yields (box_type, payload_start, payload_end) for consecutive ISO BMFF-style boxes."""
+    end = len(data) if end is None else end
+    pos = start
+    while pos + 8 <= end:
+        size = int.from_bytes(data[pos:pos + 4], "big")
+        box_type = bytes(data[pos + 4:pos + 8])
+        header = 8
+        if size == 1:
+            size = int.from_bytes(data[pos + 8:pos + 16], "big")
+            header = 16
+        elif size == 0:
+            size = end - pos
+        if size < header or pos + size > end:
+            return
+        yield box_type, pos + header, pos + size
+        pos += size
+
+
+def parse_superbox(data, start, end):
+    """
+    Parses a 'jumb' payload into {"label", "type", "children", "content", "raw"}:
+    children are nested superboxes, content is the list of (type, bytes) boxes,
+    raw the payload itself (what assertion hashes cover).
+    """
+    node = {"label": None, "type": None, "children": [], "content": [], "raw": bytes(data[start:end])}
+    for box_type, p0, p1 in iter_boxes(data, start, end):
+        if box_type == b"jumd":
+            node["type"] = bytes(data[p0:p0 + 16])
+            toggles = data[p0 + 16]
+            if toggles & 0x02:
+                label_end = data.index(b"\x00", p0 + 17, p1) if b"\x00" in data[p0 + 17:p1] else p1
+                node["label"] = bytes(data[p0 + 17:label_end]).decode("utf-8", "replace")
+        elif box_type == b"jumb":
+            node["children"].append(parse_superbox(data, p0, p1))
+        else:
+            node["content"].append((box_type, bytes(data[p0:p1])))
+    return node
+
+
+def _child(node, *labels):
+    for child in node["children"]:
+        if child["label"] in labels:
+            return child
+    return None
+
+
+def _content(node, box_type=b"cbor"):
+    for t, payload in node["content"]:
+        if t == box_type:
+            return payload
+    return None
+
+
+# --- Streaming extraction ---
+
+class ManifestScanner:
+    """
+    Incremental byte scanner. feed() chunks as they arrive; `done` flips once
+    the manifest store is complete or the container headers are exhausted.
+    """
+
+    def __init__(self):
+        self.buf = bytearray()
+        self.format = None
+        self.done = False
+        self.manifest_store = None
+        self.bytes_seen = 0
+        self._pos = 0          # Parse cursor into buf
+        self._skip = 0         # Bytes still to discard (PNG chunk bodies)
+        self._segments = {}    # JPEG APP11 box instance -> [(seq, payload)]
+
+    def feed(self, chunk):
+        if self.done:
+            return
+        self.bytes_seen += len(chunk)
+        if self._skip:
+            dropped = min(self._skip, len(chunk))
+            self._skip -= dropped
+            chunk = chunk[dropped:]
+        self.buf += chunk
+
+        if self.format is None and len(self.buf) >= 8:
+            if self.buf[:2] == b"\xff\xd8":
+                self.format, self._pos = "jpeg", 2
+            elif self.buf[:8] == b"\x89PNG\r\n\x1a\n":
+                self.format, self._pos = "png", 8
+            else:
+                self.format = "generic"
+
+        if self.format == "jpeg":
+            self._scan_jpeg()
+        elif self.format == "png":
+            self._scan_png()
+        elif self.format == "generic":
+            self._scan_generic()
+
+        # Drop consumed bytes so memory stays bounded
+        if self._pos and self.format in ("jpeg", "png"):
+            del self.buf[:self._pos]
+            self._pos = 0
+        if self.bytes_seen > MAX_SCAN_BYTES:
+            self.done = True
+
+    def finish(self):
+        if self.format == "generic" and not self.manifest_store:
+            self._scan_generic(final=True)
+        self.done = True
+        return self.manifest_store
+
+    def _scan_jpeg(self):
+        buf = self.buf
+        while self._pos + 4 <= len(buf):
+            if buf[self._pos] != 0xFF:
+                self.done = True
+                return
+            marker = buf[self._pos + 1]
+            if marker == 0xFF:
+                self._pos += 1
+                continue
+            if marker == 0xDA or marker == 0xD9:  # SOS/EOI: metadata segments are over
+                self._assemble_jpeg()
+                self.done = True
+                return
+            if 0xD0 <= marker <= 0xD7 or marker == 0x01:
+                self._pos += 2
+                continue
+            seg_len = int.from_bytes(buf[self._pos + 2:self._pos + 4], "big")
+            if self._pos + 2 + seg_len > len(buf):
+                return  # Wait for more bytes
+            if marker == 0xEB:  # APP11: JPEG XT / JUMBF
+                seg = bytes(buf[self._pos + 4:self._pos + 2 + seg_len])
+                if seg[:2] == b"JP" and len(seg) >= 16:
+                    instance = int.from_bytes(seg[2:4], "big")
+                    seq = int.from_bytes(seg[4:8], "big")
+                    self._segments.setdefault(instance, []).append((seq, seg[8:]))
+            self._pos += 2 + seg_len
+
+    def _assemble_jpeg(self):
+        for parts in self._segments.values():
+            parts.sort()
+            # Every packet repeats the 8-byte LBox/TBox header; keep only the first
+            box = parts[0][1] + b"".join(p[8:] for _, p in parts[1:])
+            if self._set_store(box):
+                return
+
+    def _scan_png(self):
+        buf = self.buf
+        while self._pos + 8 <= len(buf):
+            length = int.from_bytes(buf[self._pos:self._pos + 4], "big")
+            chunk_type = bytes(buf[self._pos + 4:self._pos + 8])
+            total = 12 + length
+            if chunk_type == b"IEND":
+                self.done = True
+                return
+            if chunk_type == b"caBX":
+                if self._pos + total > len(buf):
+                    return
+                if self._set_store(bytes(buf[self._pos + 8:self._pos + 8 + length])):
+                    self.done = True
+                    return
+            elif self._pos + total > len(buf):
+                # Skip bodies (IDAT etc.) without buffering them
+                self._skip = self._pos + total - len(buf)
+                self._pos = len(buf)
+                return
+            self._pos += total
+
+    def _scan_generic(self, final=False):
+        # Unknown container: look for a JUMBF superbox whose description carries the c2pa UUID
+        idx = self.buf.find(b"jumdc2pa")
+        if idx < 0:
+            idx = self.buf.find(b"jumd" + C2PA_UUID)
+        if idx < 12:
+            return
+        box_start = idx - 12  # LBox/TBox of the jumb superbox precede its jumd box header
+        if self.buf[box_start + 4:box_start + 8] != b"jumb":
+            return
+        size = int.from_bytes(self.buf[box_start:box_start + 4], "big")
+        if box_start + size <= len(self.buf):
+            if self._set_store(bytes(self.buf[box_start:box_start + size])):
+                self.done = True
+
+    def _set_store(self, box):
+        for box_type, p0, p1 in iter_boxes(box):
+            if box_type == b"jumb":
+                store = parse_superbox(box, p0, p1)
+                if store["type"] == C2PA_UUID or store["label"] == "c2pa":
+                    self.manifest_store = box
+                    return True
+        return False
+
+
+def extract_manifest_store(data):
+    """Convenience wrapper for bytes already in memory."""
+    scanner = ManifestScanner()
+    for i in range(0, len(data), 65536):
+        scanner.feed(data[i:i + 65536])
+        if scanner.done:
+            break
+    return scanner.finish()
+
+
+# --- Verification ---
+
+class _LRU:
+    """LRU whose entries may carry an expiry (epoch seconds); expired entries read as misses."""
+
+    def __init__(self, size=CACHE_SIZE):
+        self._data = OrderedDict()
+        self._size = size
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[1] is not None and time.time() >= entry[1]:
+                del self._data[key]
+                self.expired += 1
+                entry = None
+            if entry is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, expires_at=None):
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            if len(self._data) > self._size:
+                self._data.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"entries": len(self._data), "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "expired": self.expired}
+
+
+manifest_cache = _LRU()
+chain_cache = _LRU()
+
+
+def _load_trust_anchors():
+    from cryptography import x509
+
+    anchors = []
+    path = os.environ.get("C2PA_TRUST_ANCHORS")
+    if not path or not os.path.isdir(path):
+        return anchors
+    for name in sorted(os.listdir(path)):
+        if name.endswith((".pem", ".crt")):
+            with open(os.path.join(path, name), "rb") as f:
+                anchors.extend(x509.load_pem_x509_certificates(f.read()))
+    return anchors
+
+
+_trust_anchors = None
+
+
+def trust_anchors():
+    global _trust_anchors
+    if _trust_anchors is None:
+        _trust_anchors = _load_trust_anchors()
+    return _trust_anchors
+
+
+def _verify_cose(alg, public_key, signature, message):
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import ec, padding, ed25519
+    from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+
+    if alg in (COSE_ES256, COSE_ES384, COSE_ES512):
+        digest = {COSE_ES256: hashes.SHA256(), COSE_ES384: hashes.SHA384(), COSE_ES512: hashes.SHA512()}[alg]
+        half = len(signature) // 2  # COSE ECDSA signatures are raw r||s
+        der = encode_dss_signature(int.from_bytes(signature[:half], "big"), int.from_bytes(signature[half:], "big"))
+        public_key.verify(der, message, ec.ECDSA(digest))
+    elif alg in (COSE_PS256, COSE_PS384, COSE_PS512):
+        digest = {COSE_PS256: hashes.SHA256(), COSE_PS384: hashes.SHA384(), COSE_PS512: hashes.SHA512()}[alg]
+        public_key.verify(signature, message, padding.PSS(mgf=padding.MGF1(digest), salt_length=digest.digest_size), digest)
+    elif alg == COSE_EDDSA and isinstance(public_key, ed25519.Ed25519PublicKey):
+        public_key.verify(signature, message)
+    else:
+        raise ValueError(f"Unsupported COSE algorithm {alg}")
+
+
+def _require_key_usage(bit):
+    def check(policy, cert, key_usage):
+        if key_usage is None or not getattr(key_usage, bit):
+            raise ValueError(f"keyUsage must assert {bit}")
+    return check
+
+
+def _check_signer_eku(policy, cert, eku):
+    from cryptography.x509.oid import ExtendedKeyUsageOID
+
+    if eku is None or ExtendedKeyUsageOID.ANY_EXTENDED_KEY_USAGE in eku:
+        raise ValueError("signer needs a specific extendedKeyUsage")
+    if not any(oid.dotted_string in C2PA_SIGNER_EKUS for oid in eku):
+        raise ValueError("signer extendedKeyUsage is not valid for C2PA claims")
+
+
+def _check_not_ca(policy, cert, constraints):
+    if constraints is not None and constraints.ca:
+        raise ValueError("signer must not be a CA")
+
+
+def _verified_path(certs, anchors, now):
+    """
+    Builds leaf -> anchor under the C2PA signer profile: every issuer must be a
+    CA (basicConstraints cA, keyUsage keyCertSign), the signer must be an end
+    entity with digitalSignature and a C2PA extendedKeyUsage. Raises on failure.
+    """
+    from cryptography import x509
+    from cryptography.x509.verification import Criticality, ExtensionPolicy, PolicyBuilder, Store
+
+    ca_policy = ExtensionPolicy.webpki_defaults_ca().require_present(
+        x509.KeyUsage, Criticality.AGNOSTIC, _require_key_usage("key_cert_sign"))
+    ee_policy = (
+        ExtensionPolicy.permit_all()
+        .require_present(x509.KeyUsage, Criticality.AGNOSTIC, _require_key_usage("digital_signature"))
+        .require_present(x509.ExtendedKeyUsage, Criticality.AGNOSTIC, _check_signer_eku)
+        .may_be_present(x509.BasicConstraints, Criticality.AGNOSTIC, _check_not_ca)
+    )
+    verifier = (
+        PolicyBuilder().store(Store(anchors)).time(now)
+        .extension_policies(ca_policy=ca_policy, ee_policy=ee_policy)
+        .build_client_verifier()
+    )
+    return verifier.verify(certs[0], certs[1:]).chain
+
+
+def _next_validity_change(certs, now):
+    """When a verdict over `certs` can next change: the nearest notBefore/notAfter ahead of now (None: never)."""
+    start = max(cert.not_valid_before_utc for cert in certs)
+    end = min(cert.not_valid_after_utc for cert in certs)
+    if now < start:
+        return start.timestamp()
+    if now <= end:
+        return end.timestamp()
+    return None  # Already expired: stays that way
+
+
+def check_chain(chain_der):
+    """
+    Validates the x5chain as a certificate path (validity windows, CA
+    constraints, key usage) ending at a configured trust anchor. A chain that
+    doesn't reach an anchor is still checked for internal consistency (its own
+    top certificate as the anchor), which is what "signed, untrusted issuer"
+    means. Cached by chain hash until the validity window of any certificate
+    on the path (anchor included) opens or closes; `expires_at` carries that
+    time to the manifest cache.
+    """
+    key = hashlib.sha256(b"".join(chain_der)).hexdigest()
+    cached = chain_cache.get(key)
+    if cached is not None:
+        return cached
+
+    from cryptography import x509
+
+    result = {"chain_valid": False, "trusted": False, "chain_depth": len(chain_der), "signer": None, "error": None,
+              "expires_at": None}
+    certs = []
+    path = None
+    now = datetime.now(timezone.utc)
+    try:
+        certs = [x509.load_der_x509_certificate(der) for der in chain_der]
+        result["signer"] = certs[0].subject.rfc4514_string()
+        anchors = trust_anchors()
+        if anchors:
+            try:
+                path = _verified_path(certs, anchors, now)
+                result["trusted"] = True
+            except Exception:
+                path = None
+        if path is None:
+            if len(certs) > 1:
+                path = _verified_path(certs, [certs[-1]], now)
+            else:
+                # Lone self-issued signer: nothing to chain, only its validity window
+                cert = certs[0]
+                if not (cert.not_valid_before_utc <= now <= cert.not_valid_after_utc):
+                    raise ValueError(f"Certificate outside validity window: {result['signer']}")
+                path = certs
+        result["chain_valid"] = True
+        result["chain_depth"] = len(path)
+    except Exception as e:
+        result["error"] = str(e)
+
+    window_certs = path or certs
+    if window_certs:
+        result["expires_at"] = _next_validity_change(window_certs, now)
+    chain_cache.put(key, result, result["expires_at"])
+    return result
+
+
+def _resolve_assertion(store, manifest, url):
+    """JUMBF URI (self#jumbf=c2pa.assertions/<label> or /c2pa/<manifest>/...) -> superbox node."""
+    path = url.split("#jumbf=", 1)[-1]
+    node = manifest
+    if path.startswith("/"):
+        parts = path.strip("/").split("/")
+        node, parts = store, parts[1:] if parts and parts[0] == store["label"] else parts
+    else:
+        parts = path.split("/")
+    for label in parts:
+        node = _child(node, label)
+        if node is None:
+            return None
+    return node
+
+
+def check_assertions(store, manifest, claim):
+    """
+    Verifies every assertion the claim references against its recorded hash
+    (over the assertion superbox payload) and returns the hard binding
+    (c2pa.hash.data) spec. Raises on a missing or altered assertion.
+    """
+    default_alg = claim.get("alg", "sha256")
+    binding = None
+    for ref in claim.get("assertions", []):
+        url = ref.get("url", "")
+        node = _resolve_assertion(store, manifest, url)
+        if node is None:
+            raise ValueError(f"Assertion not found: {url}")
+        alg = ref.get("alg", default_alg)
+        if alg not in HASH_ALGS:
+            raise ValueError(f"Unsupported hash algorithm {alg}")
+        if not hmac.compare_digest(HASH_ALGS[alg](node["raw"]).digest(), ref.get("hash", b"")):
+            raise ValueError(f"Assertion hash mismatch: {node['label']}")
+        if (node["label"] or "").split("__")[0] == "c2pa.hash.data":
+            data_hash = cbor_loads(_content(node))
+            binding = {
+                "alg": data_hash.get("alg", default_alg),
+                "hash": data_hash.get("hash", b""),
+                "exclusions": sorted((e["start"], e["length"]) for e in data_hash.get("exclusions", [])),
+            }
+    if binding is None:
+        raise ValueError("No supported hard binding (c2pa.hash.data) in claim")
+    return binding
+
+
+def check_data_hash(asset, binding):
+    """True if the asset bytes outside the exclusion ranges hash to the bound value."""
+    hasher = HASH_ALGS.get(binding["alg"])
+    if hasher is None:
+        return False
+    digest = hasher()
+    view = memoryview(asset)
+    pos = 0
+    for start, length in binding["exclusions"]:
+        if start < pos or length < 0 or start + length > len(asset):
+            return False
+        digest.update(view[pos:start])
+        pos = start + length
+    digest.update(view[pos:])
+    return hmac.compare_digest(digest.digest(), binding["hash"])
+
+
+def verify_manifest_store(store_bytes, asset=None):
+    """
+    Validates the active manifest: claim signature, certificate chain and
+    assertion hashes (cached by the SHA-256 of the manifest store bytes), then
+    the hard binding against `asset`, the full media bytes (never cached: the
+    same manifest can be grafted onto any file).
+
+    `trusted` means all of it held: a trusted signer (`issuer_trusted`) is not
+    enough if the manifest doesn't bind to these bytes, or they weren't given.
+    """
+    key = hashlib.sha256(store_bytes).hexdigest()
+    cached = manifest_cache.get(key)
+    if cached is not None:
+        result, binding = cached
+        return _bind(result, binding, asset, cache_hit=True)
+
+    t0 = time.perf_counter()
+    result = {
+        "c2pa_present": True, "signature_valid": False, "issuer_trusted": False, "assertions_valid": False,
+        "chain_depth": 0, "claim_generator": None, "signer": None, "error": None, "manifest_hash": key,
+    }
+    chain = None
+    binding = None
+    try:
+        store = None
+        for box_type, p0, p1 in iter_boxes(store_bytes):
+            if box_type == b"jumb":
+                store = parse_superbox(store_bytes, p0, p1)
+                break
+        if not store or not store["children"]:
+            raise ValueError("Empty manifest store")
+
+        manifest = store["children"][-1]  # Active manifest is the last one
+        claim_box = _child(manifest, "c2pa.claim.v2", "c2pa.claim")
+        sig_box = _child(manifest, "c2pa.signature")
+        if not claim_box or not sig_box:
+            raise ValueError("Manifest missing claim or signature")
+        claim_bytes = _content(claim_box)
+        claim = cbor_loads(claim_bytes)
+        result["claim_generator"] = claim.get("claim_generator") or claim.get("claim_generator_info")
+
+        cose = cbor_loads(_content(sig_box))
+        if isinstance(cose, CBORTag):
+            cose = cose.value
+        protected_raw, unprotected, _, signature = cose
+        protected = cbor_loads(protected_raw) if protected_raw else {}
+        alg = protected.get(COSE_HDR_ALG)
+        x5chain = protected.get(COSE_HDR_X5CHAIN) or unprotected.get(COSE_HDR_X5CHAIN) or unprotected.get("x5chain")
+        if isinstance(x5chain, bytes):
+            x5chain = [x5chain]
+        if not x5chain:
+            raise ValueError("No x5chain in COSE headers")
+
+        chain = check_chain(x5chain)
+        result.update({"issuer_trusted": chain["trusted"], "chain_depth": chain["chain_depth"], "signer": chain["signer"]})
+        if chain["error"]:
+            result["error"] = chain["error"]
+
+        from cryptography import x509
+        signer = x509.load_der_x509_certificate(x5chain[0])
+        # Detached payload: the claim bytes are the COSE payload
+        sig_structure = cbor_dumps(["Signature1", protected_raw, b"", claim_bytes])
+        _verify_cose(alg, signer.public_key(), signature, sig_structure)
+        result["signature_valid"] = chain["chain_valid"]
+
+        binding = check_assertions(store, manifest, claim)
+        result["assertions_valid"] = True
+    except Exception as e:
+        result["error"] = result["error"] or f"{type(e).__name__}: {e}"
+
+    result["verify_ms"] = round((time.perf_counter() - t0) * 1000, 3)
+    manifest_cache.put(key, (result, binding), chain["expires_at"] if chain else None)
+    return _bind(result, binding, asset, cache_hit=False)
+
+
+def _bind(result, binding, asset, cache_hit):
+    """Per-asset part of the verdict: the hard-binding check and the overall `trusted`."""
+    out = {**result, "binding_checked": False, "binding_valid": False, "cache_hit": cache_hit}
+    if binding is not None and asset is not None:
+        out["binding_checked"] = True
+        out["binding_valid"] = check_data_hash(asset, binding)
+        if not out["binding_valid"]:
+            out["error"] = out["error"] or "Hard binding mismatch: manifest does not belong to this asset"
+    out["trusted"] = (out["signature_valid"] and out["issuer_trusted"]
+                      and out["assertions_valid"] and out["binding_valid"])
+    return out
+
+
+def cache_stats():
+    return {"manifests": manifest_cache.stats(), "chains": chain_cache.stats()}
@@ -0,0 +1,212 @@
+"""
+TRUSTLENS: SIGNAL 1 - LOCAL C2PA FIXTURES
+
+Generates a throwaway CA + signer (EC P-256), a minimal signed C2PA manifest
+store, and embeds it into a JPEG (APP11) and a PNG (caBX). Used to exercise
+the provenance signal without a real C2PA toolchain. forged.jpg is signed by
+a certificate the end-entity test signer minted as if it were a CA;
+grafted.jpg carries signed.jpg's genuine manifest on a different picture.
+
+Usage (from repo root):
+    python -m signals.provenance.fixtures ./c2pa_fixtures
+    C2PA_TRUST_ANCHORS=./c2pa_fixtures/anchors uvicorn signals.provenance.main:app --port 8001
+"""
+
+import argparse
+import datetime
+import hashlib
+import io
+import os
+import struct
+import zlib
+
+from .c2pa import C2PA_UUID, CBORTag, cbor_dumps, extract_manifest_store, COSE_ES256, COSE_HDR_ALG, COSE_HDR_X5CHAIN
+
+MANIFEST_UUID = bytes.fromhex("63326D6100110010800000AA00389B71")   # c2ma
+ASSERTIONS_UUID = bytes.fromhex("6332617300110010800000AA00389B71") # c2as
+CLAIM_UUID = bytes.fromhex("6332636C00110010800000AA00389B71")      # c2cl
+SIGNATURE_UUID = bytes.fromhex("6332637300110010800000AA00389B71")  # c2cs
+CBOR_UUID = bytes.fromhex("63626F7200110010800000AA00389B71")       # cbor
+
+
+def box(box_type, payload):
+    return (8 + len(payload)).to_bytes(4, "big") + box_type + payload
+
+
+def superbox(type_uuid, label, *contents):
+    jumd = box(b"jumd", type_uuid + b"\x03" + label.encode() + b"\x00")
+    return box(b"jumb", jumd + b"".join(contents))
+
+
+def build_certificate(subject, issuer, public_key, signing_key, ca, days=365):
+    """CA certificates get keyCertSign; signers digitalSignature + a C2PA extendedKeyUsage."""
+    from cryptography import x509
+    from cryptography.x509.oid import ExtendedKeyUsageOID, NameOID
+    from cryptography.hazmat.primitives import hashes
+
+    now = datetime.datetime.now(datetime.timezone.utc)
+    builder = (
+        x509.CertificateBuilder()
+        .subject_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, subject)]))
+        .issuer_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, issuer)]))
+        .public_key(public_key)
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=days))
+        .add_extension(x509.BasicConstraints(ca=ca, path_length=None), critical=True)
+        .add_extension(x509.KeyUsage(
+            digital_signature=not ca, content_commitment=False, key_encipherment=False,
+            data_encipherment=False, key_agreement=False, key_cert_sign=ca, crl_sign=ca,
+            encipher_only=False, decipher_only=False), critical=True)
+    )
+    if not ca:
+        builder = builder.add_extension(x509.ExtendedKeyUsage([ExtendedKeyUsageOID.EMAIL_PROTECTION]), critical=False)
+    return builder.sign(signing_key, hashes.SHA256())
+
+
+def make_certificates():
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    ca_key = ec.generate_private_key(ec.SECP256R1())
+    ca_cert = build_certificate("TrustLens Test Root", "TrustLens Test Root", ca_key.public_key(), ca_key, True)
+    signer_key = ec.generate_private_key(ec.SECP256R1())
+    signer_cert = build_certificate("TrustLens Test Signer", "TrustLens Test Root", signer_key.public_key(), ca_key, False)
+    return ca_cert, signer_cert, signer_key
+
+
+def make_forged_signer(signer_cert, signer_key):
+    """A 'newsroom' certificate minted by the (end-entity) test signer acting as a CA: must not be trusted."""
+    from cryptography.hazmat.primitives.asymmetric import ec
+
+    forged_key = ec.generate_private_key(ec.SECP256R1())
+    issuer = signer_cert.subject.rfc4514_string().split("=", 1)[1]
+    forged = build_certificate("Reuters Newsroom", issuer, forged_key.public_key(), signer_key, False)
+    return forged, forged_key
+
+
+def make_manifest_store(signer_cert, signer_key, tamper=False, chain=(), exclusion=(0, 0), asset_hash=b"\x00" * 32):
+    """Signed store with an actions assertion and a c2pa.hash.data binding (use sign_asset() to bind a file)."""
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+
+    actions = superbox(CBOR_UUID, "c2pa.actions", box(b"cbor", cbor_dumps({"actions": [{"action": "c2pa.created"}]})))
+    data_hash = superbox(CBOR_UUID, "c2pa.hash.data", box(b"cbor", cbor_dumps({
+        "exclusions": [{"start": exclusion[0], "length": exclusion[1]}],
+        "name": "jumbf manifest", "alg": "sha256", "hash": asset_hash,
+    })))
+    claim = {
+        "claim_generator": "TrustLens Fixture/1.0",
+        "signature": "self#jumbf=c2pa.signature",
+        "assertions": [
+            # Assertion hashes cover the superbox payload (description + content boxes)
+            {"url": "self#jumbf=c2pa.assertions/c2pa.actions", "hash": hashlib.sha256(actions[8:]).digest()},
+            {"url": "self#jumbf=c2pa.assertions/c2pa.hash.data", "hash": hashlib.sha256(data_hash[8:]).digest()},
+        ],
+        "alg": "sha256",
+        "dc:format": "image/jpeg",
+        "instanceID": "xmp:iid:trustlens-fixture",
+    }
+    claim_bytes = cbor_dumps(claim)
+
+    signer_der = signer_cert.public_bytes(serialization.Encoding.DER)
+    x5chain = [signer_der] + [cert.public_bytes(serialization.Encoding.DER) for cert in chain]
+    protected = cbor_dumps({COSE_HDR_ALG: COSE_ES256, COSE_HDR_X5CHAIN: x5chain})
+    to_sign = cbor_dumps(["Signature1", protected, b"", claim_bytes])
+    r, s = decode_dss_signature(signer_key.sign(to_sign, ec.ECDSA(hashes.SHA256())))
+    signature = r.to_bytes(32, "big") + s.to_bytes(32, "big")
+    cose = cbor_dumps(CBORTag(18, [protected, {}, None, signature]))
+
+    if tamper:
+        # Claim altered after signing: signature must fail
+        claim_bytes = cbor_dumps({**claim, "claim_generator": "Tampered/6.6"})
+
+    manifest = superbox(
+        MANIFEST_UUID, "urn:uuid:6f3e2f4a-trustlens-fixture",
+        superbox(ASSERTIONS_UUID, "c2pa.assertions", actions, data_hash),
+        superbox(CLAIM_UUID, "c2pa.claim", box(b"cbor", claim_bytes)),
+        superbox(SIGNATURE_UUID, "c2pa.signature", box(b"cbor", cose)),
+    )
+    return superbox(C2PA_UUID, "c2pa", manifest)
+
+
+def embed_jpeg(jpeg, store):
+    """Splits the JUMBF box across APP11 packets right after SOI."""
+    header, body = store[:8], store[8:]
+    step = 65535 - 2 - 8 - 8
+    segments = b""
+    for i in range(0, max(1, len(body)), step):
+        payload = b"JP" + (1).to_bytes(2, "big") + (i // step + 1).to_bytes(4, "big") + header + body[i:i + step]
+        segments += b"\xff\xeb" + (len(payload) + 2).to_bytes(2, "big") + payload
+    return jpeg[:2] + segments + jpeg[2:]
+
+
+def _png_insert_at(png):
+    return 8 + 12 + int.from_bytes(png[8:12], "big")  # Right after IHDR
+
+
+def embed_png(png, store):
+    """Inserts a caBX chunk right after IHDR."""
+    ihdr_end = _png_insert_at(png)
+    chunk = struct.pack(">I", len(store)) + b"caBX" + store + struct.pack(">I", zlib.crc32(b"caBX" + store))
+    return png[:ihdr_end] + chunk + png[ihdr_end:]
+
+
+def sign_asset(asset, fmt, signer_cert, signer_key, tamper=False, chain=()):
+    """
+    Embeds a manifest whose hard binding covers `asset`. The exclusion range is
+    exactly the inserted manifest bytes, so the hashed bytes are the original
+    asset; its length depends on the store size, which (CBOR ints) depends on
+    the length, so iterate until it is stable.
+    """
+    embed, offset = (embed_jpeg, 2) if fmt == "jpeg" else (embed_png, _png_insert_at(asset))
+    asset_hash = hashlib.sha256(asset).digest()
+    length = 0
+    for _ in range(4):
+        store = make_manifest_store(signer_cert, signer_key, tamper, chain, (offset, length), asset_hash)
+        embedded = embed(asset, store)
+        if len(embedded) - len(asset) == length:
+            return embedded
+        length = len(embedded) - len(asset)
+    raise RuntimeError("Manifest size did not converge")
+
+
+def main():
+    from PIL import Image
+    from cryptography.hazmat.primitives import serialization
+
+    parser = argparse.ArgumentParser(description="Generate local C2PA fixtures")
+    parser.add_argument("out_dir")
+    args = parser.parse_args()
+    os.makedirs(os.path.join(args.out_dir, "anchors"), exist_ok=True)
+
+    ca_cert, signer_cert, signer_key = make_certificates()
+    forged_cert, forged_key = make_forged_signer(signer_cert, signer_key)
+    with open(os.path.join(args.out_dir, "anchors", "test_root.pem"), "wb") as f:
+        f.write(ca_cert.public_bytes(serialization.Encoding.PEM))
+
+    img = Image.new("RGB", (320, 240), (90, 140, 200))
+    jpeg, png, other = io.BytesIO(), io.BytesIO(), io.BytesIO()
+    img.save(jpeg, "JPEG", quality=90)
+    img.save(png, "PNG")
+    Image.new("RGB", (320, 240), (200, 60, 60)).save(other, "JPEG", quality=90)
+    jpeg, png, other = jpeg.getvalue(), png.getvalue(), other.getvalue()
+
+    signed = sign_asset(jpeg, "jpeg", signer_cert, signer_key)
+    outputs = {
+        "signed.jpg": signed,
+        "signed.png": sign_asset(png, "png", signer_cert, signer_key),
+        "tampered.jpg": sign_asset(jpeg, "jpeg", signer_cert, signer_key, tamper=True),
+        "forged.jpg": sign_asset(jpeg, "jpeg", forged_cert, forged_key, chain=[signer_cert]),
+        # signed.jpg's genuine manifest moved onto a different picture: binding must fail
+        "grafted.jpg": embed_jpeg(other, extract_manifest_store(signed)),
+        "unsigned.jpg": jpeg,
+    }
+    for name, data in outputs.items():
+        with open(os.path.join(args.out_dir, name), "wb") as f:
+            f.write(data)
+    print(f"✅ Fixtures written to {args.out_dir} (trust anchor: anchors/test_root.pem)")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,30 +2,25 @@ from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import uuid
-import os
-import json
 import hashlib
-import numpy as np
 
-# --- MLOPS CONFIG ---
-CONFIG_PATH = "../../intent_model_artifact/drift_thresholds.json"
-HASH_PATH = "../../intent_model_artifact/artifact_hash.sha256"
-
-drift_config = {}
-model_hash = "unknown"
+from common.artifacts import ArtifactRegistry
+from common.metrics import install_metrics
+from common.profiler import install_profiler
+from common.startup import ANALYZE_WARMUP, install_startup_report
+from common.tracing import install_tracing
 
-try:
-    if os.path.exists(CONFIG_PATH):
-        with open(CONFIG_PATH, "r") as f:
-            drift_config = json.load(f)
-            
-    if os.path.exists(HASH_PATH):
-        with open(HASH_PATH, "r") as f:
-            model_hash = f.read().strip()
-except Exception as e:
-    print(f"CRITICAL: Failed to load S3 Config: {e}")
+# --- MLOPS CONFIG ---
+# Paths, hashes and load strategies live in artifact_manifest.json
+artifacts = ArtifactRegistry("semantic").load_eager()
+drift_config = artifacts.get("drift_thresholds", {})
+model_hash = artifacts.get("model_hash", "unknown")
 
 app = FastAPI(title="TrustLens Signal: Semantic Drift")
+install_metrics(app, "semantic")
+install_tracing(app, "semantic")
+install_profiler(app, "semantic")
+install_startup_report(app, "semantic", artifacts, warmup=[("POST", "/analyze", ANALYZE_WARMUP)])
 
 class AnalyzeRequest(BaseModel):
     content_hash: str
@@ -43,15 +38,20 @@ class SignalResponse(BaseModel):
     explanation: str
     calibrated_uncertainty: float
 
+def classify_intent(text):
+    """Keyword intent classifier: "factual" | "opinion" | "satire" (also used by the eval suite)."""
+    lowered = text.lower()
+    if "satire" in lowered: return "satire"
+    if "opinion" in lowered: return "opinion"
+    return "factual"
+
 @app.post("/analyze", response_model=SignalResponse)
 async def analyze_drift(request: AnalyzeRequest):
     # Simulated Inference using Config
     
     # 1. Intent Classification (Simulated for Speed/Proto)
     text = request.text_content or ""
-    intent = "factual"
-    if "opinion" in text.lower(): intent = "opinion"
-    if "satire" in text.lower(): intent = "satire"
+    intent = classify_intent(text)
     
     # Failure Safe Rule
     if intent != "factual":
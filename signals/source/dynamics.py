@@ -0,0 +1,182 @@
+"""
+TRUSTLENS: SIGNAL 5 - ONLINE SOURCE DYNAMICS
+
+Event-driven decay/recovery using the calibrated behavior_decay_params.json.
+Each source stores one anchor (risk at updated_at). Decay toward neutral is
+applied in closed form at read time, so no periodic table sweep is needed:
+
+    R(t) = NEUTRAL + (R_anchor - NEUTRAL) * alpha ** days_since_anchor
+
+Each anchor also carries correction_credit: how much of its risk reduction
+came from corrections. It decays with the same factor (it is part of the
+deviation from neutral), so "risk attenuated" is only claimed while it holds.
+
+Correction/error events are buffered, appended to an event log and folded
+into the anchors in one write transaction per batch (anchors are read inside
+it, so flushers in several processes never fold over each other). Batches are written by the
+background flusher (off the event loop), every FLUSH_INTERVAL_S or as soon
+as one fills.
+"""
+
+import asyncio
+import threading
+import time
+
+from .domains import normalize_host
+
+NEUTRAL_RISK = 0.5
+SECONDS_PER_DAY = 86400.0
+DEFAULT_ALPHA = 0.9
+DEFAULT_CORRECTION_REWARD = 0.3
+DEFAULT_ERROR_PENALTY = 0.2
+
+EVENT_KINDS = ("correction", "error")
+
+# Redemption for imported/seeded sources, which have a correction count but no
+# event log (the rule the service applied at read time before events existed)
+REDEMPTION_MIN_CORRECTIONS = 10
+REDEMPTION_MIN_RISK = 0.3
+REDEMPTION_DISCOUNT = 0.1
+ATTENUATION_VISIBLE = 0.01   # Decayed credit below this is no longer reported
+
+FLUSH_BATCH_SIZE = 1000
+FLUSH_INTERVAL_S = 2.0
+
+
+def decay(risk, elapsed_s, alpha=DEFAULT_ALPHA):
+    """Closed-form exponential forgetting toward neutral over elapsed seconds."""
+    days = max(0.0, elapsed_s) / SECONDS_PER_DAY
+    return NEUTRAL_RISK + (risk - NEUTRAL_RISK) * (alpha ** days)
+
+
+def current_risk(data, params, now=None):
+    """Risk for a stored anchor as of `now` (no write needed)."""
+    now = time.time() if now is None else now
+    alpha = params.get("alpha_decay_normal", DEFAULT_ALPHA)
+    return decay(data["risk"], now - data["updated_at"], alpha)
+
+
+def current_credit(data, params, now=None):
+    """Correction credit still contained in the risk as of `now`."""
+    now = time.time() if now is None else now
+    alpha = params.get("alpha_decay_normal", DEFAULT_ALPHA)
+    days = max(0.0, now - data["updated_at"]) / SECONDS_PER_DAY
+    return data.get("correction_credit", 0.0) * alpha ** days
+
+
+def seed_anchor(risk, history, corrections, updated_at):
+    """Anchor for a source imported with a correction count but no events: redemption folded in once."""
+    credit = 0.0
+    if corrections > REDEMPTION_MIN_CORRECTIONS and risk > REDEMPTION_MIN_RISK:
+        credit = min(REDEMPTION_DISCOUNT, risk)
+    return {"risk": risk - credit, "history": history, "corrections": corrections,
+            "updated_at": updated_at, "correction_credit": credit}
+
+
+def fold_events(anchor, events, params):
+    """
+    Applies time-ordered (ts, kind) events to an anchor dict and returns the
+    new anchor. Events older than the anchor apply at the anchor time.
+    """
+    alpha = params.get("alpha_decay_normal", DEFAULT_ALPHA)
+    reward = params.get("correction_reward", DEFAULT_CORRECTION_REWARD)
+    penalty = params.get("error_penalty", DEFAULT_ERROR_PENALTY)
+
+    risk, t = anchor["risk"], anchor["updated_at"]
+    history, corrections = anchor["history"], anchor["corrections"]
+    credit = anchor.get("correction_credit", 0.0)
+    for ts, kind in events:
+        if ts > t:
+            credit *= alpha ** ((ts - t) / SECONDS_PER_DAY)
+            risk = decay(risk, ts - t, alpha)
+            t = ts
+        if kind == "correction":
+            # Fairness: transparent corrections actively reduce risk
+            reduced = max(0.0, risk - reward)
+            credit += risk - reduced
+            risk = reduced
+            corrections += 1
+        elif kind == "error":
+            risk = min(1.0, risk + penalty)
+        history += 1
+    return {"risk": risk, "history": history, "corrections": corrections, "updated_at": t,
+            "correction_credit": credit}
+
+
+class ReputationUpdater:
+    """Buffers events and flushes them to the store in append-only batches."""
+
+    def __init__(self, store, params, batch_size=FLUSH_BATCH_SIZE):
+        self.store = store
+        self.params = params
+        self.batch_size = batch_size
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One fold at a time, so anchors never race
+        self._due = asyncio.Event()  # A full batch wakes the background flusher early
+        self.flushed_events = 0
+        self.flushes = 0
+
+    def submit(self, domain, kind, ts=None):
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"Unknown event kind: {kind}")
+        with self._lock:
+            self._buffer.append((normalize_host(domain), time.time() if ts is None else ts, kind))
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._due.set()
+
+    def pending(self):
+        with self._lock:
+            return len(self._buffer)
+
+    def flush(self):
+        with self._flush_lock:
+            return self._flush()
+
+    def _flush(self):
+        with self._lock:
+            events, self._buffer = self._buffer, []
+        if not events:
+            return 0
+
+        by_domain = {}
+        for domain, ts, kind in events:
+            by_domain.setdefault(domain, []).append((ts, kind))
+
+        def fold(anchors):
+            # Runs inside the store's write transaction, on anchors no other flusher can change
+            new_anchors = []
+            for domain, domain_events in by_domain.items():
+                domain_events.sort()
+                anchor = anchors.get(domain) or {
+                    # Unknown source: start at neutral, anchored at its first event
+                    "risk": NEUTRAL_RISK, "history": 0, "corrections": 0, "updated_at": domain_events[0][0],
+                    "correction_credit": 0.0,
+                }
+                new_anchors.append((domain, fold_events(anchor, domain_events, self.params)))
+            return new_anchors
+
+        try:
+            self.store.apply_events(events, fold)
+        except Exception:
+            with self._lock:  # Keep the batch (e.g. write lock timed out); the next flush retries it
+                self._buffer[:0] = events
+            raise
+        self.flushed_events += len(events)
+        self.flushes += 1
+        return len(events)
+
+    async def run(self, interval=FLUSH_INTERVAL_S):
+        """Background flusher: full batches right away, partial ones every `interval`."""
+        while True:
+            try:
+                await asyncio.wait_for(self._due.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+            self._due.clear()
+            if self.pending():
+                await asyncio.to_thread(self.flush)
+
+    def stats(self):
+        return {"pending_events": self.pending(), "flushed_events": self.flushed_events, "flushes": self.flushes}
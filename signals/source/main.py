@@ -1,21 +1,41 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 import uuid
-import os
-import json
+import asyncio
+
+from .store import SourceStore
+from .dynamics import ReputationUpdater, current_risk, current_credit, ATTENUATION_VISIBLE, EVENT_KINDS
+from .domains import lookup_candidates, memo_stats
+from common.artifacts import ArtifactRegistry
+from common.metrics import install_metrics
+from common.profiler import install_profiler
+from common.startup import ANALYZE_WARMUP, install_startup_report
+from common.tracing import install_tracing
 
 # --- MLOPS CONFIG ---
-CONFIG_PATH = "../../source_model_artifact/behavior_decay_params.json"
-params = {}
-try:
-    if os.path.exists(CONFIG_PATH):
-        with open(CONFIG_PATH, "r") as f:
-            params = json.load(f)
-except Exception as e:
-    print(f"Failed to load S5 params: {e}")
+# Paths, hashes and load strategies live in artifact_manifest.json
+artifacts = ArtifactRegistry("source").load_eager()
+params = artifacts.get("decay_params", {})
+
+# Persistent reputation store (SQLite + hot cache), opened once per process
+store = SourceStore()
+store.seed_demo()
+updater = ReputationUpdater(store, params)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    flusher = asyncio.create_task(updater.run())
+    yield
+    flusher.cancel()
+    updater.flush()
 
-app = FastAPI(title="TrustLens Signal: Source Behavior")
+app = FastAPI(title="TrustLens Signal: Source Behavior", lifespan=lifespan)
+install_metrics(app, "source")
+install_tracing(app, "source")
+install_profiler(app, "source")
+install_startup_report(app, "source", artifacts, warmup=[("POST", "/analyze", ANALYZE_WARMUP)])
 
 class AnalyzeRequest(BaseModel):
     content_hash: str
@@ -33,21 +53,22 @@ class SignalResponse(BaseModel):
     explanation: str
     calibrated_uncertainty: float
 
+class SourceEvent(BaseModel):
+    domain: str
+    kind: str # "correction" | "error"
+    timestamp: Optional[float] = None # Unix seconds; defaults to receipt time
+
 @app.post("/analyze", response_model=SignalResponse)
 async def analyze_source(request: AnalyzeRequest):
-    # Simulated Historical Database
-    # In prod, this hits Redis/Postgres
-    
-    domain = request.source_url.replace("https://", "").replace("http://", "").split("/")[0]
-    
-    # Demo Mock DB
-    mock_db = {
-        "verified-news.com": {"risk": 0.1, "history": 1000, "corrections": 5},
-        "sketchy-blog.net": {"risk": 0.8, "history": 20, "corrections": 0},
-        "reformed-outlet.org": {"risk": 0.4, "history": 500, "corrections": 12}
-    }
-    
-    data = mock_db.get(domain)
+    # Historical lookup against the persistent source store.
+    # Hierarchical fallback: most specific host first, then up to eTLD+1.
+    data = None
+    domain = None
+    for candidate in lookup_candidates(request.source_url):
+        data = store.get(candidate)
+        if data:
+            domain = candidate
+            break
     
     if not data:
         # COLD START RULE
@@ -59,25 +80,39 @@ async def analyze_source(request: AnalyzeRequest):
             calibrated_uncertainty=0.9
         )
         
-    # Apply Decay/Dynamics (Simplified)
-    risk = data["risk"]
+    # Apply Decay/Dynamics: closed-form decay from the last event anchor
+    risk = current_risk(data, params)
     conf = 0.8 if data["history"] > 100 else 0.4
     
-    # Check for Fairness/Redemption
-    if data["corrections"] > 10 and risk > 0.3:
+    # Check for Fairness/Redemption (correction rewards are already folded into the anchor;
+    # only claim attenuation while their decayed credit is still part of the risk)
+    if current_credit(data, params) >= ATTENUATION_VISIBLE:
         explanation = "Source has history of transparent corrections. Risk attenuated."
-        risk -= 0.1
     else:
         explanation = "Historical behavior analysis complete."
 
     return SignalResponse(
-        risk_score=max(0.0, risk),
+        risk_score=max(0.0, min(1.0, risk)),
         confidence_score=conf,
-        evidence_metadata=data,
+        evidence_metadata={**data, "decayed_risk": round(risk, 4), "matched_domain": domain},
         explanation=explanation,
         calibrated_uncertainty=1.0 - conf
     )
 
+@app.post("/events")
+async def ingest_events(events: List[SourceEvent]):
+    # Buffered; folded into anchors by the background flusher (early when a batch fills)
+    for event in events:
+        if event.kind not in EVENT_KINDS:
+            raise HTTPException(status_code=400, detail=f"Unknown event kind: {event.kind}")
+    for event in events:
+        updater.submit(event.domain, event.kind, event.timestamp)
+    return {"accepted": len(events), "pending": updater.pending()}
+
+@app.get("/stats")
+def store_statistics():
+    return {"sources": store.count(), **store.stats(), "updater": updater.stats(), "normalizer": memo_stats()}
+
 @app.get("/health")
 def health_check():
     return {"status": "healthy", "service": "source_behavior"}
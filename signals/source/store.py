@@ -0,0 +1,330 @@
+"""
+TRUSTLENS: SIGNAL 5 - SOURCE REPUTATION STORE
+
+Embedded on-disk store (SQLite, clustered primary-key index) keyed by
+normalized domain, with an in-memory LRU hot cache in front.
+Unknown domains are cached too, since cold-start lookups dominate traffic.
+
+Under prefork every worker has its own LRU but they share the database. A
+write through this store invalidates its own entries; writes by any other
+connection (sibling workers applying /events, a CLI import) bump SQLite's
+data_version, and each worker drops its LRU when it sees that change
+(checked at most every CACHE_CHECK_S), so no worker serves stale
+reputation for longer than that.
+
+CLI (from repo root):
+    python -m signals.source.store import sources.csv   # domain,risk,history,corrections
+    python -m signals.source.store bench --rows 2000000
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+from .domains import normalize_host
+from .dynamics import seed_anchor
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+DEFAULT_DB_PATH = os.environ.get("SOURCE_DB_PATH", str(REPO_ROOT / "data" / "source_store.sqlite"))
+
+CACHE_SIZE = 100_000
+CACHE_CHECK_S = 1.0    # Max staleness of a worker's LRU after another process writes
+LATENCY_WINDOW = 4096  # Ring buffer of recent lookup latencies (for p99)
+BUSY_TIMEOUT_S = 30.0  # Wait for another process's write transaction (event flushes queue up)
+
+# Seed rows so a fresh store behaves like the original demo
+DEMO_SOURCES = [
+    ("verified-news.com", 0.1, 1000, 5),
+    ("sketchy-blog.net", 0.8, 20, 0),
+    ("reformed-outlet.org", 0.4, 500, 12),
+]
+
+_MISSING = object()
+
+
+def normalize_key(domain):
+    return normalize_host(domain)
+
+
+class SourceStore:
+    def __init__(self, path=DEFAULT_DB_PATH, cache_size=CACHE_SIZE):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._connect()
+        # WITHOUT ROWID: rows live in the primary-key B-tree, one seek per lookup
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS sources (
+                domain TEXT PRIMARY KEY,
+                risk REAL NOT NULL,
+                history INTEGER NOT NULL,
+                corrections INTEGER NOT NULL,
+                updated_at REAL NOT NULL,
+                correction_credit REAL NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        """)
+        # Append-only log of correction/error events (anchors above are folded from it)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS source_events (
+                domain TEXT NOT NULL,
+                ts REAL NOT NULL,
+                kind TEXT NOT NULL
+            )
+        """)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(sources)")}
+        if "correction_credit" not in columns:
+            self._migrate_correction_credit()
+        self._lock = threading.Lock()
+        if hasattr(os, "register_at_fork") and path != ":memory:":
+            # Prefork workers must not share the parent's SQLite handle
+            os.register_at_fork(after_in_child=self._reopen)
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._latencies = [0.0] * LATENCY_WINDOW
+        self._lat_idx = 0
+        self._lat_count = 0
+
+    def _migrate_correction_credit(self):
+        """Stores created before corrections were credited: imported rows (no events yet) get
+        their redemption folded in, as bulk_import does now."""
+        with self._transaction():
+            self._conn.execute("ALTER TABLE sources ADD COLUMN correction_credit REAL NOT NULL DEFAULT 0")
+            rows = self._conn.execute(
+                "SELECT domain, risk, history, corrections, updated_at FROM sources "
+                "WHERE domain NOT IN (SELECT DISTINCT domain FROM source_events)").fetchall()
+            anchors = [(row[0], seed_anchor(*row[1:])) for row in rows]
+            self._conn.executemany("UPDATE sources SET risk = ?, correction_credit = ? WHERE domain = ?",
+                                   [(a["risk"], a["correction_credit"], d) for d, a in anchors if a["correction_credit"]])
+
+    def _connect(self):
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None,
+                                     timeout=BUSY_TIMEOUT_S)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA mmap_size=268435456")
+        self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        self._checked_at = time.perf_counter()
+
+    def _reopen(self):
+        self._lock = threading.Lock()
+        self._connect()
+        self._cache.clear()
+
+    def _check_external_writes(self, now):
+        """Drops the LRU if another connection committed since the last check (caller holds the lock)."""
+        self._checked_at = now
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._data_version = version
+            self._cache.clear()
+            self.invalidations += 1
+
+    @contextmanager
+    def _transaction(self, mode=""):
+        """Explicit transaction on the autocommit connection; rolled back on error so the shared
+        handle is never left inside an open transaction (caller holds the lock)."""
+        self._conn.execute(f"BEGIN {mode}")
+        try:
+            yield
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
+
+    def seed_demo(self):
+        if self.count() == 0:
+            self.bulk_import(DEMO_SOURCES)
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
+
+    def get(self, domain):
+        """Returns {"risk", "history", "corrections", "updated_at", "correction_credit"} or None for unknown sources."""
+        key = normalize_key(domain)
+        t0 = time.perf_counter()
+        with self._lock:
+            if t0 - self._checked_at > CACHE_CHECK_S:
+                self._check_external_writes(t0)
+            data = self._cache.get(key, _MISSING)
+            if data is not _MISSING:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+                row = self._conn.execute(
+                    "SELECT risk, history, corrections, updated_at, correction_credit FROM sources WHERE domain = ?", (key,)
+                ).fetchone()
+                data = None if row is None else {
+                    "risk": row[0], "history": row[1], "corrections": row[2], "updated_at": row[3],
+                    "correction_credit": row[4],
+                }
+                self._cache_put(key, data)
+            self._record_latency(time.perf_counter() - t0)
+        return data
+
+    def bulk_import(self, rows, batch_size=50_000):
+        """
+        Upserts (domain, risk, history, corrections[, updated_at]) tuples in
+        large transactions. Accepts any iterable, so CSV readers stream through.
+        Imported corrections have no event log, so their credit is folded into
+        the anchor here (dynamics.seed_anchor).
+        """
+        now = time.time()
+        total = 0
+        batch = []
+
+        def flush():
+            with self._transaction():
+                self._conn.executemany("""
+                    INSERT INTO sources (domain, risk, history, corrections, updated_at, correction_credit)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(domain) DO UPDATE SET
+                        risk = excluded.risk, history = excluded.history, corrections = excluded.corrections,
+                        updated_at = excluded.updated_at, correction_credit = excluded.correction_credit
+                """, batch)
+            for row in batch:
+                self._cache.pop(row[0], None)
+
+        with self._lock:
+            for row in rows:
+                updated_at = float(row[4]) if len(row) > 4 and row[4] not in (None, "") else now
+                a = seed_anchor(float(row[1]), int(row[2]), int(row[3]), updated_at)
+                batch.append((normalize_key(row[0]), a["risk"], a["history"], a["corrections"], a["updated_at"],
+                              a["correction_credit"]))
+                if len(batch) >= batch_size:
+                    flush()
+                    total += len(batch)
+                    batch = []
+            if batch:
+                flush()
+                total += len(batch)
+        return total
+
+    def _select_anchors(self, domains):
+        """Anchor rows for `domains`, straight from the table (caller holds the lock)."""
+        keys = list(domains)
+        found = {}
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            for row in self._conn.execute(
+                f"SELECT domain, risk, history, corrections, updated_at, correction_credit "
+                f"FROM sources WHERE domain IN ({marks})", chunk
+            ):
+                found[row[0]] = {"risk": row[1], "history": row[2], "corrections": row[3], "updated_at": row[4],
+                                 "correction_credit": row[5]}
+        return found
+
+    def anchors(self, domains):
+        """Batched anchor fetch (bypasses the cache)."""
+        with self._lock:
+            return self._select_anchors(domains)
+
+    def apply_events(self, events, fold):
+        """
+        Appends raw (domain, ts, kind) events and rewrites the anchors they touch
+        in one write transaction. `fold(anchors)` receives the current anchors of
+        those domains, read inside the transaction, and returns [(domain, anchor)].
+        BEGIN IMMEDIATE takes the write lock before the read, so flushers in
+        other processes (prefork workers, replicas) serialize instead of
+        overwriting each other's folds.
+        """
+        with self._lock, self._transaction("IMMEDIATE"):
+            new_anchors = fold(self._select_anchors({domain for domain, _, _ in events}))
+            self._conn.executemany("INSERT INTO source_events (domain, ts, kind) VALUES (?, ?, ?)", events)
+            self._conn.executemany("""
+                INSERT INTO sources (domain, risk, history, corrections, updated_at, correction_credit)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(domain) DO UPDATE SET
+                    risk = excluded.risk, history = excluded.history, corrections = excluded.corrections,
+                    updated_at = excluded.updated_at, correction_credit = excluded.correction_credit
+            """, [(d, a["risk"], a["history"], a["corrections"], a["updated_at"], a["correction_credit"])
+                  for d, a in new_anchors])
+            for domain, _ in new_anchors:
+                self._cache.pop(domain, None)
+        return new_anchors
+
+    def stats(self):
+        with self._lock:
+            n = min(self._lat_count, LATENCY_WINDOW)
+            window = sorted(self._latencies[:n])
+            lookups = self.hits + self.misses
+            return {
+                "lookups": lookups,
+                "cache_hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "cache_entries": len(self._cache),
+                "cache_invalidations": self.invalidations,
+                "lookup_p50_us": round(window[n // 2] * 1e6, 2) if n else 0.0,
+                "lookup_p99_us": round(window[min(n - 1, int(n * 0.99))] * 1e6, 2) if n else 0.0,
+            }
+
+    def _cache_put(self, key, data):
+        self._cache[key] = data
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    def _record_latency(self, seconds):
+        self._latencies[self._lat_idx] = seconds
+        self._lat_idx = (self._lat_idx + 1) % LATENCY_WINDOW
+        self._lat_count += 1
+
+
+def _csv_rows(path):
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if row and row[0] != "domain":
+                yield row
+
+
+def _bench(rows, lookups):
+    import random
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SourceStore(os.path.join(tmp, "bench.sqlite"), cache_size=CACHE_SIZE)
+        t0 = time.perf_counter()
+        store.bulk_import((f"site{i}.example", (i % 100) / 100, i % 1000, i % 7) for i in range(rows))
+        print(f"✅ Bulk import: {rows} rows in {time.perf_counter() - t0:.2f}s")
+
+        # Zipf-ish traffic: a hot head plus a long tail of cold/unknown domains
+        rng = random.Random(42)
+        t0 = time.perf_counter()
+        for _ in range(lookups):
+            i = int(rng.paretovariate(1.2)) if rng.random() < 0.8 else rng.randrange(rows * 2)
+            store.get(f"site{i}.example")
+        elapsed = time.perf_counter() - t0
+        print(f"✅ {lookups} lookups in {elapsed:.2f}s ({lookups / elapsed:,.0f}/s)")
+        print(f"   - {store.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Source reputation store")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="Bulk import domain,risk,history,corrections[,updated_at] CSV")
+    imp.add_argument("csv_path")
+    imp.add_argument("--db", default=DEFAULT_DB_PATH)
+    bench = sub.add_parser("bench", help="Lookup latency benchmark")
+    bench.add_argument("--rows", type=int, default=1_000_000)
+    bench.add_argument("--lookups", type=int, default=200_000)
+    args = parser.parse_args()
+
+    if args.cmd == "import":
+        store = SourceStore(args.db)
+        n = store.bulk_import(_csv_rows(args.csv_path))
+        print(f"✅ Imported {n} sources into {args.db} ({store.count()} total)")
+    else:
+        _bench(args.rows, args.lookups)
+
+
+if __name__ == "__main__":
+    main()
@@ -60,7 +60,17 @@ class TrustEngine:
         
         # 3. Handle Provenance Anchor (Crypto override)
         provenance = signals.get("provenance", {})
-        has_provenance = provenance.get("evidence_metadata", {}).get("c2pa_present", False)
+        provenance_meta = provenance.get("evidence_metadata", {})
+        # A manifest only anchors trust once its claim signature has verified, the signer
+        # chains to a trusted anchor and the manifest's hard binding matches these exact bytes;
+        # a valid signature from a self-made CA, or a genuine manifest grafted onto other
+        # media, proves nothing about origin
+        signed = provenance_meta.get("c2pa_present", False) and provenance_meta.get("signature_valid", False)
+        has_provenance = (signed and provenance_meta.get("trusted", False)
+                          and provenance_meta.get("binding_valid", False))
+        issuer_trusted = provenance_meta.get("issuer_trusted", provenance_meta.get("trusted", False))
+        signed_untrusted = signed and not issuer_trusted
+        signed_unbound = signed and issuer_trusted and not has_provenance
         
         if has_provenance:
             # If provenance is valid, it significantly reduces manipulation risk
@@ -103,12 +113,17 @@ class TrustEngine:
                 "diffusion_risk": round(scores.get("diffusion", 0.5), 2)
             },
             "contradictions": contradiction,
-            "explanation": self._generate_explanation(posture, contradiction, has_provenance)
+            "explanation": self._generate_explanation(posture, contradiction, has_provenance, signed_untrusted,
+                                                      signed_unbound)
         }
 
-    def _generate_explanation(self, posture, contradiction, provenance):
+    def _generate_explanation(self, posture, contradiction, provenance, signed_untrusted=False, signed_unbound=False):
         if provenance:
             return "Content source is cryptographically verified."
+        if signed_untrusted and posture == "neutral" and not contradiction:
+            return "Content is signed, but by an untrusted issuer: its origin is not verified."
+        if signed_unbound and posture == "neutral" and not contradiction:
+            return "Content carries a signed manifest that does not verifiably match it: its origin is not verified."
         if contradiction:
             return "Signals diverge: Content appears authentic but context is highly drifted."
         if posture == "high_risk":
@@ -2,8 +2,16 @@ from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 from typing import Dict, Any
 from .engine import TrustEngine
+from common.metrics import install_metrics
+from common.profiler import install_profiler
+from common.startup import install_startup_report
+from common.tracing import install_tracing, span
 
 app = FastAPI(title="TrustLens Inference Graph (TIG)")
+install_metrics(app, "tig")
+install_tracing(app, "tig")
+install_profiler(app, "tig")
+install_startup_report(app, "tig", warmup=[("POST", "/inference", {"signals": {}})])
 engine = TrustEngine()
 
 class InferenceRequest(BaseModel):
@@ -12,7 +20,8 @@ class InferenceRequest(BaseModel):
 @app.post("/inference")
 async def run_inference(request: InferenceRequest):
     try:
-        result = engine.fuse_evidence(request.signals)
+        with span("fuse_evidence", signals=len(request.signals)):
+            result = engine.fuse_evidence(request.signals)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))